@@ -3,6 +3,7 @@ from flask import Flask
 from flask_cors import CORS
 from .config import Config
 from .utils.csv_handler import initialize_csv_files
+from .utils.http_response import init_response_layer
 
 def create_app():
     app = Flask(__name__)
@@ -11,6 +12,9 @@ def create_app():
     # Enable CORS
     CORS(app, supports_credentials=True)
 
+    # Compress large responses based on Accept-Encoding
+    init_response_layer(app)
+
     # Import and register blueprints
     from .routes.admin_routes import admin_bp
     from .routes.user_routes import user_bp
@@ -20,6 +24,10 @@ def create_app():
     app.register_blueprint(user_bp)
     app.register_blueprint(api_bp)
 
+    # CLI commands (flask reassess-applications)
+    from .commands import register_commands
+    register_commands(app)
+
     with app.app_context():
         # Initialize CSV files on startup
         # initialize_csv_files()
@@ -0,0 +1,337 @@
+# backend/app/async_gateway.py file
+#
+# An asyncio front end for the chat endpoint. POST /ask is handled on the event
+# loop with an async HTTP client, so a slow Watson round trip costs a coroutine
+# instead of a whole worker thread. Every other request (and CORS preflights)
+# is passed through to the regular Flask app.
+#
+# The pipeline is the one the Flask route uses (services/chat_service.py): the
+# same session ids, cache, knowledge index, deadline, hedging and streaming.
+# Its blocking steps (cache and index lookups, IAM token fetches, chat log
+# writes) run on worker threads; only the agent call itself is async. That call
+# is recorded and replayed with WATSON_CASSETTE_MODE like http_client.post.
+#
+# Run with:  uvicorn asgi:application --port 5001
+
+import asyncio
+import json
+import random
+import uuid
+from http.cookies import SimpleCookie
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from flask.sessions import SecureCookieSession
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import dump_cookie, parse_accept_header
+
+from .services.cassette import get_cassette
+from .services.chat_service import (
+    start_chat_turn, finish_chat_turn, agent_request, agent_failure, stream_failure
+)
+from .services.hedging import agent_post_async, planned_hedge_delay
+from .services.watson_service import parse_agent_reply, parse_agent_stream_line
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AsyncChatGateway:
+    """ASGI application serving /ask asynchronously and everything else through Flask."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.wsgi_app = WsgiToAsgi(flask_app)
+        self._client = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/ask' and scope['method'] == 'POST':
+            await self._handle_ask(scope, receive, send)
+        else:
+            await self.wsgi_app(scope, receive, send)
+
+    # --- Lifecycle ---
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._client is not None:
+                    await self._client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _get_client(self):
+        """Create the pooled async client on first use, inside the running event loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.config['HTTP_READ_TIMEOUT'], connect=self.config['HTTP_CONNECT_TIMEOUT']),
+                limits=httpx.Limits(
+                    max_connections=self.config['ASYNC_GATEWAY_MAX_CONNECTIONS'],
+                    max_keepalive_connections=self.config['HTTP_POOL_SIZE'],
+                ),
+            )
+        return self._client
+
+    # --- Outbound calls ---
+
+    async def _post(self, url, deadline, stream=False, **kwargs):
+        """POST to the agent, recorded to or replayed from the Watson cassette like http_client.post"""
+        client = self._get_client()
+        mode = self.config['WATSON_CASSETTE_MODE']
+        if mode == 'replay':
+            cassette = await asyncio.to_thread(get_cassette, self.config['WATSON_CASSETTE_PATH'])
+            stored = cassette.replay_entry(url, dict(kwargs, stream=stream))
+            return httpx.Response(stored['status'], headers=stored['headers'], content=stored['body'].encode('utf-8'),
+                                  request=client.build_request('POST', url, **kwargs))
+        response = await self._send(client, url, deadline, stream, **kwargs)
+        if mode == 'record':
+            cassette = await asyncio.to_thread(get_cassette, self.config['WATSON_CASSETTE_PATH'])
+            cassette.record_async(url, dict(kwargs, stream=stream), response)
+        return response
+
+    async def _send(self, client, url, deadline, stream, **kwargs):
+        """
+        POST with the same retry policy as the sync http_client (429/5xx with
+        jittered backoff), each attempt timed out by what is left of the deadline
+        """
+        for attempt in range(self.config['HTTP_MAX_RETRIES'] + 1):
+            remaining = deadline.remaining()
+            timeout = httpx.Timeout(remaining, connect=min(self.config['HTTP_CONNECT_TIMEOUT'], remaining))
+            request = client.build_request('POST', url, timeout=timeout, **kwargs)
+            response = await client.send(request, stream=stream)
+            delay = self.config['HTTP_BACKOFF_FACTOR'] * (2 ** attempt) + random.uniform(0, self.config['HTTP_BACKOFF_JITTER'])
+            if (response.status_code not in RETRY_STATUSES or attempt == self.config['HTTP_MAX_RETRIES']
+                    or delay >= deadline.remaining()):
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+        return response
+
+    async def _ask_agent(self, turn):
+        """chat_service.ask_agent with the async client: the reply, or None if it can't be parsed"""
+        headers, payload = await self._run(agent_request, turn)
+        with self.flask_app.app_context():
+            delay = planned_hedge_delay()
+        url = self.config['AGENT_ENDPOINT']
+        # Hedged when AGENT_HEDGE_ENABLED: a slow call is sent again and the first answer wins
+        response = await agent_post_async(
+            lambda: self._post(url, turn.deadline, headers=headers, json=payload), turn.deadline, delay
+        )
+        response.raise_for_status()
+        return parse_agent_reply(response.json())
+
+    async def _stream_agent(self, turn):
+        """chat_service.stream_agent with the async client. Raises before the first chunk if the call fails."""
+        headers, payload = await self._run(agent_request, turn, True)
+        response = await asyncio.wait_for(
+            self._post(self.config['AGENT_ENDPOINT'], turn.deadline, stream=True, headers=headers, json=payload),
+            timeout=turn.deadline.remaining(),
+        )
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            response.raise_for_status()
+        return self._agent_chunks(response)
+
+    @staticmethod
+    async def _agent_chunks(response):
+        """Reply chunks from a streamed agent response, like watson_service.iter_agent_stream"""
+        try:
+            if 'text/event-stream' not in response.headers.get('content-type', ''):
+                await response.aread()
+                yield parse_agent_reply(response.json(), "")
+                return
+            async for line in response.aiter_lines():
+                chunk = parse_agent_stream_line(line)
+                if chunk is None:
+                    break
+                if chunk:
+                    yield chunk
+        finally:
+            await response.aclose()
+
+    # --- /ask ---
+
+    async def _handle_ask(self, scope, receive, send):
+        body = await self._read_body(receive)
+        session_id, cookie_headers = self._chat_session(scope)
+        try:
+            request_data = json.loads(body or b'{}')
+        except ValueError:
+            request_data = None
+        if not isinstance(request_data, dict):
+            await self._send_json(scope, send, 400, {"error": "Invalid request format. JSON body with 'query' key is expected."}, cookie_headers)
+            return
+
+        turn = await self._run(start_chat_turn, request_data, session_id)
+        stream = self._wants_stream(scope, request_data)
+        if turn.answer is not None:
+            if stream:
+                await self._relay(scope, send, turn, self._chunks(turn.answer_chunks()), cookie_headers)
+                return
+            await self._run(finish_chat_turn, turn, turn.answer)
+            await self._send_json(scope, send, 200, turn.answer_data(), cookie_headers)
+            return
+        if turn.error is not None:
+            error_body, status = turn.error
+            await self._send_json(scope, send, status, error_body, cookie_headers)
+            return
+
+        try:
+            if stream:
+                chunks = await self._stream_agent(turn)
+            else:
+                reply = await self._ask_agent(turn)
+        except Exception as e:
+            error_body, status = await self._run(agent_failure, turn, e)
+            await self._send_json(scope, send, status, error_body, cookie_headers)
+            return
+
+        if stream:
+            await self._relay(scope, send, turn, chunks, cookie_headers)
+            return
+        await self._run(finish_chat_turn, turn, reply)
+        await self._send_json(scope, send, 200, {"response": reply if reply is not None else "Could not parse agent response."},
+                              cookie_headers)
+
+    async def _relay(self, scope, send, turn, chunks, extra_headers):
+        """Relay reply chunks as server-sent events, then record the reply as the Flask route does"""
+        await self._start_sse(scope, send, extra_headers)
+        parts = []
+        error_response = None
+        completed = False
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                await self._send_event(send, {"delta": chunk})
+            completed = True
+            await self._send_event(send, {"done": True})
+        except Exception as e:
+            error_response = stream_failure(e)
+            await self._send_event(send, {"error": error_response})
+        finally:
+            # Runs when the client disconnects mid-stream too
+            await self._run(finish_chat_turn, turn, ''.join(parts), completed, error_response)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    # --- Helpers ---
+
+    async def _run(self, function, *args):
+        """Run a blocking pipeline step on a worker thread, inside a Flask app context"""
+        def call():
+            with self.flask_app.app_context():
+                return function(*args)
+        return await asyncio.to_thread(call)
+
+    @staticmethod
+    async def _chunks(items):
+        for item in items:
+            yield item
+
+    def _chat_session(self, scope):
+        """
+        (session_id, extra response headers): the session_id from the signed Flask
+        session cookie, created on the visitor's first question as the Flask route does
+        """
+        interface = self.flask_app.session_interface
+        serializer = interface.get_signing_serializer(self.flask_app)
+        data = {}
+        cookie_header = self._header(scope, b'cookie')
+        if cookie_header:
+            cookie = SimpleCookie()
+            cookie.load(cookie_header)
+            morsel = cookie.get(interface.get_cookie_name(self.flask_app))
+            if morsel is not None:
+                try:
+                    data = serializer.loads(
+                        morsel.value, max_age=int(self.flask_app.permanent_session_lifetime.total_seconds())
+                    )
+                except Exception:
+                    data = {}
+        if data.get('session_id'):
+            return data['session_id'], []
+
+        session = SecureCookieSession(data)
+        session['session_id'] = str(uuid.uuid4())
+        cookie = dump_cookie(
+            interface.get_cookie_name(self.flask_app),
+            serializer.dumps(dict(session)),
+            expires=interface.get_expiration_time(self.flask_app, session),
+            domain=interface.get_cookie_domain(self.flask_app),
+            path=interface.get_cookie_path(self.flask_app),
+            secure=interface.get_cookie_secure(self.flask_app),
+            httponly=interface.get_cookie_httponly(self.flask_app),
+            samesite=interface.get_cookie_samesite(self.flask_app),
+        )
+        return session['session_id'], [(b'set-cookie', cookie.encode('latin-1')), (b'vary', b'Cookie')]
+
+    def _wants_stream(self, scope, request_data):
+        """Stream when the client asks for it with {"stream": true} or an SSE Accept header"""
+        accept = parse_accept_header(self._header(scope, b'accept'), MIMEAccept)
+        return bool(request_data.get("stream")) or accept.best == 'text/event-stream'
+
+    @staticmethod
+    def _header(scope, name):
+        for key, value in scope.get('headers', []):
+            if key == name:
+                return value.decode('latin-1')
+        return None
+
+    @staticmethod
+    async def _read_body(receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    def _cors_headers(self, scope):
+        # Mirrors flask_cors with supports_credentials=True for the one route handled here
+        origin = self._header(scope, b'origin')
+        if not origin:
+            return []
+        return [
+            (b'access-control-allow-origin', origin.encode('latin-1')),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin'),
+        ]
+
+    async def _send_json(self, scope, send, status, data, extra_headers=()):
+        body = json.dumps(data).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('ascii')),
+            ] + self._cors_headers(scope) + list(extra_headers),
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _start_sse(self, scope, send, extra_headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                # Stop proxies from buffering the stream
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ] + self._cors_headers(scope) + list(extra_headers),
+        })
+
+    @staticmethod
+    async def _send_event(send, event):
+        await send({'type': 'http.response.body', 'body': f"data: {json.dumps(event)}\n\n".encode('utf-8'), 'more_body': True})
+
+
+def create_asgi_app(flask_app):
+    """Wrap a Flask app created by create_app() with the async chat gateway"""
+    return AsyncChatGateway(flask_app)
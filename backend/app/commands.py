@@ -0,0 +1,91 @@
+# backend/app/commands.py file
+#
+# Flask CLI commands. Run from the backend folder, e.g.:
+#   flask --app run reassess-applications --engine rules
+
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .services.knowledge_index import build_index
+from .services.policy_simulation import simulate_policy
+from .services.reassessment_service import run_reassessment
+from .utils.eligibility_rules import load_rule_set, RuleSetError
+
+
+@click.command('reassess-applications')
+@click.option('--engine', type=click.Choice(['watson', 'rules']), default='watson', show_default=True,
+              help='Assess with Watson (rule engine fallback) or the rule engine only.')
+@click.option('--concurrency', type=int, default=None,
+              help='Assessments in flight at once. Defaults to REASSESSMENT_CONCURRENCY.')
+@click.option('--batch-size', type=int, default=None,
+              help='Results saved per checkpoint. Defaults to REASSESSMENT_BATCH_SIZE.')
+@click.option('--batches-per-write', type=int, default=None,
+              help='Checkpointed batches per CSV update. Defaults to REASSESSMENT_BATCHES_PER_WRITE.')
+@click.option('--checkpoint', 'checkpoint_path', default=None,
+              help='Progress file used to resume an interrupted run.')
+@click.option('--restart', is_flag=True, help='Ignore any saved progress and start over.')
+@with_appcontext
+def reassess_applications_command(engine, concurrency, batch_size, batches_per_write, checkpoint_path, restart):
+    """Re-run eligibility assessment for every application awaiting review, except resubmitted ones."""
+    def report(totals):
+        click.echo(f"  {totals['assessed']} assessed, {totals['failed']} failed")
+
+    totals = run_reassessment(engine, concurrency, batch_size, checkpoint_path, restart, progress=report,
+                              batches_per_write=batches_per_write)
+    engines = ', '.join(f"{name}: {count}" for name, count in sorted(totals['engines'].items())) or 'none'
+    click.echo(f"Done: {totals['assessed']} assessed ({engines}), "
+               f"{totals['skipped']} already done in an earlier run, {totals['resubmitted']} resubmitted and left alone, "
+               f"{totals['failed']} failed")
+    if totals['failed']:
+        click.echo("Some assessments failed; run the command again to retry them.")
+
+
+@click.command('build-knowledge-index')
+@click.option('--docs-dir', default=None, help='Folder of .md/.txt policy documents. Defaults to KNOWLEDGE_DOCS_DIR.')
+@click.option('--chat-logs', default=None, help='Chat log CSV to take past answers from. Defaults to CHAT_LOGS_CSV.')
+@click.option('--output', default=None, help='Where to write the index. Defaults to KNOWLEDGE_INDEX_PATH.')
+@with_appcontext
+def build_knowledge_index_command(docs_dir, chat_logs, output):
+    """Rebuild the chatbot's local BM25 index; running servers pick it up automatically."""
+    config = current_app.config
+    counts = build_index(docs_dir or config['KNOWLEDGE_DOCS_DIR'], chat_logs or config['CHAT_LOGS_CSV'],
+                         output or config['KNOWLEDGE_INDEX_PATH'])
+    click.echo(f"Indexed {counts['policy_passages']} policy passages and {counts['answers']} past answers "
+               f"({counts['terms']} terms) into {output or config['KNOWLEDGE_INDEX_PATH']}")
+
+
+@click.command('simulate-policy')
+@click.argument('rules_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--json', 'as_json', is_flag=True, help='Print the full summary as JSON.')
+@with_appcontext
+def simulate_policy_command(rules_path, as_json):
+    """Show how decisions on stored applications would change under the rule file RULES_PATH."""
+    try:
+        proposed_rules = load_rule_set(rules_path)
+    except RuleSetError as e:
+        raise click.ClickException(f"Invalid rules in {rules_path}: {e}")
+    
+    summary = simulate_policy(proposed_rules)
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+        return
+    
+    click.echo(f"Rules {summary['baseline_version']} -> {summary['proposed_version']}: "
+               f"{summary['changed']} of {summary['applications']} applications change status "
+               f"({summary['elapsed_seconds']}s)")
+    for move, count in sorted(summary['transitions'].items(), key=lambda item: -item[1]):
+        click.echo(f"  {move}: {count}")
+    for title, groups in (('By loan type', summary['by_loan_type']), ('By amount band', summary['by_amount_band'])):
+        click.echo(title)
+        for name, group in groups.items():
+            moves = ', '.join(f"{move}: {count}" for move, count in group['transitions'].items()) or 'no change'
+            click.echo(f"  {name:<16} {group['changed']:>8} of {group['applications']:<8} {moves}")
+
+
+def register_commands(app):
+    app.cli.add_command(reassess_applications_command)
+    app.cli.add_command(build_knowledge_index_command)
+    app.cli.add_command(simulate_policy_command)
@@ -16,7 +16,74 @@ class Config:
     # IBM Watsonx API
     API_KEY = os.getenv("API_KEY")
     AGENT_ENDPOINT = os.getenv("AGENT_ENDPOINT")
-    IAM_ENDPOINT = "https://iam.cloud.ibm.com/identity/token"
+    IAM_ENDPOINT = os.getenv("IAM_ENDPOINT", "https://iam.cloud.ibm.com/identity/token")
+    IAM_TOKEN_REFRESH_WINDOW = int(os.getenv("IAM_TOKEN_REFRESH_WINDOW", "300"))  # refresh in background when this close to expiry
+    IAM_TOKEN_EXPIRY_MARGIN = int(os.getenv("IAM_TOKEN_EXPIRY_MARGIN", "60"))  # never hand out a token closer to expiry than this
+
+    # Outbound HTTP (Watson agent and IAM)
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+    HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))  # distinct hosts kept pooled
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))  # keep-alive connections per host
+    HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", "32"))  # in-flight outbound calls per process
+    ASYNC_GATEWAY_MAX_CONNECTIONS = int(os.getenv("ASYNC_GATEWAY_MAX_CONNECTIONS", "1000"))  # asgi.py /ask outbound connections
+    ASK_DEADLINE_SECONDS = float(os.getenv("ASK_DEADLINE_SECONDS", "30"))  # total budget for IAM + agent calls in /ask
+    AGENT_HEDGE_ENABLED = os.getenv("AGENT_HEDGE_ENABLED", "false").lower() == "true"  # resend slow /ask agent calls
+    AGENT_HEDGE_DELAY = float(os.getenv("AGENT_HEDGE_DELAY", "0"))  # seconds before hedging; 0 uses the recent p95
+    AGENT_HEDGE_MIN_SAMPLES = int(os.getenv("AGENT_HEDGE_MIN_SAMPLES", "20"))  # latencies needed before p95 is trusted
+    WATSON_CASSETTE_MODE = os.getenv("WATSON_CASSETTE_MODE", "off")  # off, record or replay (see services/cassette.py)
+    WATSON_CASSETTE_PATH = os.getenv("WATSON_CASSETTE_PATH", os.path.join("data", "watson_cassette.jsonl"))
+
+    # Circuit Breaker for Watson eligibility calls (falls back to the rule engine while open)
+    BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))  # share of failed calls that opens it
+    BREAKER_SLOW_CALL_RATE = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.5"))  # share of slow calls that opens it
+    BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "10"))
+    BREAKER_WINDOW_SIZE = int(os.getenv("BREAKER_WINDOW_SIZE", "20"))  # recent calls considered
+    BREAKER_MINIMUM_CALLS = int(os.getenv("BREAKER_MINIMUM_CALLS", "5"))
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))  # before a half-open probe
+    BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+    # Rule-based Eligibility (versioned rule file, reloaded automatically when edited)
+    ELIGIBILITY_RULES_PATH = os.getenv("ELIGIBILITY_RULES_PATH", os.path.join(os.path.dirname(__file__), "eligibility_rules.json"))
+
+    # Background Eligibility Assessment
+    ASSESSMENT_WORKERS = int(os.getenv("ASSESSMENT_WORKERS", "4"))  # concurrent Watson assessments per process
+    ASSESSMENT_QUEUE_SIZE = int(os.getenv("ASSESSMENT_QUEUE_SIZE", "100"))  # waiting jobs before falling back to the rule engine inline
+
+    # Batched Eligibility Prompts (several applicants per Watson call during busy intake)
+    ELIGIBILITY_BATCH_ENABLED = os.getenv("ELIGIBILITY_BATCH_ENABLED", "false").lower() == "true"
+    ELIGIBILITY_BATCH_MAX_SIZE = int(os.getenv("ELIGIBILITY_BATCH_MAX_SIZE", "8"))  # applicants per prompt
+    ELIGIBILITY_BATCH_MAX_WAIT_MS = int(os.getenv("ELIGIBILITY_BATCH_MAX_WAIT_MS", "500"))  # wait for others to join
+
+    # Batch Re-assessment (flask reassess-applications)
+    REASSESSMENT_CONCURRENCY = int(os.getenv("REASSESSMENT_CONCURRENCY", "4"))  # assessments in flight at once
+    REASSESSMENT_BATCH_SIZE = int(os.getenv("REASSESSMENT_BATCH_SIZE", "50"))  # results per checkpoint
+    REASSESSMENT_BATCHES_PER_WRITE = int(os.getenv("REASSESSMENT_BATCHES_PER_WRITE", "20"))  # checkpointed batches per CSV rewrite
+
+    # Eligibility Decision Cache (Watson decisions reused for identical applicant profiles)
+    DECISION_CACHE_ENABLED = os.getenv("DECISION_CACHE_ENABLED", "true").lower() == "true"
+    DECISION_CACHE_TTL = int(os.getenv("DECISION_CACHE_TTL", "604800"))  # seconds (7 days)
+
+    # Chatbot Response Cache
+    CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() == "true"
+    CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "512"))  # distinct normalised questions kept
+    CHAT_CACHE_TTL = int(os.getenv("CHAT_CACHE_TTL", "3600"))  # seconds
+
+    # Chatbot Conversation Memory (recent turns sent with each /ask; idle sessions expire with the login session)
+    CHAT_MEMORY_ENABLED = os.getenv("CHAT_MEMORY_ENABLED", "true").lower() == "true"
+    CHAT_MEMORY_MAX_SESSIONS = int(os.getenv("CHAT_MEMORY_MAX_SESSIONS", "20000"))  # least recently used are dropped
+    CHAT_MEMORY_MAX_CHARS = int(os.getenv("CHAT_MEMORY_MAX_CHARS", "3000"))  # per session; older turns are summarised
+
+    # Chatbot Knowledge Index (BM25 over policy documents and past answers; flask build-knowledge-index)
+    KNOWLEDGE_ENABLED = os.getenv("KNOWLEDGE_ENABLED", "true").lower() == "true"
+    KNOWLEDGE_DOCS_DIR = os.getenv("KNOWLEDGE_DOCS_DIR", os.path.join("data", "policies"))  # .md and .txt files
+    KNOWLEDGE_INDEX_PATH = os.getenv("KNOWLEDGE_INDEX_PATH", os.path.join("data", "knowledge_index.json"))
+    KNOWLEDGE_ANSWER_THRESHOLD = float(os.getenv("KNOWLEDGE_ANSWER_THRESHOLD", "0.8"))  # match needed to answer without Watson
+    KNOWLEDGE_CONTEXT_PASSAGES = int(os.getenv("KNOWLEDGE_CONTEXT_PASSAGES", "3"))  # passages sent to Watson as context
+    KNOWLEDGE_CONTEXT_MIN_SCORE = float(os.getenv("KNOWLEDGE_CONTEXT_MIN_SCORE", "0.3"))  # weaker passages are left out
 
     # SMTP Email Configuration
     SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -25,6 +92,21 @@ class Config:
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
     FROM_EMAIL = os.getenv("FROM_EMAIL", SMTP_USERNAME)
     FROM_NAME = os.getenv("FROM_NAME", "AI Banking Portal")
+    SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"  # STARTTLS before logging in
+    SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))  # seconds per SMTP command
+    SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))  # logged-in connections kept open per process
+    SMTP_POOL_IDLE_SECONDS = float(os.getenv("SMTP_POOL_IDLE_SECONDS", "60"))  # older idle connections are closed, not reused
+
+    # Response Compression
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))  # bytes; smaller bodies are sent as-is
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+    # Admin Read Caching (seconds a shared dashboard read/render is reused)
+    ADMIN_READ_CACHE_TTL = float(os.getenv("ADMIN_READ_CACHE_TTL", "2"))
+
+    # Review Queue (seconds before an unfinished claim returns to the queue)
+    REVIEW_CLAIM_TIMEOUT = int(os.getenv("REVIEW_CLAIM_TIMEOUT", "900"))
 
     # CSV File Paths
     CSV_DIR = "data"
@@ -1,20 +1,42 @@
 # backend/app/routes/admin_routes.py file
 
-from flask import Blueprint, request, jsonify, session, redirect, render_template_string, send_from_directory, current_app
+from flask import Blueprint, request, jsonify, session, redirect, render_template_string, send_from_directory, current_app, Response, stream_with_context
 import os
 import csv 
+import heapq
+import io
+import tempfile
+from datetime import datetime
 
 # Import all the necessary functions from our other modules
 from ..utils.csv_handler import (
     verify_staff_credentials, get_all_loan_applications, get_application_documents,
     get_application_history, update_application_status, add_application_history,
-    create_objection
+    create_objection, update_applications_status, add_application_history_entries,
+    create_objections, iter_loan_applications
+)
+from ..utils.helpers import calculate_analytics, format_currency, get_display_name, application_matches_filters
+from ..utils.http_response import conditional_response, get_data_version
+from ..utils.single_flight import SingleFlight
+from ..utils.review_queue import review_queue
+from ..utils.eligibility_rules import RuleSet, RuleSetError, get_rule_set
+from ..services.policy_simulation import simulate_policy
+from ..services.notification_service import (
+    send_objection_notification, queue_email_notification, queue_objection_notification
 )
-from ..utils.helpers import calculate_analytics, format_currency
-from ..services.notification_service import send_objection_notification
 
 admin_bp = Blueprint('admin_bp', __name__)
 
+# Columns written by the filtered applications export
+EXPORT_COLUMNS = ['ID', 'Name', 'Email', 'Loan Type', 'Amount', 'Status', 'Source', 'Date']
+# Flush the export buffer to the client roughly every 64 KB
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Rows sorted in memory at a time by the export; longer exports are sorted in runs spilled to temp files
+EXPORT_SORT_RUN_ROWS = 50000
+
+# Coalesces concurrent renders of the admin dashboard
+_dashboard_flight = SingleFlight()
+
 
 # --- Admin Account and Session Routes ---
 
@@ -49,10 +71,22 @@ def logout_route():
 # --- Admin Dashboard and Application Management ---
 
 @admin_bp.route('/admin-dashboard')
+@conditional_response('LOAN_APPLICATIONS_CSV', 'COMPREHENSIVE_LOANS_CSV')
 def admin_dashboard_route():
     if not session.get('logged_in'):
         return redirect('/staff.html') # Redirect to staff login page
 
+    # Staff opening the dashboard at the same moment share one render
+    username = session['staff_user']['username']
+    cache_key = (username, get_data_version('LOAN_APPLICATIONS_CSV', 'COMPREHENSIVE_LOANS_CSV'))
+    return _dashboard_flight.do(
+        cache_key, _render_admin_dashboard, username,
+        ttl=current_app.config['ADMIN_READ_CACHE_TTL']
+    )
+
+
+def _render_admin_dashboard(username):
+    """Build the admin dashboard HTML for the given staff user"""
     applications = get_all_loan_applications()
     analytics_data = calculate_analytics(applications)
     
@@ -127,7 +161,7 @@ def admin_dashboard_route():
             <div style="display: flex; justify-content: space-between; align-items: center;">
                 <div>
                     <h1 data-translate="admin-dashboard">🏦 Banking Admin Dashboard</h1>
-                    <p>Welcome, """ + session['staff_user']['username'] + """</p>
+                    <p>Welcome, """ + username + """</p>
                 </div>
                 <div style="display: flex; gap: 15px; align-items: center;">
                     <div class="language-selector">
@@ -238,7 +272,8 @@ def admin_dashboard_route():
                         
                         <div class="filter-group">
                             <button class="filter-btn clear-btn" onclick="clearFilters()">Clear All</button>
-                            <button class="filter-btn export-btn" onclick="exportFilteredData()">Export Filtered</button>
+                            <button class="filter-btn export-btn" onclick="exportFilteredData('csv')">Export Filtered</button>
+                            <button class="filter-btn export-btn" onclick="exportFilteredData('xlsx')">Export Excel</button>
                         </div>
                     </div>
                     
@@ -279,15 +314,7 @@ def admin_dashboard_route():
         source_class = f'source-{source}'
         
         # Get the display name - handle empty or missing names
-        name = f"{app.get('first_name', '')} {app.get('last_name', '')}".strip()
-        if not name or name == ' ':
-            full_name = app.get('full_name', '')
-            if full_name and full_name.strip():
-                name = full_name.strip()
-            else:
-                # Extract name from email if no name provided
-                email_user = app.get('email', app.get('user_email', '')).split('@')[0]
-                name = email_user.replace('.', ' ').title() if email_user else 'N/A'
+        name = get_display_name(app)
         
         # Get email
         email = app.get('email', app.get('user_email', 'N/A'))
@@ -764,43 +791,19 @@ def admin_dashboard_route():
             document.getElementById('filterResults').textContent = `Showing all ${originalRows.length} applications`;
         }
         
-        function exportFilteredData() {
-            const visibleRows = originalRows.filter(row => row.style.display !== 'none');
-            
-            if (visibleRows.length === 0) {
-                alert('No data to export');
-                return;
-            }
-            
-            // Create CSV content
-            let csv = 'ID,Name,Email,Loan Type,Amount,Status,Source,Date\\n';
-            
-            visibleRows.forEach(row => {
-                const cells = row.cells;
-                const rowData = [
-                    cells[0].textContent, // ID
-                    cells[1].textContent, // Name
-                    cells[2].textContent, // Email
-                    cells[3].textContent, // Loan Type
-                    cells[4].textContent, // Amount
-                    cells[5].textContent.trim(), // Status (remove extra spaces)
-                    cells[6].textContent.trim(), // Source
-                    cells[7].textContent  // Date
-                ];
-                csv += rowData.map(field => `"${field.replace(/"/g, '""')}"`).join(',') + '\\n';
+        function exportFilteredData(format) {
+            // The server streams the export straight from storage, so every matching
+            // application is included, not just the rows rendered in this table.
+            const params = new URLSearchParams({
+                status: document.getElementById('statusFilter').value,
+                type: document.getElementById('typeFilter').value,
+                source: document.getElementById('sourceFilter').value,
+                amount: document.getElementById('amountFilter').value,
+                date: document.getElementById('dateFilter').value,
+                search: document.getElementById('searchFilter').value,
+                format: format || 'csv'
             });
-            
-            // Download CSV
-            const blob = new Blob([csv], { type: 'text/csv' });
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.style.display = 'none';
-            a.href = url;
-            a.download = `filtered_applications_${new Date().toISOString().split('T')[0]}.csv`;
-            document.body.appendChild(a);
-            a.click();
-            window.URL.revokeObjectURL(url);
-            document.body.removeChild(a);
+            window.location.href = `/export-applications?${params.toString()}`;
         }
     </script>
     </body>
@@ -811,7 +814,131 @@ def admin_dashboard_route():
     return render_template_string(dashboard_html, applications=applications, analytics_data=analytics_data, session=session)
 
 
+def _sorted_export_rows(rows):
+    """
+    Rows whose first column is created_at, newest first with ties in storage order,
+    as get_all_loan_applications sorts them. At most EXPORT_SORT_RUN_ROWS rows are
+    held in memory: each full run is sorted and written to a temporary CSV file, and
+    the runs are then merged (heapq.merge is stable, so ties keep storage order).
+    """
+    run_files = []
+    try:
+        while True:
+            run = []
+            for row in rows:
+                run.append(row)
+                if len(run) >= EXPORT_SORT_RUN_ROWS:
+                    break
+            run.sort(key=lambda row: row[0], reverse=True)
+            if not run_files and len(run) < EXPORT_SORT_RUN_ROWS:
+                # Everything fitted in one run: no need for temporary files
+                yield from run
+                return
+            if run:
+                run_file = tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8')
+                run_files.append(run_file)
+                csv.writer(run_file).writerows(run)
+                run_file.seek(0)
+            if len(run) < EXPORT_SORT_RUN_ROWS:
+                break
+        yield from heapq.merge(*(csv.reader(run_file) for run_file in run_files), key=lambda row: row[0], reverse=True)
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+
+@admin_bp.route('/export-applications')
+def export_applications_route():
+    """
+    Export the applications matching the dashboard filters as CSV (default) or XLSX,
+    newest first like the dashboard. Applications are read from storage one at a
+    time and sorted with a bounded external merge sort (see _sorted_export_rows),
+    so memory stays the same however many rows match. CSV is streamed as it is
+    written; XLSX is built in a temporary file first (openpyxl has to finish the
+    zip before any of it can be sent) and then streamed from it.
+    """
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    filters = {key: request.args.get(key, '') for key in ('status', 'type', 'source', 'amount', 'date', 'search')}
+    export_format = request.args.get('format', 'csv').lower()
+    date_stamp = datetime.now().strftime('%Y-%m-%d')
+    
+    def export_rows():
+        now = datetime.now()
+        matches = (
+            [
+                app.get('created_at', ''),
+                app.get('application_id', ''),
+                get_display_name(app),
+                app.get('email', app.get('user_email', '')),
+                app.get('loan_type', app.get('loanType', '')),
+                app.get('loan_amount', app.get('loanAmount', '')),
+                app.get('status', 'pending'),
+                app.get('source', 'unknown'),
+                app.get('created_at', '')[:10],
+            ]
+            for app in iter_loan_applications()
+            if application_matches_filters(app, filters, now)
+        )
+        for match in _sorted_export_rows(matches):
+            yield match[1:]
+    
+    if export_format == 'xlsx':
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            return jsonify({'success': False, 'error': 'XLSX export requires the openpyxl package'}), 501
+        
+        # Write-only mode writes rows out as they are appended instead of keeping the sheet's cells in memory
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Applications')
+        sheet.append(EXPORT_COLUMNS)
+        for row in export_rows():
+            sheet.append(row)
+        temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+        temp_file.close()
+        workbook.save(temp_file.name)
+        
+        def stream_file():
+            try:
+                with open(temp_file.name, 'rb') as file:
+                    while True:
+                        chunk = file.read(EXPORT_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        yield chunk
+            finally:
+                os.remove(temp_file.name)
+        
+        return Response(
+            stream_file(),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            headers={'Content-Disposition': f'attachment; filename=filtered_applications_{date_stamp}.xlsx'}
+        )
+    
+    def stream_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in export_rows():
+            writer.writerow(row)
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    # No Content-Length is set, so the body goes out with chunked transfer encoding
+    return Response(
+        stream_with_context(stream_csv()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename=filtered_applications_{date_stamp}.csv'}
+    )
+
+
 @admin_bp.route('/view-application/<app_id>')
+@conditional_response('COMPREHENSIVE_LOANS_CSV', 'LOAN_APPLICATIONS_CSV', 'document_uploads.csv', 'application_history.csv')
 def view_application_route(app_id):
     """View detailed application information with documents"""
     if not session.get('logged_in'):
@@ -1051,6 +1178,192 @@ def create_objection_route(app_id):
         return jsonify({'success': False, 'error': str(e)})
 
 
+@admin_bp.route('/bulk-application-action', methods=['POST'])
+def bulk_application_action_route():
+    """
+    Apply one action (approve, reject or objection) to many applications at once.
+    All status changes are persisted in a single pass over the loans CSVs and the
+    history rows are appended in one batch; emails are queued in the background.
+    """
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    try:
+        data = request.json or {}
+        app_ids = data.get('application_ids') or []
+        action = (data.get('action') or '').lower()
+        reason = data.get('reason', '')
+        requested_docs = data.get('requested_documents', '')
+        staff_username = session['staff_user']['username']
+        
+        if not isinstance(app_ids, list) or not app_ids:
+            return jsonify({'success': False, 'error': 'application_ids must be a non-empty list'})
+        if action not in ('approve', 'reject', 'objection'):
+            return jsonify({'success': False, 'error': 'Action must be approve, reject or objection'})
+        if action == 'objection' and not reason:
+            return jsonify({'success': False, 'error': 'Reason is required'})
+        
+        # De-duplicate while keeping the order the reviewer submitted
+        app_ids = list(dict.fromkeys(str(app_id) for app_id in app_ids))
+        
+        if action == 'approve':
+            new_status, action_type = 'APPROVED', 'APPROVED'
+            admin_notes = reason or 'Application approved by admin'
+        elif action == 'reject':
+            new_status, action_type = 'REJECTED', 'REJECTED'
+            admin_notes = reason or 'Application rejected by admin'
+        else:
+            new_status, action_type = 'OBJECTION_RAISED', 'OBJECTION RAISED'
+            admin_notes = f'Objection raised: {reason}'
+        
+        errors = {}
+        objection_ids = {}
+        if action == 'objection':
+            # Like the single objection route: only comprehensive applications can take an objection
+            applications, wanted = {}, set(app_ids)
+            try:
+                with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+                    for row in csv.DictReader(file):
+                        if row.get('application_id') in wanted:
+                            applications[row['application_id']] = row.get('user_email', row.get('email', ''))
+            except FileNotFoundError:
+                pass
+            # create_objections also records the history rows for these applications
+            objection_ids = create_objections(applications, reason, requested_docs, staff_username)
+            errors = {app_id: 'Failed to create objection' for app_id in applications if app_id not in objection_ids}
+            # Only applications whose objection was saved change status
+            updated_rows = update_applications_status(list(objection_ids), new_status, admin_notes)
+        else:
+            updated_rows = update_applications_status(app_ids, new_status, admin_notes)
+        user_emails = {
+            app_id: row.get('user_email', row.get('email', ''))
+            for app_id, row in updated_rows.items()
+        }
+        
+        if action != 'objection':
+            add_application_history_entries([
+                (app_id, user_email, action_type, staff_username, admin_notes)
+                for app_id, user_email in user_emails.items()
+            ])
+        
+        results = []
+        for app_id in app_ids:
+            if app_id not in updated_rows:
+                results.append({'application_id': app_id, 'success': False,
+                                'error': errors.get(app_id, 'Application not found')})
+                continue
+            
+            user_email = user_emails[app_id]
+            if user_email:
+                if action == 'objection':
+                    queue_objection_notification(user_email, app_id, reason, requested_docs)
+                else:
+                    queue_email_notification(
+                        user_email,
+                        f"Loan Application {app_id} {new_status.title()}",
+                        f"Your loan application {app_id} has been {new_status.lower()}. {admin_notes}",
+                        action_type.lower()
+                    )
+            
+            result = {'application_id': app_id, 'success': True, 'status': new_status}
+            if app_id in objection_ids:
+                result['objection_id'] = objection_ids[app_id]
+            results.append(result)
+        
+        return jsonify({
+            'success': True,
+            'processed': len(updated_rows),
+            'failed': len(app_ids) - len(updated_rows),
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+# --- Review Work Queue ---
+
+def _get_review_queue():
+    """Load the review queue from storage the first time it is used in this worker"""
+    if not review_queue.loaded:
+        review_queue.claim_timeout = current_app.config['REVIEW_CLAIM_TIMEOUT']
+        review_queue.load(get_all_loan_applications())
+    return review_queue
+
+
+@admin_bp.route('/admin/queue', methods=['GET'])
+def review_queue_status_route():
+    """Show how many applications are queued and who holds claims"""
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    return jsonify({'success': True, 'queue': _get_review_queue().stats()})
+
+
+@admin_bp.route('/admin/queue/next', methods=['POST'])
+def review_queue_next_route():
+    """Claim the highest-priority application waiting for review"""
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    application = _get_review_queue().next(session['staff_user']['username'])
+    if not application:
+        return jsonify({'success': True, 'application': None, 'message': 'No applications waiting for review'})
+    return jsonify({'success': True, 'application': application})
+
+
+@admin_bp.route('/admin/queue/claim/<app_id>', methods=['POST'])
+def review_queue_claim_route(app_id):
+    """Claim a specific application so no other reviewer picks it up"""
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    application = _get_review_queue().claim(app_id, session['staff_user']['username'])
+    if not application:
+        return jsonify({'success': False, 'error': 'Application is not queued or is claimed by another reviewer'})
+    return jsonify({'success': True, 'application': application})
+
+
+@admin_bp.route('/admin/queue/release/<app_id>', methods=['POST'])
+def review_queue_release_route(app_id):
+    """Return a claimed application to the queue"""
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    if not _get_review_queue().release(app_id, session['staff_user']['username']):
+        return jsonify({'success': False, 'error': 'Application is not claimed by you'})
+    return jsonify({'success': True, 'message': 'Application released'})
+
+
+# --- Policy What-If Simulation ---
+
+@admin_bp.route('/admin/what-if', methods=['GET'])
+def what_if_rules_route():
+    """The active eligibility rule file, as a starting point for a what-if run"""
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    return jsonify({'success': True, 'rules': get_rule_set().definition})
+
+
+@admin_bp.route('/admin/what-if', methods=['POST'])
+def what_if_simulation_route():
+    """
+    Re-run rule-based eligibility over all stored applications under the rules
+    in the request body ({"rules": {...}}, same shape as the rule file) and report
+    how many would change status. Nothing is saved.
+    """
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        proposed_rules = RuleSet(data.get('rules'))
+    except RuleSetError as e:
+        return jsonify({'success': False, 'error': f'Invalid rules: {e}'}), 400
+    
+    return jsonify({'success': True, 'simulation': simulate_policy(proposed_rules)})
+
+
 # @admin_bp.route('/view-document/<path:filename>')
 # def view_document_route(filename):
 #     if not session.get('logged_in'):
@@ -1,92 +1,197 @@
 # backend/app/routes/api_routes.py file
 
-from flask import Blueprint, request, jsonify, session, current_app
-import requests
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
+import json
+import uuid
 
 # Import functions from our new service and utility modules
-from ..services.watson_service import get_iam_token
-from ..utils.csv_handler import save_chat_log
+from ..services.watson_service import eligibility_batch_stats
+from ..services.chat_cache import cache_stats
+from ..services import chat_service
+from ..services.chat_service import start_chat_turn, finish_chat_turn, stream_agent, agent_failure, stream_failure
+from ..services.circuit_breaker import get_watson_breaker
+from ..services.conversation_memory import memory_stats
+from ..services.decision_cache import decision_cache_stats
+from ..services.knowledge_index import knowledge_stats
+from ..services.hedging import hedging_stats
+from ..services.smtp_pool import smtp_pool_stats
+from ..utils.amortisation import MAX_TENURE_MONTHS, emi_quote, emi_quote_stats, emi_schedule, tenure_months
+from ..utils.eligibility_rules import get_rule_set
 
 # Create a Blueprint. This is like a mini-app for our API routes.
 api_bp = Blueprint('api_bp', __name__)
 
+
+def _sse_event(data):
+    """Format one server-sent event"""
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def _stream_chat_response(turn, chunks):
+    """
+    Relay reply chunks to the browser as server-sent events, then record the
+    assembled reply (see finish_chat_turn) once the stream has finished.
+    """
+    def generate():
+        parts = []
+        error_response = None
+        completed = False
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield _sse_event({"delta": chunk})
+            completed = True
+            yield _sse_event({"done": True})
+        except Exception as e:
+            error_response = stream_failure(e)
+            yield _sse_event({"error": error_response})
+        finally:
+            # Runs when the browser disconnects mid-stream too
+            finish_chat_turn(turn, ''.join(parts), completed, error_response)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Stop proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _wants_stream(request_data):
+    """Stream when the client asks for it with {"stream": true} or an SSE Accept header"""
+    return bool(request_data.get("stream")) or request.accept_mimetypes.best == 'text/event-stream'
+
+
+def _chat_session_id():
+    """The visitor's chat session id, created on their first question"""
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return session['session_id']
+
+
 @api_bp.route('/ask', methods=['POST'])
 def ask_agent():
     """
     This endpoint receives a user query, authenticates with IBM,
     forwards the query to the agent, and returns the agent's response.
+    With {"stream": true} the reply is relayed token by token as server-sent events.
+    Recent turns of the same session are sent along so follow-up questions keep their context.
+    The pipeline itself lives in services/chat_service.py, shared with the async gateway.
     """
+    session_id = _chat_session_id()
+    request_data = request.get_json(silent=True)
+    if not isinstance(request_data, dict):
+        return jsonify({"error": "Invalid request format. JSON body with 'query' key is expected."}), 400
     
-    # Check if IBM credentials are provided in the config
-    ibm_enabled = current_app.config['API_KEY'] and current_app.config['AGENT_ENDPOINT']
-
-    if not ibm_enabled:
-        request_data = request.get_json()
-        user_query = request_data.get("query", "")
-        
-        # Provide a mock response for testing
-        mock_response = f"Thank you for your message: '{user_query}'. This is a demo response as IBM Watson is not configured."
-        
-        save_chat_log(user_query, mock_response, session.get('session_id'))
-        return jsonify({"response": mock_response})
+    turn = start_chat_turn(request_data, session_id)
+    stream = _wants_stream(request_data)
+    if turn.answer is not None:
+        if stream:
+            return _stream_chat_response(turn, turn.answer_chunks())
+        finish_chat_turn(turn, turn.answer)
+        return jsonify(turn.answer_data())
+    if turn.error is not None:
+        body, status = turn.error
+        return jsonify(body), status
     
-    # 1. Get a fresh IAM token for this request
-    access_token = get_iam_token()
-    if not access_token:
-        error_response = "Failed to authenticate with IBM Cloud. Check API Key and server logs."
-        save_chat_log(request.get_json().get('query', ''), error_response)
-        return jsonify({"error": error_response}), 500
-
-    # 2. Get the user's query from the incoming request
     try:
-        request_data = request.get_json()
-        user_query = request_data.get("query")
+        if stream:
+            return _stream_chat_response(turn, stream_agent(turn))
+        reply = chat_service.ask_agent(turn)
+    except Exception as e:
+        body, status = agent_failure(turn, e)
+        return jsonify(body), status
+    
+    finish_chat_turn(turn, reply)
+    return jsonify({"response": reply if reply is not None else "Could not parse agent response."})
 
-        if not user_query:
-            return jsonify({"error": "Query field cannot be empty."}), 400
-    except Exception:
-        return jsonify({"error": "Invalid request format. JSON body with 'query' key is expected."}), 400
 
-    # 3. Prepare and send the request to the IBM Watsonx Agent
-    agent_headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}"
-    }
-    
-    payload = {
-        "messages": [
-            {"role": "user", "content": user_query}
-        ]
-    }
+def _emi_request(params):
+    """(amount, annual rate, months) from /emi parameters, rounded so equal loans share a cached quote"""
+    try:
+        amount = round(float(params.get('amount')), 2)
+    except (TypeError, ValueError):
+        raise ValueError("'amount' must be a number")
+    if not 0 < amount <= 1e12:
+        raise ValueError("'amount' must be positive")
+
+    if params.get('tenure_months') is not None:
+        try:
+            months = int(params.get('tenure_months'))
+        except (TypeError, ValueError):
+            raise ValueError("'tenure_months' must be a whole number")
+        if not 0 < months <= MAX_TENURE_MONTHS:
+            months = None
+    else:
+        months = tenure_months(params.get('tenure'))
+    if months is None:
+        raise ValueError(f"'tenure' (years) or 'tenure_months' must be between 1 month and {MAX_TENURE_MONTHS // 12} years")
+
+    if params.get('rate') is None:
+        # No rate given: quote the bank's rate for the loan type
+        loan_type = params.get('loan_type') or ''
+        rate = get_rule_set().interest_rate(loan_type if isinstance(loan_type, str) else '')
+    else:
+        try:
+            rate = round(float(params.get('rate')), 4)
+        except (TypeError, ValueError):
+            raise ValueError("'rate' must be a number")
+        if not 0 <= rate <= 100:
+            raise ValueError("'rate' must be an annual percentage between 0 and 100")
+    return amount, rate, months
+
+
+@api_bp.route('/emi', methods=['GET', 'POST'])
+def emi_route():
+    """
+    EMI calculator. Takes 'amount', 'tenure' in years (as on the application form)
+    or 'tenure_months', and 'rate' as an annual percentage (default: the bank's rate
+    for 'loan_type'), from the query string or a JSON body. With 'annual_income'
+    the EMI's share of monthly income is included, and with 'schedule' the
+    month-by-month repayment.
+    """
+    params = request.get_json(silent=True) or request.args
+    try:
+        amount, rate, months = _emi_request(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    emi, total_payment, total_interest = emi_quote(amount, rate, months)
+    response = {
+        "amount": amount,
+        "rate": rate,
+        "tenure_months": months,
+        "emi": emi,
+        "total_payment": total_payment,
+        "total_interest": total_interest,
+    }
     try:
-        agent_endpoint = current_app.config['AGENT_ENDPOINT']
-        agent_response = requests.post(agent_endpoint, headers=agent_headers, json=payload)
-        agent_response.raise_for_status()
-
-        response_json = agent_response.json()
-        
-        # Correctly parse the agent's response structure
-        reply = "Could not parse agent response."
-        choices = response_json.get("choices", [])
-        if choices:
-            message = choices[0].get("message", {})
-            reply = message.get("content", reply)
-
-        # Save the chat interaction to CSV
-        save_chat_log(user_query, reply, session.get('session_id'))
-        
-        return jsonify({"response": reply})
-
-    except requests.exceptions.HTTPError as e:
-        error_response = f"Failed to fetch response from IBM Agent. Status: {e.response.status_code}"
-        save_chat_log(user_query, error_response)
-        return jsonify({
-            "error": "Failed to fetch response from IBM Agent.",
-            "status_code": e.response.status_code,
-            "details": e.response.text
-        }), e.response.status_code
-    except Exception as e:
-        error_response = f"An unexpected error occurred: {str(e)}"
-        save_chat_log(user_query, error_response)
-        return jsonify({"error": error_response}), 500
\ No newline at end of file
+        annual_income = float(params.get('annual_income') or 0)
+    except (TypeError, ValueError):
+        annual_income = 0
+    if annual_income > 0:
+        response["emi_to_income"] = round(emi / (annual_income / 12), 4)
+    if str(params.get('schedule', '')).lower() in ('1', 'true', 'yes'):
+        response["schedule"] = emi_schedule(amount, rate, months)
+    return jsonify(response)
+
+
+@api_bp.route('/service-status', methods=['GET'])
+def service_status_route():
+    """Runtime statistics for staff: cache effectiveness, Watson circuit breaker state, agent hedging, chat memory, the knowledge index, the active rule set, EMI quotes and SMTP connections"""
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    return jsonify({
+        'success': True,
+        'chat_cache': cache_stats(),
+        'watson_breaker': get_watson_breaker().stats(),
+        'decision_cache': decision_cache_stats(),
+        'agent_hedging': hedging_stats(),
+        'eligibility_batching': eligibility_batch_stats(),
+        'conversation_memory': memory_stats(),
+        'knowledge_index': knowledge_stats(),
+        'eligibility_rules_version': get_rule_set().version,
+        'emi_quotes': emi_quote_stats(),
+        'smtp_pool': smtp_pool_stats()
+    })
@@ -12,11 +12,12 @@ from ..utils.csv_handler import (
     get_user_applications, get_user_objected_applications,
     get_user_alerts, save_document_upload, update_uploaded_documents,
     get_application_documents, add_application_history, update_application_status,
-    create_admin_alert
+    create_admin_alert, save_comprehensive_application, get_comprehensive_application
 )
-from ..services.watson_service import assess_loan_eligibility_with_watson
+from ..services.assessment_service import submit_assessment
 from ..services.notification_service import send_email_notification, create_html_email_template
 from ..utils.helpers import format_currency
+from ..utils.http_response import conditional_response
 
 user_bp = Blueprint('user_bp', __name__)
 
@@ -25,15 +26,42 @@ user_bp = Blueprint('user_bp', __name__)
 def save_comprehensive_loan_application(loan_data):
     """
     Orchestrates the comprehensive loan application process:
-    1. Gets AI assessment from Watson.
-    2. Saves the combined result to the CSV.
-    3. Creates user alerts and sends email notifications.
+    1. Saves the application to the CSV as PENDING_ASSESSMENT.
+    2. Queues the Watson eligibility assessment in the background.
+    3. The background job writes the result back and sends the user alert and email.
+    The frontend polls /assessment-status/<application_id> for the result.
     """
-    # This function needs to be copied here from your original agent.py.
-    # Make sure it uses the imported functions like assess_loan_eligibility_with_watson,
-    # create_user_alert, and send_email_notification.
-    # Remember to import any other dependencies it needs, like uuid and datetime.
-    # ... (Paste the full save_comprehensive_loan_application function here) ...
+    result = save_comprehensive_application(loan_data)
+    if not result['success']:
+        return result
+    
+    application_id = result['application_id']
+    assessment_state = submit_assessment(application_id, loan_data)
+    
+    return {
+        'success': True,
+        'application_id': application_id,
+        # 'completed' only when the backlog was full and the rule engine answered inline
+        'assessment_complete': assessment_state == 'completed',
+        'status_url': f'/assessment-status/{application_id}',
+        'message': 'Application submitted. Your eligibility assessment is in progress.'
+    }
+
+
+def get_assessment_status(application_id):
+    """Current eligibility assessment state of a comprehensive application"""
+    row = get_comprehensive_application(application_id) or {}
+    eligibility_status = row.get('eligibility_status', '')
+    return {
+        'application_id': application_id,
+        'assessment_complete': bool(eligibility_status) and eligibility_status != 'PENDING_ASSESSMENT',
+        'eligibility_status': eligibility_status,
+        'eligibility_reason': row.get('eligibility_reason', ''),
+        'required_documents': row.get('required_documents', ''),
+        'assessment_engine': row.get('assessment_engine', ''),
+        'rule_set_version': row.get('rule_set_version', ''),
+        'user_email': row.get('user_email', '')
+    }
 
 
 # --- User Account Routes ---
@@ -109,7 +137,20 @@ def apply_comprehensive_loan_route():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@user_bp.route('/assessment-status/<application_id>', methods=['GET'])
+def assessment_status_route(application_id):
+    """Poll for the result of a comprehensive application's eligibility assessment"""
+    if not session.get('user_logged_in'):
+        return jsonify({'success': False, 'error': 'Not authenticated'})
+    
+    status = get_assessment_status(application_id)
+    if status.pop('user_email') != session.get('user_email'):
+        return jsonify({'success': False, 'error': 'Application not found'}), 404
+    
+    return jsonify({'success': True, **status})
+
 @user_bp.route('/user-applications', methods=['GET'])
+@conditional_response('LOAN_APPLICATIONS_CSV', 'COMPREHENSIVE_LOANS_CSV')
 def get_user_applications_route():
     if not session.get('user_logged_in'):
         return jsonify({'success': False, 'error': 'Not authenticated'})
@@ -297,6 +338,7 @@ def upload_documents_route():
         return jsonify({'success': False, 'error': str(e)})
 
 @user_bp.route('/user-alerts', methods=['GET'])
+@conditional_response('user_alerts.csv')
 def get_user_alerts_route():
     if not session.get('user_logged_in'):
         return jsonify({'success': False, 'error': 'Not authenticated'})
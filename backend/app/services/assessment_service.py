@@ -0,0 +1,99 @@
+# backend/app/services/assessment_service.py file
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+from ..utils.csv_handler import save_eligibility_assessment, add_application_history, create_user_alert
+from ..utils.helpers import format_currency, rule_based_eligibility_assessment
+from .watson_service import assess_loan_eligibility_with_watson
+from .notification_service import queue_email_notification, create_html_email_template
+
+
+# --- Background eligibility assessment ---
+# Comprehensive applications are saved as PENDING_ASSESSMENT and assessed here,
+# so the submission request only pays for one CSV write. The pool has a fixed
+# number of workers and a bounded backlog; when the backlog is full the
+# application is assessed inline by the rule engine instead of waiting on Watson.
+_executor = None
+_executor_lock = threading.Lock()
+_backlog = None
+
+# Alert priority and email styling for each eligibility outcome
+ALERT_STYLES = {
+    'APPROVED': ('high', 'success'),
+    'CONDITIONALLY_APPROVED': ('high', 'warning'),
+    'REJECTED': ('high', 'danger'),
+}
+
+
+def _get_executor():
+    global _executor, _backlog
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = current_app.config['ASSESSMENT_WORKERS']
+                _backlog = threading.BoundedSemaphore(workers + current_app.config['ASSESSMENT_QUEUE_SIZE'])
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assessment')
+    return _executor
+
+
+def submit_assessment(application_id, loan_data):
+    """
+    Queue the eligibility assessment for a saved application.
+    Returns 'queued', or 'completed' if the backlog was full and the rule engine ran inline.
+    """
+    executor = _get_executor()
+    if not _backlog.acquire(blocking=False):
+        print(f"Assessment backlog full; using rule engine for {application_id}")
+        assessment = rule_based_eligibility_assessment(loan_data)
+        assessment['engine'] = 'rules'
+        complete_assessment(application_id, assessment)
+        return 'completed'
+
+    app = current_app._get_current_object()
+    executor.submit(_run_assessment, app, application_id, loan_data)
+    return 'queued'
+
+
+def _run_assessment(app, application_id, loan_data):
+    try:
+        with app.app_context():
+            assessment = assess_loan_eligibility_with_watson(loan_data)
+            complete_assessment(application_id, assessment)
+    except Exception as e:
+        print(f"Eligibility assessment job failed for {application_id}: {e}")
+    finally:
+        _backlog.release()
+
+
+def complete_assessment(application_id, assessment):
+    """Store an assessment result and tell the applicant about it"""
+    row = save_eligibility_assessment(application_id, assessment)
+    if row is None:
+        print(f"Application {application_id} not found or already decided; assessment not saved")
+        return None
+
+    status = assessment.get('status', 'PENDING_REVIEW')
+    user_email = row.get('user_email', '')
+    add_application_history(application_id, user_email, 'ELIGIBILITY_ASSESSED', assessment.get('engine', 'system'),
+                            f"{status}: {assessment.get('reason', '')}")
+
+    priority, alert_type = ALERT_STYLES.get(status, ('medium', 'info'))
+    title = f"Eligibility Assessment: {status.replace('_', ' ').title()}"
+    message = (
+        f"Your {row.get('loan_type', '')} loan application {application_id} for "
+        f"{format_currency(row.get('loan_amount', 0))} has been assessed.\n\n"
+        f"Result: {status}\nReason: {assessment.get('reason', '')}\n"
+        f"Required documents: {assessment.get('documents', '')}\n"
+        f"Recommendations: {assessment.get('recommendations', '')}"
+    )
+    create_user_alert(user_email, application_id, 'eligibility_assessment', title, message, priority)
+    queue_email_notification(
+        user_email,
+        f"{title} - Application {application_id}",
+        message,
+        'eligibility_assessment',
+        create_html_email_template(title, message, alert_type=alert_type)
+    )
+    return row
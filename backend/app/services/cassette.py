@@ -0,0 +1,254 @@
+# backend/app/services/cassette.py file
+
+import hashlib
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import stream_decode_response_unicode
+
+
+# --- Record and replay of outbound Watson/IAM calls ---
+# With WATSON_CASSETTE_MODE=record every call made through http_client.post is
+# passed through and appended to the cassette file (JSON lines). With
+# WATSON_CASSETTE_MODE=replay the same calls are answered from the cassette
+# without touching the network, so the chat and eligibility paths can be
+# exercised and benchmarked offline. API keys and bearer tokens are never written:
+# the tokens in IAM replies are replaced by a placeholder, which is what replay
+# hands out. Nor are request bodies: prompts carry applicants' personal details,
+# so only their hash (the match key) is kept. Streamed replies are recorded as
+# the caller reads them and saved once the stream has been read to the end.
+# The asyncio gateway records and replays its agent calls through the same
+# cassette (record_async and replay_entry).
+
+# Request bodies can carry the IBM API key; it is masked before hashing and saving
+_APIKEY_PATTERN = re.compile(r'(apikey=)[^&]*')
+# Read size when finishing a stream the caller stopped reading
+CHUNK_BYTES = 8192
+# Stands in for IAM access and refresh tokens in the cassette and on replay
+PLACEHOLDER_TOKEN = 'cassette-placeholder-token'
+_TOKEN_FIELDS = ('access_token', 'refresh_token')
+
+
+def _redact(body):
+    if body is None:
+        return ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    return _APIKEY_PATTERN.sub(r'\1REDACTED', body)
+
+
+def _redact_tokens(body):
+    """An IAM reply with its tokens replaced by the placeholder; any other body unchanged"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(data, dict) or not any(field in data for field in _TOKEN_FIELDS):
+        return body
+    for field in _TOKEN_FIELDS:
+        if field in data:
+            data[field] = PLACEHOLDER_TOKEN
+    return json.dumps(data)
+
+
+def _request_body(kwargs):
+    if kwargs.get('json') is not None:
+        return json.dumps(kwargs['json'], sort_keys=True)
+    return _redact(kwargs.get('data'))
+
+
+def request_key(url, kwargs):
+    """Identifies a request by path and body; host and credentials are ignored"""
+    body = _request_body(kwargs)
+    return hashlib.sha256(f"{urlsplit(url).path}\n{body}".encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """
+    A file of recorded request/response pairs. Identical requests are replayed
+    in the order they were recorded, wrapping round when more calls are made
+    than were recorded, so replays are deterministic.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._responses = {}   # request key -> list of recorded responses
+        self._next = {}        # request key -> index of the next response to replay
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses.setdefault(entry['key'], []).append(entry['response'])
+
+    def record(self, url, kwargs, response):
+        """Append a real response to the cassette; a streamed one once the caller has read all of it"""
+        key = request_key(url, kwargs)
+        if kwargs.get('stream') and not response._content_consumed:
+            self._record_stream(key, url, response)
+        else:
+            self._save(key, url, response.status_code, response.headers, response.text)
+
+    def _record_stream(self, key, url, response):
+        """Copy chunks aside as the caller reads them, leaving the streaming itself alone"""
+        iter_content, close = response.iter_content, response.close
+        chunks = []
+        state = {'read_to_end': False, 'saved': False}
+
+        def save():
+            if not state['saved']:
+                state['saved'] = True
+                self._save(key, url, response.status_code, response.headers,
+                           b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace'))
+
+        def recording_iter_content(chunk_size=1, decode_unicode=False):
+            def raw_chunks():
+                for chunk in iter_content(chunk_size=chunk_size):
+                    chunks.append(chunk)
+                    yield chunk
+                state['read_to_end'] = True
+                save()
+            if decode_unicode:
+                return stream_decode_response_unicode(raw_chunks(), response)
+            return raw_chunks()
+
+        def recording_close():
+            # The caller stopped early (e.g. at the [DONE] event): read the rest so the whole reply is saved
+            try:
+                if not state['read_to_end'] and not state['saved']:
+                    for chunk in iter_content(chunk_size=CHUNK_BYTES):
+                        chunks.append(chunk)
+                    save()
+            except Exception as e:
+                # A broken stream is not saved, so it can't be replayed cut short
+                print(f"Cassette: not recording streamed POST {urlsplit(url).path}: {e}")
+            finally:
+                close()
+
+        # iter_lines() and .content both read through iter_content
+        response.iter_content = recording_iter_content
+        response.close = recording_close
+
+    def record_async(self, url, kwargs, response):
+        """record() for an httpx response of the asyncio gateway"""
+        key = request_key(url, kwargs)
+        if kwargs.get('stream'):
+            self._record_async_stream(key, url, response)
+        else:
+            self._save(key, url, response.status_code, response.headers, response.text)
+
+    def _record_async_stream(self, key, url, response):
+        """_record_stream for httpx: copy decoded chunks aside as aiter_lines() and friends read them"""
+        aiter_bytes, aclose = response.aiter_bytes, response.aclose
+        chunks = []
+        # 'reading' is set while the underlying stream is being read; httpx closes
+        # the response itself when it reaches the end, which must not drain it again
+        state = {'source': None, 'read_to_end': False, 'saved': False, 'reading': False}
+
+        def save():
+            if not state['saved']:
+                state['saved'] = True
+                self._save(key, url, response.status_code, response.headers,
+                           b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace'))
+
+        async def read(source):
+            while True:
+                state['reading'] = True
+                try:
+                    chunk = await source.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    state['reading'] = False
+                chunks.append(chunk)
+                yield chunk
+
+        async def recording_aiter_bytes(chunk_size=None):
+            state['source'] = aiter_bytes(chunk_size)
+            async for chunk in read(state['source']):
+                yield chunk
+            state['read_to_end'] = True
+            save()
+
+        async def recording_aclose():
+            if state['reading']:
+                await aclose()
+                return
+            # The caller stopped early (e.g. at the [DONE] event): read the rest so the whole reply is saved
+            try:
+                if not state['read_to_end'] and not state['saved']:
+                    async for _ in read(state['source'] or aiter_bytes(CHUNK_BYTES)):
+                        pass
+                    save()
+            except Exception as e:
+                # A broken stream is not saved, so it can't be replayed cut short
+                print(f"Cassette: not recording streamed POST {urlsplit(url).path}: {e}")
+            finally:
+                await aclose()
+
+        # aiter_lines() and aread() both read through aiter_bytes
+        response.aiter_bytes = recording_aiter_bytes
+        response.aclose = recording_aclose
+
+    def _save(self, key, url, status, headers, body):
+        entry = {
+            'key': key,
+            'request': {'path': urlsplit(url).path},
+            'response': {
+                'status': status,
+                'headers': {
+                    name: value for name, value in headers.items()
+                    if name.lower() in ('content-type', 'retry-after')
+                },
+                'body': _redact_tokens(body),
+            },
+        }
+        with self._lock:
+            self._responses.setdefault(key, []).append(entry['response'])
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry) + '\n')
+
+    def replay_entry(self, url, kwargs):
+        """The next recorded response for a request as a dict of 'status', 'headers' and 'body'; raises ConnectionError if nothing matches"""
+        key = request_key(url, kwargs)
+        with self._lock:
+            recorded = self._responses.get(key)
+            if not recorded:
+                raise requests.exceptions.ConnectionError(f"No cassette entry for POST {urlsplit(url).path}")
+            index = self._next.get(key, 0)
+            self._next[key] = index + 1
+            stored = recorded[index % len(recorded)]
+        # Cassettes recorded before tokens were redacted still hold real ones
+        return dict(stored, body=_redact_tokens(stored['body']))
+
+    def replay(self, url, kwargs):
+        """A requests.Response rebuilt from the cassette; raises ConnectionError if nothing matches"""
+        stored = self.replay_entry(url, kwargs)
+        response = requests.models.Response()
+        response.status_code = stored['status']
+        response.headers = CaseInsensitiveDict(stored['headers'])
+        response.url = url
+        response.encoding = 'utf-8'
+        response._content = stored['body'].encode('utf-8')
+        # Marks the body as already read, so iter_lines() serves streamed replies from memory
+        response._content_consumed = True
+        return response
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette(path):
+    """The cassette for 'path', loaded once per process"""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None or _cassette.path != path:
+            _cassette = Cassette(path)
+        return _cassette
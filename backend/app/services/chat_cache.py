@@ -0,0 +1,63 @@
+# backend/app/services/chat_cache.py file
+
+import re
+import unicodedata
+from flask import current_app
+
+from ..utils.ttl_cache import TTLCache
+
+
+# Questions about the user's own application must always reach the agent.
+# Application and objection IDs are 8 hex digits; an all-digit one is only
+# recognised after a word like "application", so amounts such as 50000000 still cache.
+SESSION_SPECIFIC_PATTERN = re.compile(
+    r"\b(my|mine|our)\b"                           # "what is my application status"
+    r"|\b(?=\d*[A-F])[A-F0-9]{8}\b"                # application IDs
+    r"|\b(application|app|objection|reference|ref|id)\W{0,3}(no\b\.?|number|id)?\W{0,3}\d{8}\b"  # "application 12345678"
+    r"|[\w.+-]+@[\w-]+\.[\w.]+",                   # email addresses
+    re.IGNORECASE
+)
+
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(current_app.config['CHAT_CACHE_SIZE'], current_app.config['CHAT_CACHE_TTL'])
+    return _cache
+
+
+def normalize_query(query):
+    """Fold case, punctuation and whitespace so trivially different phrasings share a key"""
+    # Only punctuation and symbols are dropped; combining marks in Indic scripts are kept
+    text = ''.join(' ' if unicodedata.category(ch)[0] in 'PS' else ch for ch in query.casefold())
+    return ' '.join(text.split())
+
+
+def cache_key_for(query, bypass=False):
+    """
+    Cache key for a chat query, or None when the answer must not come from the cache:
+    caching is disabled, the client asked to bypass it, or the question is about
+    the user's own application.
+    """
+    if bypass or not current_app.config['CHAT_CACHE_ENABLED']:
+        return None
+    if not isinstance(query, str) or SESSION_SPECIFIC_PATTERN.search(query):
+        return None
+    return normalize_query(query) or None
+
+
+def get_cached_reply(cache_key):
+    if cache_key is None:
+        return None
+    return _get_cache().get(cache_key)
+
+
+def store_reply(cache_key, reply):
+    if cache_key is not None and reply:
+        _get_cache().set(cache_key, reply)
+
+
+def cache_stats():
+    return _get_cache().stats()
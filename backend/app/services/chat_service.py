@@ -0,0 +1,189 @@
+# backend/app/services/chat_service.py file
+
+import requests
+from flask import current_app
+
+from ..utils.csv_handler import save_chat_log
+from ..utils.deadline import Deadline, DeadlineExceeded
+from . import http_client
+from .chat_cache import cache_key_for, get_cached_reply, store_reply
+from .conversation_memory import conversation_history, remember_turn
+from .hedging import agent_post
+from .knowledge_index import find_local_answer, context_messages
+from .watson_service import get_iam_token, iter_agent_stream, parse_agent_reply, mock_chat_response
+
+
+# --- The /ask pipeline ---
+# Shared by the Flask route (routes/api_routes.py) and the asyncio gateway
+# (async_gateway.py), so both answer a question the same way: the demo reply
+# when IBM isn't configured, then the response cache, then the local knowledge
+# index, and only then the agent, with recent turns of the session and
+# matching policy text sent along. Every function here needs an app context
+# and may block (CSV writes, the knowledge index, IAM token fetches), so the
+# gateway runs them on worker threads.
+
+# Words per chunk when streaming the demo response
+MOCK_STREAM_WORDS_PER_CHUNK = 3
+
+
+class AgentAuthError(Exception):
+    """No IAM token could be had for the agent call."""
+
+
+class ChatTurn:
+    """One question on its way through the pipeline"""
+
+    def __init__(self, request_data, session_id):
+        self.query = request_data.get("query")
+        self.session_id = session_id
+        self.history = []
+        self.cache_key = None
+        # Set when the question is answered without the agent: 'mock', 'cache' or 'knowledge_index'
+        self.answer = None
+        self.source = None
+        # (body, status) when the question can't be sent to the agent
+        self.error = None
+        self.deadline = None
+
+    @property
+    def cached(self):
+        return self.source == 'cache'
+
+    def answer_chunks(self):
+        """The local answer as stream chunks: the demo reply a few words at a time, anything else whole"""
+        if self.source != 'mock':
+            return [self.answer]
+        words = self.answer.split(' ')
+        return [
+            ' '.join(words[i:i + MOCK_STREAM_WORDS_PER_CHUNK]) + ('' if i + MOCK_STREAM_WORDS_PER_CHUNK >= len(words) else ' ')
+            for i in range(0, len(words), MOCK_STREAM_WORDS_PER_CHUNK)
+        ]
+
+    def answer_data(self):
+        """JSON body for a local answer"""
+        if self.source == 'cache':
+            return {"response": self.answer, "cached": True}
+        if self.source == 'knowledge_index':
+            return {"response": self.answer, "source": "knowledge_index"}
+        return {"response": self.answer}
+
+
+def start_chat_turn(request_data, session_id):
+    """
+    Answer the question locally if possible. Otherwise the returned turn
+    carries the deadline for the agent call, or an error for the client.
+    """
+    turn = ChatTurn(request_data, session_id)
+    # Nothing below (the cache key, the index, conversation memory) may see anything but text
+    if not turn.query or not isinstance(turn.query, str):
+        turn.error = ({"error": "Query field cannot be empty."}, 400)
+        return turn
+    if not (current_app.config['API_KEY'] and current_app.config['AGENT_ENDPOINT']):
+        # Provide a mock response for testing
+        turn.answer, turn.source = mock_chat_response(turn.query), 'mock'
+        return turn
+
+    # Repeated general questions are answered from the cache without calling IBM at all.
+    # Follow-ups depend on the earlier turns, so only a session's first question can be cached.
+    turn.history = conversation_history(session_id)
+    turn.cache_key = cache_key_for(turn.query, bypass=request_data.get("no_cache") or turn.history)
+    cached_reply = get_cached_reply(turn.cache_key)
+    if cached_reply is not None:
+        turn.answer, turn.source = cached_reply, 'cache'
+        return turn
+
+    # Questions answered before (or covered by policy text) can be answered from the local index,
+    # unless the client asked for a fresh answer
+    local_answer = None if turn.history or request_data.get("no_cache") else find_local_answer(turn.query)
+    if local_answer is not None:
+        turn.answer, turn.source = local_answer, 'knowledge_index'
+        return turn
+
+    # Every outbound call below shares this budget instead of having its own timeout
+    turn.deadline = Deadline(current_app.config['ASK_DEADLINE_SECONDS'])
+    return turn
+
+
+def finish_chat_turn(turn, reply, completed=True, error_response=None):
+    """
+    Record an answered question in the chat log (the error instead, if the
+    reply broke off), and unless the reply is partial or unusable, in the
+    response cache and conversation memory.
+    """
+    # A client that disconnects mid-stream leaves a partial reply: log it, but don't reuse it
+    if completed and reply is not None:
+        if not turn.cached:
+            store_reply(turn.cache_key, reply)
+        remember_turn(turn.session_id, turn.query, reply)
+    if reply is None:
+        reply = "Could not parse agent response."
+    save_chat_log(turn.query, error_response or reply, turn.session_id, cached=turn.cached, follow_up=bool(turn.history))
+
+
+def agent_request(turn, stream=False):
+    """(headers, payload) for the agent call. Raises AgentAuthError without an IAM token."""
+    access_token = get_iam_token(turn.deadline)
+    if not access_token:
+        raise AgentAuthError()
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {access_token}"
+    }
+    payload = {
+        "messages": turn.history + context_messages(turn.query) + [
+            {"role": "user", "content": turn.query}
+        ]
+    }
+    if stream:
+        payload["stream"] = True
+    return headers, payload
+
+
+def ask_agent(turn):
+    """The agent's reply, or None if it can't be parsed. Raises on failure; see agent_failure."""
+    headers, payload = agent_request(turn)
+    # Hedged when AGENT_HEDGE_ENABLED: a slow call is sent again and the first answer wins
+    agent_response = agent_post(current_app.config['AGENT_ENDPOINT'], turn.deadline, headers=headers, json=payload)
+    agent_response.raise_for_status()
+    return parse_agent_reply(agent_response.json())
+
+
+def stream_agent(turn):
+    """Reply chunks as the agent streams them. Raises before the first chunk if the call fails."""
+    headers, payload = agent_request(turn, stream=True)
+    agent_response = http_client.post(current_app.config['AGENT_ENDPOINT'], headers=headers, json=payload,
+                                      stream=True, deadline=turn.deadline)
+    agent_response.raise_for_status()
+    return iter_agent_stream(agent_response)
+
+
+def agent_failure(turn, error):
+    """(body, status) for an agent call that failed before answering, logged to the chat log"""
+    response = getattr(error, 'response', None)
+    if isinstance(error, AgentAuthError):
+        error_response = "Failed to authenticate with IBM Cloud. Check API Key and server logs."
+        body, status = {"error": error_response}, 500
+    elif response is not None and response.status_code >= 400:
+        error_response = f"Failed to fetch response from IBM Agent. Status: {response.status_code}"
+        body, status = {
+            "error": "Failed to fetch response from IBM Agent.",
+            "status_code": response.status_code,
+            "details": response.text
+        }, response.status_code
+    # A read timeout that exhausted the retries surfaces as a ConnectionError
+    elif isinstance(error, (DeadlineExceeded, requests.exceptions.Timeout, TimeoutError)) or turn.deadline.expired():
+        error_response = f"IBM Agent did not respond within {turn.deadline.seconds:g} seconds."
+        body, status = {"error": error_response}, 504
+    else:
+        error_response = f"An unexpected error occurred: {str(error)}"
+        body, status = {"error": error_response}, 500
+    save_chat_log(turn.query, error_response)
+    return body, status
+
+
+def stream_failure(error):
+    """Message for a stream that broke off after it started, sent to the client and logged in place of the reply"""
+    response = getattr(error, 'response', None)
+    if response is not None and response.status_code >= 400:
+        return f"Failed to fetch response from IBM Agent. Status: {response.status_code}"
+    return f"An unexpected error occurred: {str(error)}"
@@ -0,0 +1,150 @@
+# backend/app/services/circuit_breaker.py file
+
+import threading
+import time
+from collections import deque
+from flask import current_app
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Failure-rate and latency circuit breaker for calls to an external service.
+
+    The outcome of the last 'window_size' calls is kept. Once at least
+    'minimum_calls' are recorded, the breaker opens when the share of failed
+    calls or of calls slower than 'slow_call_seconds' reaches its threshold.
+    While open, allow_request() returns False so callers go straight to their
+    fallback. After 'open_seconds' the breaker is half-open and lets up to
+    'half_open_probes' calls through: if they all succeed quickly it closes,
+    and any failed or slow probe opens it again.
+    """
+
+    def __init__(self, name, failure_rate_threshold=0.5, slow_call_rate_threshold=0.5,
+                 slow_call_seconds=10.0, window_size=20, minimum_calls=5,
+                 open_seconds=30.0, half_open_probes=1):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._state = CLOSED
+        self._window = deque(maxlen=window_size)  # (failed, slow) per recorded call
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_passed = 0
+        self._short_circuited = 0
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """True if the call should be attempted; False means use the fallback now."""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self._short_circuited += 1
+                    return False
+                self._state = HALF_OPEN
+                self._probes_started = 0
+                self._probes_passed = 0
+            if self._state == HALF_OPEN:
+                if self._probes_started >= self.half_open_probes:
+                    self._short_circuited += 1
+                    return False
+                self._probes_started += 1
+            return True
+
+    def record_success(self, duration):
+        self._record(False, duration)
+
+    def record_failure(self, duration):
+        self._record(True, duration)
+
+    def stats(self):
+        with self._lock:
+            calls = len(self._window)
+            failures = sum(1 for failed, _ in self._window if failed)
+            slow = sum(1 for _, is_slow in self._window if is_slow)
+            retry_in = 0
+            if self._state == OPEN:
+                retry_in = max(0, int(self.open_seconds - (time.monotonic() - self._opened_at)))
+            return {
+                'name': self.name,
+                'state': self._state,
+                'recent_calls': calls,
+                'failure_rate': round(failures / calls, 3) if calls else 0.0,
+                'slow_call_rate': round(slow / calls, 3) if calls else 0.0,
+                'short_circuited': self._short_circuited,
+                'times_opened': self._times_opened,
+                'retry_in_seconds': retry_in,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._window.clear()
+
+    # --- Internal helpers ---
+
+    def _record(self, failed, duration):
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                    return
+                self._probes_passed += 1
+                if self._probes_passed >= self.half_open_probes:
+                    self._state = CLOSED
+                    self._window.clear()
+                return
+            if self._state == OPEN:
+                # A call that started before the breaker opened; its outcome is stale
+                return
+
+            self._window.append((failed, slow))
+            calls = len(self._window)
+            if calls < self.minimum_calls:
+                return
+            failures = sum(1 for f, _ in self._window if f)
+            slow_calls = sum(1 for _, s in self._window if s)
+            if (failures / calls >= self.failure_rate_threshold
+                    or slow_calls / calls >= self.slow_call_rate_threshold):
+                self._open()
+
+    def _open(self):
+        """Caller holds the lock"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+        self._window.clear()
+
+
+_watson_breaker = None
+_watson_breaker_lock = threading.Lock()
+
+
+def get_watson_breaker():
+    """The breaker guarding Watson eligibility calls, configured from the app config on first use."""
+    global _watson_breaker
+    if _watson_breaker is None:
+        with _watson_breaker_lock:
+            if _watson_breaker is None:
+                config = current_app.config
+                _watson_breaker = CircuitBreaker(
+                    'watson_eligibility',
+                    failure_rate_threshold=config['BREAKER_FAILURE_RATE'],
+                    slow_call_rate_threshold=config['BREAKER_SLOW_CALL_RATE'],
+                    slow_call_seconds=config['BREAKER_SLOW_CALL_SECONDS'],
+                    window_size=config['BREAKER_WINDOW_SIZE'],
+                    minimum_calls=config['BREAKER_MINIMUM_CALLS'],
+                    open_seconds=config['BREAKER_OPEN_SECONDS'],
+                    half_open_probes=config['BREAKER_HALF_OPEN_PROBES'],
+                )
+    return _watson_breaker
@@ -0,0 +1,149 @@
+# backend/app/services/conversation_memory.py file
+
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import current_app
+
+
+# --- Multi-turn chat memory ---
+# Recent turns of each chat session are kept in process and sent to the agent
+# ahead of the new question, so follow-ups like "and for a car loan?" make sense.
+# Memory is bounded twice over: an LRU caps the number of sessions kept
+# (CHAT_MEMORY_MAX_SESSIONS), and each session keeps at most CHAT_MEMORY_MAX_CHARS
+# of turns. Turns that fall out of the budget are folded into a short summary of
+# the questions asked earlier. Worst case is roughly
+# MAX_SESSIONS x (MAX_CHARS + SUMMARY_CHARS) characters, e.g. ~66M for the defaults.
+
+# Characters of earlier questions kept once their turns have been dropped
+SUMMARY_CHARS = 300
+# Characters of each dropped question carried into the summary
+SUMMARY_QUESTION_CHARS = 80
+
+
+class _Conversation:
+    __slots__ = ('turns', 'chars', 'summary', 'last_used')
+
+    def __init__(self):
+        self.turns = deque()  # (user message, reply) pairs, oldest first
+        self.chars = 0
+        self.summary = ''
+        self.last_used = time.monotonic()
+
+
+class ConversationMemory:
+    """Thread-safe store of recent chat turns per session, LRU-evicted and trimmed to a character budget"""
+
+    def __init__(self, max_sessions=20000, max_chars=3000, idle_seconds=3600):
+        self.max_sessions = max_sessions
+        self.max_chars = max_chars
+        self.idle_seconds = idle_seconds
+        self.evicted = 0
+        self.trimmed_turns = 0
+        self._sessions = OrderedDict()  # session_id -> _Conversation, least recently used first
+        self._lock = threading.Lock()
+
+    def history(self, session_id):
+        """Earlier turns of this session as chat messages, oldest first (empty for a new session)"""
+        with self._lock:
+            self._expire_idle()
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                return []
+            messages = []
+            if conversation.summary:
+                messages.append({"role": "system",
+                                 "content": f"Earlier in this conversation the user asked: {conversation.summary}"})
+            for user_message, reply in conversation.turns:
+                messages.append({"role": "user", "content": user_message})
+                messages.append({"role": "assistant", "content": reply})
+            return messages
+
+    def append(self, session_id, user_message, reply):
+        """Remember one question and its answer, dropping the oldest turns past the budget"""
+        # A single turn never takes more than half the budget, so some context always survives
+        limit = max(1, self.max_chars // 2)
+        user_message, reply = user_message[:limit], reply[:limit]
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                conversation = self._sessions[session_id] = _Conversation()
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            conversation.last_used = time.monotonic()
+            conversation.turns.append((user_message, reply))
+            conversation.chars += len(user_message) + len(reply)
+            while conversation.chars > self.max_chars and len(conversation.turns) > 1:
+                self._drop_oldest(conversation)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _drop_oldest(self, conversation):
+        user_message, reply = conversation.turns.popleft()
+        conversation.chars -= len(user_message) + len(reply)
+        question = ' '.join(user_message.split())[:SUMMARY_QUESTION_CHARS]
+        summary = f"{conversation.summary}; {question}" if conversation.summary else question
+        # Keep the most recent questions when the summary outgrows its budget
+        conversation.summary = summary[-SUMMARY_CHARS:]
+        self.trimmed_turns += 1
+
+    def _expire_idle(self):
+        """Sessions are in least-recently-used order, so idle ones are all at the front"""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            session_id, conversation = next(iter(self._sessions.items()))
+            if conversation.last_used > cutoff:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            self._expire_idle()
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'chars': sum(conversation.chars + len(conversation.summary) for conversation in self._sessions.values()),
+                'evicted': self.evicted,
+                'trimmed_turns': self.trimmed_turns,
+            }
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def _get_memory():
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                config = current_app.config
+                _memory = ConversationMemory(
+                    config['CHAT_MEMORY_MAX_SESSIONS'], config['CHAT_MEMORY_MAX_CHARS'],
+                    config['PERMANENT_SESSION_LIFETIME']
+                )
+    return _memory
+
+
+def conversation_history(session_id):
+    """Messages to send ahead of the new question; empty when memory is off or there is no session"""
+    if not session_id or not current_app.config['CHAT_MEMORY_ENABLED']:
+        return []
+    return _get_memory().history(session_id)
+
+
+def remember_turn(session_id, user_message, reply):
+    if session_id and reply and current_app.config['CHAT_MEMORY_ENABLED']:
+        _get_memory().append(session_id, user_message, reply)
+
+
+def memory_stats():
+    stats = _get_memory().stats()
+    stats['enabled'] = current_app.config['CHAT_MEMORY_ENABLED']
+    return stats
@@ -0,0 +1,188 @@
+# backend/app/services/decision_cache.py file
+
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from flask import current_app
+
+from ..utils.eligibility_rules import get_rule_set
+from ..utils.helpers import calculate_age_from_dob
+
+
+# --- Persistent eligibility decision cache ---
+# Watson decisions are stored in decision_cache.csv, keyed on a fingerprint of
+# the fields that drive eligibility, so a resubmitted or retried application
+# with the same profile doesn't pay for another Watson call. Entries expire
+# after DECISION_CACHE_TTL seconds and are ignored (and dropped on the next
+# load) once the eligibility rule file's version changes, including when a
+# new rule file is hot-reloaded.
+#
+# Another applicant with the same profile gets the cached text, so personal
+# details Watson echoed back from the prompt (name, employer, loan purpose,
+# contact details and exact age) are replaced before an entry is stored.
+
+CACHE_FIELDS = ['fingerprint', 'rule_set_version', 'status', 'reason', 'documents',
+                'recommendations', 'created_at', 'expires_at']
+
+_entries = None   # fingerprint -> row, for the current rule set version only
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def age_band(dob_str):
+    """Age bucket that keeps the rule engine's 21 and 65 cut-offs on band edges"""
+    age = calculate_age_from_dob(dob_str)
+    if not isinstance(age, int):
+        return 'unknown'
+    if age < 21:
+        return 'under-21'
+    if age > 65:
+        return 'over-65'
+    low = 21 + 5 * ((age - 21) // 5)
+    return f"{low}-{min(low + 4, 65)}"
+
+
+def _normalise_number(value):
+    try:
+        return format(float(str(value).replace(',', '').replace('₹', '').strip()), 'g')
+    except ValueError:
+        return str(value).strip().lower()
+
+
+def decision_fingerprint(loan_data):
+    """Hash of the eligibility-relevant fields of a comprehensive application"""
+    features = {
+        'age_band': age_band(loan_data.get('date-of-birth', '')),
+        'annual_income': _normalise_number(loan_data.get('annual-income', '')),
+        'existing_loans': str(loan_data.get('existing-loans', '')).strip().lower(),
+        'cibil_score': _normalise_number(loan_data.get('cibil-score', '')),
+        'loan_type': str(loan_data.get('loan-type', '')).strip().lower(),
+        'loan_amount': _normalise_number(loan_data.get('loan-amount', '')),
+        'loan_tenure': _normalise_number(loan_data.get('loan-tenure', '')),
+        'employment_type': str(loan_data.get('employment-type', '')).strip().lower(),
+    }
+    return hashlib.sha256(json.dumps(features, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+PHONE_PATTERN = re.compile(r'(?<!\w)\+?\d[\d -]{8,}\d(?!\w)')
+TITLE_PREFIX = r'(?:(?:Mr|Mrs|Ms|Miss|Dr|Shri|Smt)\.?\s+)?'
+
+
+def _redact(text, loan_data):
+    """Cached text with the applicant's personal details taken out"""
+    if not text:
+        return text
+    text = EMAIL_PATTERN.sub('[email]', text)
+    text = PHONE_PATTERN.sub('[phone]', text)
+    replacements = []
+    full_name = str(loan_data.get('full-name') or '').strip()
+    if full_name:
+        # The whole name first, then each part, e.g. "Mr. Sharma" or "Priya's"
+        replacements.append((TITLE_PREFIX + re.escape(full_name), 'the applicant'))
+        replacements.extend((TITLE_PREFIX + re.escape(part), 'the applicant') for part in full_name.split() if len(part) > 1)
+    for field, placeholder in (('employer-name', 'the employer'), ('loan-purpose', 'the stated purpose')):
+        value = str(loan_data.get(field) or '').strip()
+        if value:
+            replacements.append((re.escape(value), placeholder))
+    for pattern, placeholder in replacements:
+        text = re.sub(rf'(?<!\w){pattern}(?!\w)', placeholder, text, flags=re.IGNORECASE)
+    # The fingerprint only knows the age band, so an exact age may not hold for the next applicant
+    age = calculate_age_from_dob(loan_data.get('date-of-birth', ''))
+    if isinstance(age, int):
+        band = age_band(loan_data.get('date-of-birth', ''))
+        text = re.sub(rf'\b{age}(?=[\s-]*(?:years?|yrs?)\b)', band, text, flags=re.IGNORECASE)
+    return text
+
+
+def _cache_path():
+    return os.path.join(current_app.config['CSV_DIR'], 'decision_cache.csv')
+
+
+def _load_entries():
+    """Read the cache file, dropping expired and old-version entries. Caller holds the lock."""
+    global _entries
+    path = _cache_path()
+    version = get_rule_set().version
+    now = time.time()
+    _entries = {}
+    rows_read = 0
+    if os.path.exists(path):
+        with open(path, 'r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                rows_read += 1
+                if row.get('rule_set_version') == version and float(row.get('expires_at') or 0) > now:
+                    _entries[row['fingerprint']] = row
+    # Compact the file when entries expired, were superseded or belong to an old rule set
+    if rows_read != len(_entries) or not os.path.exists(path):
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=CACHE_FIELDS)
+            writer.writeheader()
+            writer.writerows(_entries.values())
+
+
+def get_cached_decision(loan_data):
+    """Cached assessment for this applicant profile, or None"""
+    if not current_app.config['DECISION_CACHE_ENABLED']:
+        return None
+    fingerprint = decision_fingerprint(loan_data)
+    with _lock:
+        if _entries is None:
+            _load_entries()
+        row = _entries.get(fingerprint)
+        if row is not None and (row['rule_set_version'] != get_rule_set().version
+                                or float(row['expires_at']) <= time.time()):
+            del _entries[fingerprint]
+            row = None
+        _stats['hits' if row is not None else 'misses'] += 1
+    if row is None:
+        return None
+    return {
+        'status': row['status'],
+        'reason': row['reason'],
+        'documents': row['documents'],
+        'recommendations': row['recommendations'],
+    }
+
+
+def store_decision(loan_data, assessment):
+    """Persist a Watson assessment for this applicant profile, without the applicant's personal details"""
+    if not current_app.config['DECISION_CACHE_ENABLED']:
+        return
+    now = time.time()
+    row = {
+        'fingerprint': decision_fingerprint(loan_data),
+        'rule_set_version': get_rule_set().version,
+        'status': assessment.get('status', ''),
+        'reason': _redact(assessment.get('reason', ''), loan_data),
+        'documents': _redact(assessment.get('documents', ''), loan_data),
+        'recommendations': _redact(assessment.get('recommendations', ''), loan_data),
+        'created_at': now,
+        'expires_at': now + current_app.config['DECISION_CACHE_TTL'],
+    }
+    with _lock:
+        if _entries is None:
+            _load_entries()
+        _entries[row['fingerprint']] = row
+        try:
+            with open(_cache_path(), 'a', newline='', encoding='utf-8') as file:
+                csv.DictWriter(file, fieldnames=CACHE_FIELDS).writerow(row)
+        except OSError as e:
+            print(f"Error saving eligibility decision to cache: {e}")
+
+
+def decision_cache_stats():
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            'enabled': current_app.config['DECISION_CACHE_ENABLED'],
+            'rule_set_version': get_rule_set().version,
+            'entries': len(_entries) if _entries is not None else None,
+            'hits': _stats['hits'],
+            'misses': _stats['misses'],
+            'hit_rate': round(_stats['hits'] / lookups, 3) if lookups else 0.0,
+        }
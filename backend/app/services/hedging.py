@@ -0,0 +1,215 @@
+# backend/app/services/hedging.py file
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+
+from ..utils.deadline import DeadlineExceeded
+from . import http_client
+
+
+# --- Hedged requests to the agent endpoint ---
+# The agent call is a read, so it is safe to send twice. With AGENT_HEDGE_ENABLED
+# a second, identical request is sent when the first hasn't answered within the
+# recent p95 latency, and whichever succeeds first is used. An error answer is
+# returned only when the other attempt fails as well. Only the slow tail pays
+# for the extra call: by construction about 5% of requests are hedged.
+
+
+class LatencyTracker:
+    """Rolling window of recent call durations, with percentiles"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction):
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+agent_latency = LatencyTracker()
+_stats = {'requests': 0, 'hedges_sent': 0, 'hedge_wins': 0, 'primary_wins': 0}
+_stats_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config['HTTP_MAX_CONCURRENCY'], thread_name_prefix='agent-hedge'
+                )
+    return _executor
+
+
+def hedge_delay():
+    """Seconds to wait before hedging: AGENT_HEDGE_DELAY if set, else the recent p95 once there are enough samples"""
+    config = current_app.config
+    if config['AGENT_HEDGE_DELAY']:
+        return config['AGENT_HEDGE_DELAY']
+    if len(agent_latency) < config['AGENT_HEDGE_MIN_SAMPLES']:
+        return None
+    return agent_latency.percentile(0.95)
+
+
+def planned_hedge_delay():
+    """hedge_delay() when AGENT_HEDGE_ENABLED, else None"""
+    return hedge_delay() if current_app.config['AGENT_HEDGE_ENABLED'] else None
+
+
+def _timed_post(url, deadline, kwargs):
+    """POST and record how long it took, retries included"""
+    started = time.monotonic()
+    response = http_client.post(url, deadline=deadline, **kwargs)
+    agent_latency.record(time.monotonic() - started)
+    return response
+
+
+def _timed_post_in_context(app, url, deadline, kwargs):
+    with app.app_context():
+        return _timed_post(url, deadline, kwargs)
+
+
+def _close_when_done(future):
+    """Release the connection held by the losing request once it finishes"""
+    def close(done):
+        if not done.cancelled() and done.exception() is None:
+            done.result().close()
+    future.add_done_callback(close)
+
+
+def agent_post(url, deadline, **kwargs):
+    """
+    POST to the agent within the request deadline, hedging the call if enabled.
+    Raises the usual requests exceptions, or DeadlineExceeded.
+    """
+    _count('requests')
+    delay = planned_hedge_delay()
+    if delay is None or delay >= deadline.remaining():
+        return _timed_post(url, deadline, kwargs)
+
+    app = current_app._get_current_object()
+    executor = _get_executor()
+    primary = executor.submit(_timed_post_in_context, app, url, deadline, kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    _count('hedges_sent')
+    hedge = executor.submit(_timed_post_in_context, app, url, deadline, kwargs)
+    pending = {primary, hedge}
+    error, failed = None, None
+    while pending:
+        done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            response = future.result()
+            # An error answer only counts once the other attempt has failed too
+            if not response.ok:
+                if failed is not None:
+                    failed.close()
+                failed = response
+                continue
+            _count('hedge_wins' if future is hedge else 'primary_wins')
+            for other in pending:
+                _close_when_done(other)
+            if failed is not None:
+                failed.close()
+            return response
+    for other in pending:
+        _close_when_done(other)
+    if failed is not None:
+        return failed
+    raise error or DeadlineExceeded(f"deadline of {deadline.seconds}s exceeded")
+
+
+async def agent_post_async(post, deadline, delay):
+    """
+    agent_post for the asyncio gateway. 'post' is a coroutine function making
+    one attempt and returning an httpx response; 'delay' is planned_hedge_delay(),
+    taken in an app context. Shares the latency window and counts with agent_post.
+    """
+    _count('requests')
+
+    async def timed_post():
+        started = time.monotonic()
+        response = await asyncio.wait_for(post(), timeout=deadline.remaining())
+        agent_latency.record(time.monotonic() - started)
+        return response
+
+    if delay is None or delay >= deadline.remaining():
+        return await timed_post()
+
+    primary = asyncio.ensure_future(timed_post())
+    done, _ = await asyncio.wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    _count('hedges_sent')
+    hedge = asyncio.ensure_future(timed_post())
+    pending = {primary, hedge}
+    error, failed = None, None
+    while pending:
+        done, pending = await asyncio.wait(pending, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            break
+        for task in done:
+            if task.exception() is not None:
+                error = task.exception()
+                continue
+            response = task.result()
+            # An error answer only counts once the other attempt has failed too
+            if response.is_error:
+                failed = response
+                continue
+            _count('hedge_wins' if task is hedge else 'primary_wins')
+            for other in pending:
+                other.cancel()
+            return response
+    for other in pending:
+        other.cancel()
+    if failed is not None:
+        return failed
+    raise error or DeadlineExceeded(f"deadline of {deadline.seconds}s exceeded")
+
+
+def hedging_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    delay = hedge_delay()
+    p95 = agent_latency.percentile(0.95)
+    stats.update({
+        'enabled': current_app.config['AGENT_HEDGE_ENABLED'],
+        'samples': len(agent_latency),
+        'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        'hedge_delay_ms': round(delay * 1000, 1) if delay is not None else None,
+        'hedge_rate': round(stats['hedges_sent'] / stats['requests'], 3) if stats['requests'] else 0.0,
+        'hedge_win_rate': round(stats['hedge_wins'] / stats['hedges_sent'], 3) if stats['hedges_sent'] else 0.0,
+    })
+    return stats
@@ -0,0 +1,130 @@
+# backend/app/services/http_client.py file
+
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import current_app
+
+from .cassette import get_cassette
+
+
+# Throttling and server errors that are worth another attempt
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# One pooled session per worker process, shared by every outbound Watson/IAM call.
+# requests.Session is safe to share between threads for plain request/response use.
+# Calls with a Deadline use a second session without adapter retries: urllib3 would
+# reuse the first attempt's timeout for every retry, so post() retries those itself.
+_session = None
+_deadline_session = None
+_session_lock = threading.Lock()
+_concurrency_limit = None
+
+
+def _build_session(config, retries=True):
+    """Create a session with connection pooling and (unless 'retries' is False) retries on throttling/server errors."""
+    retry = Retry(
+        total=config['HTTP_MAX_RETRIES'],
+        backoff_factor=config['HTTP_BACKOFF_FACTOR'],
+        backoff_jitter=config['HTTP_BACKOFF_JITTER'],
+        status_forcelist=RETRY_STATUSES,
+        # The agent and IAM endpoints are only called with POST, and both calls are safe to repeat
+        allowed_methods=frozenset({'GET', 'POST'}),
+        respect_retry_after_header=True,
+        # Hand the final 429/5xx back to the caller so raise_for_status() behaves as before
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config['HTTP_POOL_CONNECTIONS'],
+        pool_maxsize=config['HTTP_POOL_SIZE'],
+        max_retries=retry if retries else 0,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the shared session, creating it from the app config on first use."""
+    global _session, _deadline_session, _concurrency_limit
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _concurrency_limit = threading.BoundedSemaphore(current_app.config['HTTP_MAX_CONCURRENCY'])
+                _deadline_session = _build_session(current_app.config, retries=False)
+                _session = _build_session(current_app.config)
+    return _session
+
+
+def default_timeout():
+    """(connect, read) timeout tuple from the config"""
+    return (current_app.config['HTTP_CONNECT_TIMEOUT'], current_app.config['HTTP_READ_TIMEOUT'])
+
+
+def post(url, timeout=None, deadline=None, **kwargs):
+    """
+    POST through the shared session. Every call has a timeout, and at most
+    HTTP_MAX_CONCURRENCY calls are in flight at once per process. With a
+    Deadline the timeout of each attempt is whatever is left of the request's
+    budget, and retries stop once the budget can't cover the backoff.
+    Raises the usual requests exceptions, or DeadlineExceeded.
+    WATSON_CASSETTE_MODE 'record' saves each call to WATSON_CASSETTE_PATH and
+    'replay' answers from it without using the network.
+    """
+    mode = current_app.config['WATSON_CASSETTE_MODE']
+    if mode == 'replay':
+        return get_cassette(current_app.config['WATSON_CASSETTE_PATH']).replay(url, kwargs)
+    
+    session = get_session()
+    if deadline is not None:
+        response = _post_within(url, deadline, **kwargs)
+    else:
+        with _concurrency_limit:
+            response = session.post(url, timeout=timeout or default_timeout(), **kwargs)
+    if mode == 'record':
+        get_cassette(current_app.config['WATSON_CASSETTE_PATH']).record(url, kwargs, response)
+    return response
+
+
+def _retry_delay(attempt, response=None):
+    """Backoff before retry number attempt + 1, or longer if the server asked for it with Retry-After"""
+    config = current_app.config
+    delay = config['HTTP_BACKOFF_FACTOR'] * (2 ** attempt) + random.uniform(0, config['HTTP_BACKOFF_JITTER'])
+    try:
+        return max(delay, float(response.headers.get('Retry-After')))
+    except (AttributeError, TypeError, ValueError):
+        return delay
+
+
+def _post_within(url, deadline, **kwargs):
+    """
+    POST with the shared retry policy (429/5xx and connection errors, jittered
+    backoff), each attempt timed out by what is left of the deadline. Gives up,
+    returning the last response or raising the last error, once the budget can't
+    cover the next backoff.
+    """
+    max_retries = current_app.config['HTTP_MAX_RETRIES']
+    for attempt in range(max_retries + 1):
+        timeout = deadline.timeout(current_app.config['HTTP_CONNECT_TIMEOUT'])
+        try:
+            with _concurrency_limit:
+                response = _deadline_session.post(url, timeout=timeout, **kwargs)
+        except requests.exceptions.ReadTimeout:
+            # The whole remaining budget went on this attempt
+            raise
+        except requests.exceptions.ConnectionError:
+            delay = _retry_delay(attempt)
+            if attempt == max_retries or delay >= deadline.remaining():
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            delay = _retry_delay(attempt, response)
+            if delay >= deadline.remaining():
+                return response
+            response.close()
+        time.sleep(delay)
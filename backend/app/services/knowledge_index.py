@@ -0,0 +1,328 @@
+# backend/app/services/knowledge_index.py file
+
+import csv
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+
+from .chat_cache import normalize_query, SESSION_SPECIFIC_PATTERN
+
+
+# --- Local retrieval over policy text and past chat answers ---
+# An Okapi BM25 index is built offline (flask build-knowledge-index) from the
+# policy documents in KNOWLEDGE_DOCS_DIR and the de-duplicated question/answer
+# pairs in chat_logs.csv (standalone questions only, not follow-ups), and saved as JSON. /ask queries it before calling
+# Watson: when a past question matches confidently its answer is returned
+# straight away, otherwise the best passages are sent to Watson as context.
+# The server picks up a rebuilt index file without a restart.
+
+K1 = 1.2
+B = 0.75
+# Policy passages are built from paragraphs up to about this many characters
+PASSAGE_CHARS = 600
+# How often the index file is checked for a rebuild
+RELOAD_CHECK_SECONDS = 30
+# Terms in more than this share of documents only add to documents already matched
+# by rarer query terms, instead of scoring their whole (long) posting list
+COMMON_TERM_SHARE = 0.05
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me of on or "
+    "the to what when where which who why will with you your".split()
+)
+
+# Replies that must never be reused as answers: errors, timeouts and demo-mode text
+UNUSABLE_REPLY_PREFIXES = (
+    "Failed to",
+    "An unexpected error occurred",
+    "IBM Agent did not respond",
+    "Could not parse agent response",
+    "Thank you for your message:",
+)
+
+
+def tokenize(text):
+    """Normalised terms of 'text': case and punctuation folded, stopwords dropped, plurals trimmed"""
+    terms = []
+    for word in normalize_query(text or '').split():
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+# --- Building ---
+
+def _split_passages(text):
+    """Group paragraphs into passages of about PASSAGE_CHARS, keeping headings with what follows"""
+    passages, current, last = [], '', ''
+    for paragraph in (p.strip() for p in text.split('\n\n')):
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) > PASSAGE_CHARS and not last.startswith('#'):
+            passages.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        last = paragraph
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _policy_documents(docs_dir):
+    documents = []
+    if not docs_dir or not os.path.isdir(docs_dir):
+        return documents
+    for name in sorted(os.listdir(docs_dir)):
+        if not name.lower().endswith(('.md', '.txt')):
+            continue
+        with open(os.path.join(docs_dir, name), 'r', encoding='utf-8') as file:
+            for passage in _split_passages(file.read()):
+                documents.append({'kind': 'policy', 'source': name, 'text': passage})
+    return documents
+
+
+def _answer_documents(chat_logs_path):
+    """One question/answer pair per normalised question, keeping the latest usable answer"""
+    answers = {}
+    sessions_seen = set()
+    if not chat_logs_path or not os.path.exists(chat_logs_path):
+        return []
+    with open(chat_logs_path, 'r', newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            question = (row.get('user_message') or '').strip()
+            answer = (row.get('bot_response') or '').strip()
+            # Follow-up answers only make sense after the earlier turns of their session.
+            # Rows logged before the follow_up column existed count as follow-ups
+            # unless they are the first question logged for their session.
+            follow_up = row.get('follow_up') or ''
+            if follow_up:
+                had_history = follow_up == 'true'
+            else:
+                had_history = row.get('session_id') in sessions_seen
+            sessions_seen.add(row.get('session_id'))
+            if had_history or not question or not answer or answer.startswith(UNUSABLE_REPLY_PREFIXES):
+                continue
+            # Answers about one user's own application are no use to anyone else
+            if SESSION_SPECIFIC_PATTERN.search(question) or not tokenize(question):
+                continue
+            answers[normalize_query(question)] = (question, answer)
+    return [{'kind': 'qa', 'source': 'chat_logs', 'question': question, 'text': answer}
+            for question, answer in answers.values()]
+
+
+def build_index(docs_dir, chat_logs_path, output_path):
+    """
+    Build the index from policy documents and chat logs and write it to
+    'output_path' (atomically). Returns counts of what was indexed.
+    """
+    documents = _policy_documents(docs_dir) + _answer_documents(chat_logs_path)
+    postings, lengths = {}, []
+    for doc_id, document in enumerate(documents):
+        # Past answers are matched on the question asked; policy passages on their text
+        terms = tokenize(document['question'] if document['kind'] == 'qa' else document['text'])
+        lengths.append(len(terms))
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append([doc_id, tf])
+
+    index = {
+        'built_at': datetime.now().isoformat(),
+        'documents': documents,
+        'lengths': lengths,
+        'postings': postings,
+    }
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(index, file, ensure_ascii=False)
+    os.replace(temp_path, output_path)
+    return {
+        'policy_passages': sum(1 for d in documents if d['kind'] == 'policy'),
+        'answers': sum(1 for d in documents if d['kind'] == 'qa'),
+        'terms': len(postings),
+    }
+
+
+# --- Querying ---
+
+class KnowledgeIndex:
+    """A loaded BM25 index. Term weights are precomputed, so a query is a few dict lookups and additions."""
+
+    def __init__(self, data):
+        self.documents = data['documents']
+        self.built_at = data.get('built_at')
+        lengths = data['lengths']
+        count = len(self.documents)
+        average_length = (sum(lengths) / count) if count else 0.0
+        # idf of a term that appears nowhere, used for query terms missing from the index
+        self.unseen_idf = math.log(1 + (count + 0.5) / 0.5)
+
+        self._common_df = max(1, int(count * COMMON_TERM_SHARE))
+
+        self._postings = {}  # term -> (idf, {doc_id: weight})
+        for term, entries in data['postings'].items():
+            idf = math.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            weighted = {
+                doc_id: tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[doc_id] / average_length))
+                for doc_id, tf in entries
+            }
+            self._postings[term] = (idf, weighted)
+
+        # Total idf of each past question, to check how much of it a query covers
+        self._question_mass = {}
+        for doc_id, document in enumerate(self.documents):
+            if document['kind'] == 'qa':
+                self._question_mass[doc_id] = sum(self._postings[t][0] for t in set(tokenize(document['question'])))
+
+    def search(self, query, limit=3):
+        """
+        Best matching documents as (document, confidence, doc_id) tuples, best first.
+        Confidence is the BM25 score relative to that of an average-length document
+        containing each query term once (capped at 1).
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        entries = []
+        best_possible = 0.0
+        for term in terms:
+            entry = self._postings.get(term)
+            if entry is None:
+                best_possible += self.unseen_idf
+            else:
+                best_possible += entry[0]
+                entries.append(entry)
+
+        # Rarest terms first, so common ones can be limited to documents already matched
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        scores = {}
+        for idf, weighted in entries:
+            if scores and len(weighted) > self._common_df:
+                for doc_id in scores:
+                    weight = weighted.get(doc_id)
+                    if weight is not None:
+                        scores[doc_id] += idf * weight
+                continue
+            for doc_id, weight in weighted.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.documents[doc_id], min(1.0, score / best_possible), doc_id) for doc_id, score in top]
+
+    def question_coverage(self, doc_id, query):
+        """Share of a past question's idf mass that the query also contains"""
+        mass = self._question_mass.get(doc_id)
+        if not mass:
+            return 0.0
+        query_terms = set(tokenize(query))
+        question_terms = set(tokenize(self.documents[doc_id]['question']))
+        return sum(self._postings[t][0] for t in question_terms & query_terms) / mass
+
+
+_index = None
+_index_mtime = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+_stats = {'queries': 0, 'local_answers': 0, 'context_injections': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_knowledge_index():
+    """The index from KNOWLEDGE_INDEX_PATH, reloaded when the file is rebuilt; None if it hasn't been built"""
+    global _index, _index_mtime, _index_checked_at
+    now = time.monotonic()
+    if _index_checked_at and now - _index_checked_at < RELOAD_CHECK_SECONDS:
+        return _index
+    with _index_lock:
+        if _index_checked_at and now - _index_checked_at < RELOAD_CHECK_SECONDS:
+            return _index
+        path = current_app.config['KNOWLEDGE_INDEX_PATH']
+        try:
+            mtime = os.path.getmtime(path)
+            if mtime != _index_mtime:
+                with open(path, 'r', encoding='utf-8') as file:
+                    _index = KnowledgeIndex(json.load(file))
+                _index_mtime = mtime
+        except FileNotFoundError:
+            _index, _index_mtime = None, None
+        except Exception as e:
+            # Keep serving the previous index rather than failing every question
+            print(f"Error loading knowledge index: {e}")
+        _index_checked_at = now
+        return _index
+
+
+def find_local_answer(query):
+    """
+    A past answer to this question when one matches confidently enough
+    (KNOWLEDGE_ANSWER_THRESHOLD), else None. Both sides have to match: the query
+    must cover the past question and the past question must cover the query.
+    """
+    if not current_app.config['KNOWLEDGE_ENABLED'] or not isinstance(query, str):
+        return None
+    if SESSION_SPECIFIC_PATTERN.search(query):
+        return None
+    index = get_knowledge_index()
+    if index is None:
+        return None
+    _count('queries')
+    threshold = current_app.config['KNOWLEDGE_ANSWER_THRESHOLD']
+    for document, confidence, doc_id in index.search(query):
+        if document['kind'] != 'qa' or confidence < threshold:
+            continue
+        if index.question_coverage(doc_id, query) >= threshold:
+            _count('local_answers')
+            return document['text']
+    return None
+
+
+def context_messages(query):
+    """A system message with the passages most relevant to the query, or [] when nothing relevant is indexed"""
+    if not current_app.config['KNOWLEDGE_ENABLED'] or not isinstance(query, str):
+        return []
+    index = get_knowledge_index()
+    if index is None:
+        return []
+    config = current_app.config
+    passages = []
+    for document, confidence, _ in index.search(query, config['KNOWLEDGE_CONTEXT_PASSAGES']):
+        if confidence < config['KNOWLEDGE_CONTEXT_MIN_SCORE']:
+            continue
+        if document['kind'] == 'qa':
+            passages.append(f"Q: {document['question']}\nA: {document['text']}")
+        else:
+            passages.append(document['text'])
+    if not passages:
+        return []
+    _count('context_injections')
+    return [{
+        "role": "system",
+        "content": "Relevant bank policy and earlier answers (use them if they help):\n\n" + "\n\n---\n\n".join(passages)
+    }]
+
+
+def knowledge_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    index = get_knowledge_index()
+    stats.update({
+        'enabled': current_app.config['KNOWLEDGE_ENABLED'],
+        'documents': len(index.documents) if index else 0,
+        'built_at': index.built_at if index else None,
+        'local_answer_rate': round(stats['local_answers'] / stats['queries'], 3) if stats['queries'] else 0.0,
+    })
+    return stats
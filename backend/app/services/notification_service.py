@@ -1,7 +1,7 @@
 # backend/app/services/notification_service.py file
 
-import smtplib
-import ssl
+import queue
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -9,6 +9,48 @@ from flask import current_app
 
 # Import the function to save logs from our CSV handler
 from ..utils.csv_handler import save_notification_log
+from .smtp_pool import get_smtp_pool
+
+
+# --- Background notification queue ---
+# Bulk admin actions hand their emails to this queue so the request isn't
+# held up by one SMTP round trip per application.
+_notification_queue = queue.Queue()
+_notification_worker = None
+_notification_worker_lock = threading.Lock()
+
+
+def _notification_worker_loop(app):
+    """Drain the notification queue, sending each email inside an app context."""
+    while True:
+        send_func, args = _notification_queue.get()
+        try:
+            with app.app_context():
+                send_func(*args)
+        except Exception as e:
+            print(f"❌ Queued notification error: {e}")
+        finally:
+            _notification_queue.task_done()
+
+
+def _enqueue_notification(send_func, *args):
+    global _notification_worker
+    with _notification_worker_lock:
+        if _notification_worker is None or not _notification_worker.is_alive():
+            app = current_app._get_current_object()
+            _notification_worker = threading.Thread(target=_notification_worker_loop, args=(app,), daemon=True)
+            _notification_worker.start()
+    _notification_queue.put((send_func, args))
+
+
+def queue_email_notification(to_email, subject, message, notification_type='info', html_content=None):
+    """Queue an email to be sent in the background by send_email_notification."""
+    _enqueue_notification(send_email_notification, to_email, subject, message, notification_type, html_content)
+
+
+def queue_objection_notification(user_email, app_id, reason, requested_docs):
+    """Queue an objection email to be sent in the background."""
+    _enqueue_notification(send_objection_notification, user_email, app_id, reason, requested_docs)
 
 
 def create_html_email_template(title, content, cta_text=None, cta_link=None, alert_type="info"):
@@ -97,12 +139,9 @@ def send_email_notification(to_email, subject, message, notification_type='info'
     if html_content:
         msg.attach(MIMEText(html_content, 'html', 'utf-8'))
 
-    context = ssl.create_default_context()
     try:
-        with smtplib.SMTP(current_app.config['SMTP_SERVER'], current_app.config['SMTP_PORT']) as server:
-            server.starttls(context=context)
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(current_app.config['FROM_EMAIL'], to_email, msg.as_string())
+        # Reuses a logged-in connection instead of connecting, STARTTLS and logging in per email
+        get_smtp_pool().sendmail(current_app.config['FROM_EMAIL'], to_email, msg.as_string())
         print(f"✅ Email sent successfully to {to_email}: {subject}")
         save_notification_log(to_email, subject, message, notification_type)
         return True
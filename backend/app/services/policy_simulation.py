@@ -0,0 +1,148 @@
+# backend/app/services/policy_simulation.py file
+
+import csv
+import os
+import threading
+import time
+from datetime import datetime
+from operator import itemgetter
+import numpy as np
+from flask import current_app
+
+from ..utils.eligibility_batch import prepare_applicants, evaluate_statuses, STATUS_NAMES
+from ..utils.eligibility_rules import get_rule_set
+from ..utils.helpers import AMOUNT_RANGES, parse_amount
+
+
+# --- What-if simulation of a rule change ---
+# Re-runs the rule engine over every stored comprehensive application under
+# the active rules and under a proposed rule set, and reports how many
+# applications would move between statuses, overall and by loan type and
+# amount band. Nothing is written. The applications are read and parsed once
+# and both rule sets are evaluated on NumPy columns, so a million applications
+# take seconds. The parsed columns are kept until the CSV changes, so trying
+# several variants of a rule costs little more than the evaluation itself.
+
+# CSV columns fed to the rule engine, in prepare_applicants argument order
+RULE_INPUT_COLUMNS = ['annual_income', 'loan_amount', 'cibil_score', 'date_of_birth', 'loan_type', 'employment_type',
+                      'loan_tenure']
+
+AMOUNT_BANDS = [key for key, _, _ in AMOUNT_RANGES] + ['unknown']
+# Upper (inclusive) bounds of every band but the last, for np.searchsorted
+AMOUNT_BAND_EDGES = np.array([upper for _, _, upper in AMOUNT_RANGES if upper is not None], dtype=np.float64)
+
+
+def read_application_columns(csv_path=None):
+    """The rule engine's input columns for every comprehensive application, as tuples of raw CSV values"""
+    selected = []
+    try:
+        with open(csv_path or current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            # A column missing from the header points past the end of the row and reads as ''
+            positions = [header.index(name) if name in header else len(header) for name in RULE_INPUT_COLUMNS]
+            last = max(positions)
+            pick = itemgetter(*positions)
+            padding = [''] * (last + 1)
+            selected = [pick(row) if len(row) > last else pick(row + padding) for row in reader]
+    except FileNotFoundError:
+        pass
+    columns = list(zip(*selected)) if selected else [()] * len(RULE_INPUT_COLUMNS)
+    return dict(zip(RULE_INPUT_COLUMNS, columns))
+
+
+def _amount_bands(loan_amounts):
+    """Index into AMOUNT_BANDS for every loan amount"""
+    amounts = np.array([parse_amount(amount) for amount in loan_amounts], dtype=np.float64)  # None -> nan
+    bands = np.searchsorted(AMOUNT_BAND_EDGES, amounts, side='left')
+    bands[np.isnan(amounts)] = len(AMOUNT_BANDS) - 1
+    return bands
+
+
+def _group_codes(values):
+    """(group index per value, group names) with loan types compared case-insensitively"""
+    names, index_by_value = [], {}
+    codes = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        code = index_by_value.get(value)
+        if code is None:
+            name = value.strip().lower() or 'unknown'
+            if name not in names:
+                names.append(name)
+            code = index_by_value[value] = names.index(name)
+        codes[i] = code
+    return codes, names
+
+
+def _summarise(matrix):
+    """Counts before/after and the non-zero status moves from a [before, after] count matrix"""
+    statuses = STATUS_NAMES.tolist()
+    transitions = {
+        f"{statuses[before]} -> {statuses[after]}": int(matrix[before, after])
+        for before in range(len(statuses)) for after in range(len(statuses))
+        if before != after and matrix[before, after]
+    }
+    return {
+        'applications': int(matrix.sum()),
+        'changed': int(matrix.sum() - np.trace(matrix)),
+        'before': {status: int(count) for status, count in zip(statuses, matrix.sum(axis=1)) if count},
+        'after': {status: int(count) for status, count in zip(statuses, matrix.sum(axis=0)) if count},
+        'transitions': transitions,
+    }
+
+
+def _grouped(groups, group_names, before, after):
+    size = len(STATUS_NAMES)
+    counts = np.bincount((groups * size + before) * size + after, minlength=len(group_names) * size * size)
+    matrices = counts.reshape(len(group_names), size, size)
+    return {name: _summarise(matrices[i]) for i, name in enumerate(group_names) if matrices[i].any()}
+
+
+_book = None  # (source key, parsed applications) of the last CSV read
+_book_lock = threading.Lock()
+
+
+def _load_book(csv_path, today):
+    """Parsed rule inputs and grouping of every application, reused while the CSV is unchanged"""
+    global _book
+    try:
+        stat = os.stat(csv_path)
+        key = (csv_path, stat.st_mtime_ns, stat.st_size, today.date())
+    except FileNotFoundError:
+        key = None
+    with _book_lock:
+        if key is not None and _book is not None and _book[0] == key:
+            return _book[1]
+        columns = read_application_columns(csv_path)
+        book = {
+            'applicants': prepare_applicants(*(columns[name] for name in RULE_INPUT_COLUMNS), today=today),
+            'loan_types': _group_codes(columns['loan_type']),
+            'amount_bands': _amount_bands(columns['loan_amount']),
+        }
+        _book = (key, book)
+        return book
+
+
+def simulate_policy(proposed_rules, baseline_rules=None, csv_path=None, today=None):
+    """
+    Compare the decisions of 'proposed_rules' with the active rules (or
+    'baseline_rules') across all stored comprehensive applications.
+    """
+    started = time.perf_counter()
+    baseline_rules = baseline_rules or get_rule_set()
+    book = _load_book(csv_path or current_app.config['COMPREHENSIVE_LOANS_CSV'], today or datetime.now())
+    before, _ = evaluate_statuses(book['applicants'], baseline_rules)
+    after, _ = evaluate_statuses(book['applicants'], proposed_rules)
+
+    size = len(STATUS_NAMES)
+    overall = np.bincount(before * size + after, minlength=size * size).reshape(size, size)
+    loan_types, loan_type_names = book['loan_types']
+    summary = _summarise(overall)
+    summary.update({
+        'baseline_version': baseline_rules.version,
+        'proposed_version': proposed_rules.version,
+        'by_loan_type': _grouped(loan_types, loan_type_names, before, after),
+        'by_amount_band': _grouped(book['amount_bands'], AMOUNT_BANDS, before, after),
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+    })
+    return summary
@@ -0,0 +1,186 @@
+# backend/app/services/reassessment_service.py file
+
+import json
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+
+from ..utils.csv_handler import (
+    iter_comprehensive_applications, snapshot_comprehensive_applications,
+    comprehensive_row_to_loan_data, save_eligibility_assessments,
+    add_application_history_entries
+)
+from ..utils.helpers import rule_based_eligibility_assessment
+from ..utils.review_queue import is_awaiting_review, is_resubmitted
+from .watson_service import assess_loan_eligibility_with_watson
+
+
+# --- Batch re-assessment of open applications ---
+# Used when the credit policy changes. Applications are streamed from a snapshot
+# of comprehensive_loans.csv and assessed on a bounded thread pool. Every
+# 'batch_size' results are appended to a checkpoint file, so a crashed or
+# interrupted run picks up where it stopped. comprehensive_loans.csv is only
+# rewritten once per 'batches_per_write' batches (and at the end), since each
+# rewrite costs a pass over the whole book; results checkpointed but not yet
+# written are written first thing on resume. The checkpoint is removed once a
+# run finishes. Resubmitted applications are left alone: overwriting their
+# eligibility_status would lose the applicant's resubmission.
+
+
+def _assess_with_rules(loan_data):
+    assessment = rule_based_eligibility_assessment(loan_data)
+    assessment['engine'] = 'rules'
+    return assessment
+
+
+ENGINES = {
+    'watson': assess_loan_eligibility_with_watson,  # still falls back to rules per call, as on submission
+    'rules': _assess_with_rules,
+}
+
+
+def default_checkpoint_path():
+    return os.path.join(current_app.config['CSV_DIR'], 'reassessment_checkpoint.txt')
+
+
+def _load_checkpoint(path):
+    """
+    (IDs assessed in earlier runs, {application_id: (user_email, assessment)}
+    for those whose results hadn't been written to the CSV yet)
+    """
+    done_ids, unwritten = set(), {}
+    if not os.path.exists(path):
+        return done_ids, unwritten
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if not isinstance(entry, dict):
+                # A bare application ID, or a line cut short by a crash
+                done_ids.add(line)
+            elif entry.get('written'):
+                unwritten.clear()
+            else:
+                done_ids.add(entry['application_id'])
+                unwritten[entry['application_id']] = (entry.get('user_email', ''), entry.get('assessment') or {})
+    return done_ids, unwritten
+
+
+def _append_checkpoint(path, entries):
+    with open(path, 'a', encoding='utf-8') as file:
+        file.writelines(json.dumps(entry) + "\n" for entry in entries)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def run_reassessment(engine='watson', concurrency=None, batch_size=None, checkpoint_path=None,
+                     restart=False, progress=None, batches_per_write=None):
+    """
+    Re-run eligibility for every comprehensive application still awaiting review,
+    except those the applicant has resubmitted.
+    'progress' is called with the running totals after each write to the CSV.
+    Returns the totals: assessed, skipped (done in an earlier run), resubmitted
+    (left alone), failed, and a count of decisions per engine.
+    """
+    config = current_app.config
+    assess = ENGINES[engine]
+    concurrency = concurrency or config['REASSESSMENT_CONCURRENCY']
+    batch_size = batch_size or config['REASSESSMENT_BATCH_SIZE']
+    batches_per_write = batches_per_write or config['REASSESSMENT_BATCHES_PER_WRITE']
+    checkpoint_path = checkpoint_path or default_checkpoint_path()
+
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    # Results an interrupted run checkpointed but never wrote go out with the first write
+    done_ids, unwritten = _load_checkpoint(checkpoint_path)
+    carried_ids = set(unwritten)
+
+    totals = {'assessed': 0, 'skipped': 0, 'resubmitted': 0, 'failed': 0, 'engines': Counter()}
+    batch = {}     # application_id -> (user_email, assessment), not yet checkpointed
+    in_flight = {}  # future -> (application_id, user_email)
+    app = current_app._get_current_object()
+
+    def assess_in_context(loan_data):
+        with app.app_context():
+            return assess(loan_data)
+
+    def checkpoint():
+        if not batch:
+            return
+        _append_checkpoint(checkpoint_path, (
+            {'application_id': app_id, 'user_email': email, 'assessment': assessment}
+            for app_id, (email, assessment) in batch.items()
+        ))
+        unwritten.update(batch)
+        batch.clear()
+        if len(unwritten) >= batch_size * batches_per_write:
+            write()
+
+    def write():
+        if not unwritten:
+            return
+        # Applications resubmitted since the snapshot was taken keep their status too
+        updated = save_eligibility_assessments({app_id: a for app_id, (_, a) in unwritten.items()}, keep_resubmitted=True)
+        add_application_history_entries(
+            (app_id, email, 'REASSESSED', f"reassessment:{assessment.get('engine', engine)}",
+             f"{assessment.get('status', '')}: {assessment.get('reason', '')}")
+            for app_id, (email, assessment) in unwritten.items() if app_id in updated
+        )
+        _append_checkpoint(checkpoint_path, [{'written': True}])
+        totals['assessed'] += len(updated)
+        totals['engines'].update(assessment.get('engine', engine) for app_id, (_, assessment) in unwritten.items() if app_id in updated)
+        unwritten.clear()
+        if progress:
+            progress(totals)
+
+    def collect(futures):
+        for future in futures:
+            app_id, email = in_flight.pop(future)
+            try:
+                batch[app_id] = (email, future.result())
+            except Exception as e:
+                print(f"Re-assessment failed for {app_id}: {e}")
+                totals['failed'] += 1
+            if len(batch) >= batch_size:
+                checkpoint()
+
+    # The live file is rewritten during the run, so read from a copy
+    fd, snapshot_path = tempfile.mkstemp(prefix='reassessment-', suffix='.csv', dir=config['CSV_DIR'])
+    os.close(fd)
+    try:
+        snapshot_comprehensive_applications(snapshot_path)
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='reassessment') as executor:
+            for row in iter_comprehensive_applications(snapshot_path):
+                app_id = row.get('application_id')
+                if not app_id or not is_awaiting_review(row):
+                    continue
+                if is_resubmitted(row):
+                    totals['resubmitted'] += 1
+                    continue
+                if app_id in done_ids:
+                    if app_id not in carried_ids:
+                        totals['skipped'] += 1
+                    continue
+                # Keep at most two rows per worker in memory, however large the book
+                while len(in_flight) >= concurrency * 2:
+                    collect(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                future = executor.submit(assess_in_context, comprehensive_row_to_loan_data(row))
+                in_flight[future] = (app_id, row.get('user_email', ''))
+            while in_flight:
+                collect(wait(in_flight, return_when=FIRST_COMPLETED).done)
+        checkpoint()
+        write()
+    finally:
+        os.remove(snapshot_path)
+
+    # A finished run starts from scratch next time
+    if totals['failed'] == 0 and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return totals
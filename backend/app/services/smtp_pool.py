@@ -0,0 +1,168 @@
+# backend/app/services/smtp_pool.py file
+
+import atexit
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from flask import current_app
+
+
+# --- Pooled SMTP connections ---
+# Opening a connection, STARTTLS and logging in costs about a second against a
+# hosted mail server, and used to be paid for every email. The pool keeps up to
+# SMTP_POOL_SIZE authenticated connections open and hands them out one sender
+# at a time. A connection idle for longer than SMTP_POOL_IDLE_SECONDS is closed
+# instead of reused, since servers drop idle clients. When a reused connection
+# turns out to have been dropped anyway, the email is sent again once on a
+# fresh connection.
+
+
+# The connection is gone: worth one retry when it had been sitting in the pool
+_DROPPED = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+# The server answered and refused this email; the connection itself is fine
+_REFUSED = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+
+class SMTPPool:
+    """Authenticated SMTP connections shared by the threads of one process."""
+
+    def __init__(self, host, port, username, password, size=2, idle_seconds=60.0, timeout=30.0, use_tls=True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self._tls_context = ssl.create_default_context() if use_tls else None
+        self._idle = deque()  # (connection, time it was returned), most recently used last
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._counts = {'connections_opened': 0, 'connect_errors': 0, 'sends': 0, 'reused': 0, 'reconnects': 0, 'failures': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self._tls_context is not None:
+                server.starttls(context=self._tls_context)
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            self._count('connect_errors')
+            raise
+        self._count('connections_opened')
+        return server
+
+    def _checkout(self):
+        """(connection, whether it was reused): the most recently used idle one if still fresh, else a new one"""
+        now = time.monotonic()
+        server, stale = None, []
+        with self._lock:
+            while self._idle and server is None:
+                candidate, returned_at = self._idle.pop()
+                if now - returned_at <= self.idle_seconds:
+                    server = candidate
+                else:
+                    stale.append(candidate)
+            while self._idle and now - self._idle[0][1] > self.idle_seconds:
+                stale.append(self._idle.popleft()[0])
+        # Probably dropped by the server already, so not worth a QUIT round trip
+        for candidate in stale:
+            candidate.close()
+        if server is not None:
+            return server, True
+        return self._connect(), False
+
+    def _checkin(self, server):
+        with self._lock:
+            self._idle.append((server, time.monotonic()))
+
+    def _release(self, server, error):
+        """After a failed send: keep the connection if the server only turned this email down"""
+        self._count('failures')
+        # After a 421 smtplib has closed the connection itself
+        if isinstance(error, _REFUSED) and server.sock is not None:
+            self._checkin(server)
+        else:
+            server.close()
+
+    def sendmail(self, from_addr, to_addrs, message):
+        """
+        smtplib.SMTP.sendmail over a pooled connection. Raises what smtplib
+        raises; a connection that failed is closed rather than returned.
+        """
+        with self._slots:
+            server, reused = self._checkout()
+            try:
+                result = server.sendmail(from_addr, to_addrs, message)
+            except _DROPPED as e:
+                if not reused:
+                    self._release(server, e)
+                    raise
+                # Dropped while idle: try once more on a new connection
+                server.close()
+                self._count('reconnects')
+                server = self._connect()
+                try:
+                    result = server.sendmail(from_addr, to_addrs, message)
+                except Exception as e:
+                    self._release(server, e)
+                    raise
+            except Exception as e:
+                self._release(server, e)
+                raise
+            else:
+                if reused:
+                    self._count('reused')
+            self._checkin(server)
+            self._count('sends')
+            return result
+
+    def close(self):
+        """Log out of every idle connection"""
+        with self._lock:
+            idle = [server for server, _ in self._idle]
+            self._idle.clear()
+        for server in idle:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+            stats['idle'] = len(self._idle)
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    """Return the process's SMTP pool, creating it from the app config on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = current_app.config
+                _pool = SMTPPool(
+                    config['SMTP_SERVER'], config['SMTP_PORT'], config['SMTP_USERNAME'], config['SMTP_PASSWORD'],
+                    size=config['SMTP_POOL_SIZE'],
+                    idle_seconds=config['SMTP_POOL_IDLE_SECONDS'],
+                    timeout=config['SMTP_TIMEOUT'],
+                    use_tls=config['SMTP_USE_TLS'],
+                )
+                atexit.register(_pool.close)
+    return _pool
+
+
+def smtp_pool_stats():
+    """Counts for the service-status endpoint (empty until the first email is sent)"""
+    return _pool.stats() if _pool is not None else {}
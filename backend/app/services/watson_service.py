@@ -1,5 +1,11 @@
 # backend/app/services/watson_service.py file 
 
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from flask import current_app
 
@@ -7,31 +13,156 @@ from flask import current_app
 from ..utils.helpers import calculate_age_from_dob
 # The rule-based function is our fallback if the AI isn't available
 from ..utils.helpers import rule_based_eligibility_assessment
+from ..utils.single_flight import SingleFlight
+from ..utils.deadline import DeadlineExceeded
+from . import http_client
+from .circuit_breaker import get_watson_breaker
+from .decision_cache import get_cached_decision, store_decision
 
 
-def get_iam_token():
+# --- IAM Token Cache ---
+# IAM tokens are valid for about an hour, so one token is reused across requests
+# and refreshed in the background shortly before it expires.
+_token_cache = {'key': None, 'token': None, 'expires_at': 0.0}
+_token_lock = threading.Lock()
+_token_flight = SingleFlight()
+_refresh_running = False
+
+
+def get_iam_token(deadline=None):
     """
     Retrieves a temporary IAM access token from IBM Cloud using the API Key.
     This token is required to authenticate requests to the Watsonx agent.
+    The token is cached until shortly before it expires, and concurrent callers
+    share a single request to the IAM endpoint when a new one is needed.
+    With a Deadline, a token fetch only uses what is left of the request's budget.
     """
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    
     # Use current_app.config to get the API Key from our central config file
     api_key = current_app.config['API_KEY']
     iam_endpoint = current_app.config['IAM_ENDPOINT']
+    cache_key = (api_key, iam_endpoint)
+    
+    with _token_lock:
+        if _token_cache['key'] == cache_key:
+            token, expires_at = _token_cache['token'], _token_cache['expires_at']
+        else:
+            token, expires_at = None, 0.0
+    
+    now = time.time()
+    if token and now < expires_at - current_app.config['IAM_TOKEN_EXPIRY_MARGIN']:
+        if now >= expires_at - current_app.config['IAM_TOKEN_REFRESH_WINDOW']:
+            _start_background_refresh(api_key, iam_endpoint)
+        return token
     
+    # No usable token: fetch one now, sharing the request with anyone else waiting
+    return _token_flight.do(cache_key, _fetch_iam_token, api_key, iam_endpoint, deadline)
+
+
+def _fetch_iam_token(api_key, iam_endpoint, deadline=None):
+    """Request a new token from IAM and store it in the cache"""
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
     data = f"grant_type=urn:ibm:params:oauth:grant-type:apikey&apikey={api_key}"
     
     try:
-        response = requests.post(iam_endpoint, headers=headers, data=data)
+        response = http_client.post(iam_endpoint, headers=headers, data=data, deadline=deadline)
         response.raise_for_status()  # Raise an exception for bad status codes
-        return response.json().get("access_token")
-    except requests.exceptions.RequestException as e:
+        token_json = response.json()
+        token = token_json.get("access_token")
+        if token:
+            # IAM returns both 'expiration' (epoch seconds) and 'expires_in' (seconds from now)
+            expires_at = token_json.get("expiration") or time.time() + token_json.get("expires_in", 3600)
+            with _token_lock:
+                _token_cache.update({'key': (api_key, iam_endpoint), 'token': token, 'expires_at': float(expires_at)})
+        return token
+    except (requests.exceptions.RequestException, DeadlineExceeded) as e:
         print(f"Error getting IAM token: {e}")
         return None
 
-def parse_watson_eligibility_response(watson_response):
-    """Parse Watson AI response into structured format"""
+
+def _start_background_refresh(api_key, iam_endpoint):
+    """Refresh the cached token in a background thread, at most one refresh at a time"""
+    global _refresh_running
+    with _token_lock:
+        if _refresh_running:
+            return
+        _refresh_running = True
+    
+    app = current_app._get_current_object()
+    
+    def refresh():
+        global _refresh_running
+        try:
+            with app.app_context():
+                _token_flight.do((api_key, iam_endpoint), _fetch_iam_token, api_key, iam_endpoint)
+        finally:
+            with _token_lock:
+                _refresh_running = False
+    
+    threading.Thread(target=refresh, daemon=True).start()
+
+def mock_chat_response(user_query):
+    """Demo reply used by /ask when IBM Watson is not configured"""
+    return f"Thank you for your message: '{user_query}'. This is a demo response as IBM Watson is not configured."
+
+def parse_agent_reply(response_json, default=None):
+    """Pull the reply text out of a chat-completions style agent response"""
+    choices = response_json.get("choices", [])
+    if choices:
+        return choices[0].get("message", {}).get("content", default)
+    return default
+
+def parse_agent_stream_line(line):
+    """
+    Reply text carried by one line of a streamed agent response: server-sent
+    events in the chat-completions shape ('data: {...}' lines with
+    choices[0].delta.content). '' for lines without text, None at the end of the stream.
+    """
+    if not line or not line.startswith('data:'):
+        return ''
+    data = line[len('data:'):].strip()
+    if data == '[DONE]':
+        return None
+    try:
+        event = json.loads(data)
+    except ValueError:
+        return ''
+    choices = event.get("choices", [])
+    if choices:
+        delta = choices[0].get("delta") or choices[0].get("message") or {}
+        return delta.get("content") or ''
+    return ''
+
+def iter_agent_stream(agent_response):
+    """
+    Yield reply text chunks from a streamed agent response (see
+    parse_agent_stream_line), falling back to a single chunk when the endpoint
+    answered with a plain JSON completion instead.
+    """
+    try:
+        content_type = agent_response.headers.get('Content-Type', '')
+        if 'text/event-stream' not in content_type:
+            yield parse_agent_reply(agent_response.json(), "")
+            return
+        
+        for line in agent_response.iter_lines(decode_unicode=True):
+            chunk = parse_agent_stream_line(line)
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+    finally:
+        # Return the connection to the pool even if the browser disconnects mid-stream
+        agent_response.close()
+
+def parse_watson_eligibility_response(watson_response, applicant_count=None):
+    """
+    Parse Watson AI response into structured format.
+    With 'applicant_count' the response is a batched reply (see
+    build_batch_eligibility_prompt): a list with one result per applicant is
+    returned, or None if any applicant's block is missing.
+    """
+    if applicant_count is not None:
+        return _parse_batch_eligibility_response(watson_response, applicant_count)
     try:
         lines = watson_response.strip().split('\n')
         eligibility_data = {
@@ -61,14 +192,29 @@ def parse_watson_eligibility_response(watson_response):
             'recommendations': 'Please submit required documents'
         }
 
-def assess_loan_eligibility_with_watson(loan_data):
-    """Use Watson AI to assess loan eligibility based on comprehensive data"""
-    try:
-        # Prepare eligibility assessment prompt for Watson AI
-        eligibility_prompt = f"""
-        As a banking loan officer AI, assess the loan eligibility for the following applicant and provide detailed analysis:
+def _parse_batch_eligibility_response(watson_response, applicant_count):
+    """Split a batched reply on its 'APPLICANT n' headings and parse each block"""
+    sections = {}
+    current = None
+    for line in watson_response.split('\n'):
+        # Models decorate headings differently: "APPLICANT 2", "**Applicant 2:**", "### APPLICANT 2 ###"
+        heading = BATCH_HEADING_PATTERN.match(line)
+        if heading:
+            current = int(heading.group(1))
+            sections[current] = []
+        elif current is not None:
+            sections[current].append(line.strip().lstrip('*- ').replace('**', ''))
+    
+    results = []
+    for number in range(1, applicant_count + 1):
+        block = sections.get(number)
+        if not block or not any(line.startswith('ELIGIBILITY:') for line in block):
+            return None
+        results.append(parse_watson_eligibility_response('\n'.join(block)))
+    return results
 
-        APPLICANT DETAILS:
+def _applicant_details(loan_data):
+    return f"""APPLICANT DETAILS:
         - Full Name: {loan_data.get('full-name', 'N/A')}
         - Age: {calculate_age_from_dob(loan_data.get('date-of-birth', ''))} years
         - Gender: {loan_data.get('gender', 'N/A')}
@@ -85,7 +231,14 @@ def assess_loan_eligibility_with_watson(loan_data):
         - Loan Amount: ₹{loan_data.get('loan-amount', 'N/A')}
         - Loan Tenure: {loan_data.get('loan-tenure', 'N/A')} years
         - Purpose: {loan_data.get('loan-purpose', 'N/A')}
-        - Preferred EMI: ₹{loan_data.get('preferred-emi', 'N/A')}
+        - Preferred EMI: ₹{loan_data.get('preferred-emi', 'N/A')}"""
+
+def build_eligibility_prompt(loan_data):
+    """Eligibility assessment prompt for one applicant"""
+    return f"""
+        As a banking loan officer AI, assess the loan eligibility for the following applicant and provide detailed analysis:
+
+        {_applicant_details(loan_data)}
 
         Please provide:
         1. ELIGIBILITY STATUS: APPROVED/CONDITIONALLY_APPROVED/REJECTED
@@ -99,41 +252,231 @@ def assess_loan_eligibility_with_watson(loan_data):
         DOCUMENTS: [comma-separated list]
         RECOMMENDATIONS: [specific advice]
         """
-        
+
+def build_batch_eligibility_prompt(applicants):
+    """One prompt assessing several applicants, sharing the instructions between them"""
+    blocks = '\n\n'.join(
+        f"        APPLICANT {number}\n        {_applicant_details(loan_data)}"
+        for number, loan_data in enumerate(applicants, start=1)
+    )
+    return f"""
+        As a banking loan officer AI, assess the loan eligibility of each of the following {len(applicants)} applicants.
+        Assess every applicant independently; do not compare them with each other.
+
+{blocks}
+
+        For each applicant provide:
+        1. ELIGIBILITY STATUS: APPROVED/CONDITIONALLY_APPROVED/REJECTED
+        2. DETAILED REASON: Explain the decision factors
+        3. REQUIRED DOCUMENTS: List specific documents needed if eligible
+        4. RECOMMENDATIONS: Suggest improvements if rejected or conditions if conditional
+
+        Format your response as one block per applicant, in the same order, each starting with its heading:
+        APPLICANT [number]
+        ELIGIBILITY: [status]
+        REASON: [detailed explanation]
+        DOCUMENTS: [comma-separated list]
+        RECOMMENDATIONS: [specific advice]
+        """
+
+def _call_agent(prompt):
+    """Send one prompt to the agent and return the reply text. Raises on any failure."""
+    access_token = get_iam_token()
+    if not access_token:
+        raise RuntimeError("no IAM token")
+    
+    agent_headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {access_token}"
+    }
+    
+    payload = {
+        "messages": [
+            {"role": "user", "content": prompt}
+        ]
+    }
+
+    agent_response = http_client.post(current_app.config['AGENT_ENDPOINT'], headers=agent_headers, json=payload)
+    agent_response.raise_for_status()
+    watson_response = parse_agent_reply(agent_response.json())
+    if not watson_response:
+        raise ValueError("empty agent response")
+    return watson_response
+
+def assess_loan_eligibility_with_watson(loan_data):
+    """Use Watson AI to assess loan eligibility based on comprehensive data"""
+    try:
         # Check if IBM credentials are configured in our central config
         if current_app.config['API_KEY'] and current_app.config['AGENT_ENDPOINT']:
-            access_token = get_iam_token()
-            if access_token:
-                agent_headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {access_token}"
-                }
-                
-                payload = {
-                    "messages": [
-                        {"role": "user", "content": eligibility_prompt}
-                    ]
-                }
-
-                try:
-                    agent_response = requests.post(current_app.config['AGENT_ENDPOINT'], headers=agent_headers, json=payload)
-                    agent_response.raise_for_status()
-                    response_json = agent_response.json()
-                    
-                    choices = response_json.get("choices", [])
-                    if choices:
-                        message = choices[0].get("message", {})
-                        watson_response = message.get("content", "")
-                        return parse_watson_eligibility_response(watson_response)
-                
-                except Exception as e:
-                    print(f"Watson AI request failed: {e}")
-                    # Fall back to rule-based assessment
-                    return rule_based_eligibility_assessment(loan_data)
+            # An identical applicant profile was already assessed by Watson under the current rule set
+            cached = get_cached_decision(loan_data)
+            if cached is not None:
+                cached['engine'] = 'watson_cached'
+                return cached
+            
+            if current_app.config['ELIGIBILITY_BATCH_ENABLED']:
+                # Wait for a shared multi-applicant call (falls back to a single call if it can't be parsed)
+                return _get_batcher().assess(loan_data)
+            return _assess_single_with_watson(loan_data)
         
         # Fallback to rule-based assessment when Watson is not available or configured
-        return rule_based_eligibility_assessment(loan_data)
+        return _rule_based_assessment(loan_data)
         
     except Exception as e:
         print(f"Eligibility assessment error: {e}")
-        return rule_based_eligibility_assessment(loan_data)
\ No newline at end of file
+        return _rule_based_assessment(loan_data)
+
+def _assess_single_with_watson(loan_data):
+    """One Watson call for one applicant, behind the circuit breaker"""
+    breaker = get_watson_breaker()
+    # While Watson is failing or slow, go straight to the rule engine instead of waiting on it
+    if not breaker.allow_request():
+        return _rule_based_assessment(loan_data)
+    
+    started = time.monotonic()
+    try:
+        watson_response = _call_agent(build_eligibility_prompt(loan_data))
+    except Exception as e:
+        breaker.record_failure(time.monotonic() - started)
+        print(f"Watson AI request failed: {e}")
+        # Fall back to rule-based assessment
+        return _rule_based_assessment(loan_data)
+    
+    breaker.record_success(time.monotonic() - started)
+    result = parse_watson_eligibility_response(watson_response)
+    store_decision(loan_data, result)
+    result['engine'] = 'watson'
+    return result
+
+def _rule_based_assessment(loan_data):
+    """Rule engine decision, tagged with the engine that produced it"""
+    result = rule_based_eligibility_assessment(loan_data)
+    result['engine'] = 'rules'
+    return result
+
+
+# --- Batched eligibility assessment ---
+# During batch intake many applications arrive within minutes, and each one
+# would be its own Watson call repeating the same long instructions. With
+# ELIGIBILITY_BATCH_ENABLED, assessments wait up to ELIGIBILITY_BATCH_MAX_WAIT_MS
+# for others to join (at most ELIGIBILITY_BATCH_MAX_SIZE), and one prompt covers
+# them all. If the reply can't be split per applicant, each one is assessed
+# with its own call instead.
+
+BATCH_HEADING_PATTERN = re.compile(r'^[\s#*=]*APPLICANT\s+(\d+)\b[\s:#*=]*$', re.IGNORECASE)
+
+
+class _PendingAssessment:
+    def __init__(self, loan_data):
+        self.loan_data = loan_data
+        self.done = threading.Event()
+        self.result = None
+
+
+class EligibilityBatcher:
+    """Collects concurrent assessments and sends them to Watson in one prompt"""
+
+    def __init__(self, app, max_size, max_wait, workers):
+        self.app = app
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.stats = {'batches': 0, 'applicants': 0, 'parse_fallbacks': 0}
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='eligibility-batch')
+        threading.Thread(target=self._collect_loop, daemon=True).start()
+
+    def assess(self, loan_data):
+        """Queue one applicant and wait for its result"""
+        pending = _PendingAssessment(loan_data)
+        self._queue.put(pending)
+        pending.done.wait()
+        return pending.result
+
+    def _collect_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            closes_at = time.monotonic() + self.max_wait
+            while len(batch) < self.max_size:
+                remaining = closes_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        try:
+            with self.app.app_context():
+                results = self._assess_batch([pending.loan_data for pending in batch])
+        except Exception as e:
+            print(f"Batched eligibility assessment error: {e}")
+            results = [None] * len(batch)
+        for pending, result in zip(batch, results):
+            pending.result = result or _rule_based_assessment(pending.loan_data)
+            pending.done.set()
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _assess_batch(self, applicants):
+        if len(applicants) == 1:
+            return [_assess_single_with_watson(applicants[0])]
+        
+        breaker = get_watson_breaker()
+        if not breaker.allow_request():
+            return [_rule_based_assessment(loan_data) for loan_data in applicants]
+        
+        self._count(batches=1, applicants=len(applicants))
+        started = time.monotonic()
+        try:
+            watson_response = _call_agent(build_batch_eligibility_prompt(applicants))
+        except Exception as e:
+            breaker.record_failure(time.monotonic() - started)
+            print(f"Watson AI batch request failed: {e}")
+            return [_rule_based_assessment(loan_data) for loan_data in applicants]
+        breaker.record_success(time.monotonic() - started)
+        
+        results = parse_watson_eligibility_response(watson_response, applicant_count=len(applicants))
+        if results is None:
+            self._count(parse_fallbacks=1)
+            print(f"Could not split batched Watson reply for {len(applicants)} applicants; assessing them one by one")
+            return [_assess_single_with_watson(loan_data) for loan_data in applicants]
+        
+        for loan_data, result in zip(applicants, results):
+            store_decision(loan_data, result)
+            result['engine'] = 'watson'
+        return results
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def _get_batcher():
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                config = current_app.config
+                _batcher = EligibilityBatcher(
+                    current_app._get_current_object(),
+                    config['ELIGIBILITY_BATCH_MAX_SIZE'],
+                    config['ELIGIBILITY_BATCH_MAX_WAIT_MS'] / 1000.0,
+                    config['ASSESSMENT_WORKERS'],
+                )
+    return _batcher
+
+
+def eligibility_batch_stats():
+    """Batching counters for /service-status (None until batching has been used)"""
+    if _batcher is None:
+        return None
+    with _batcher._stats_lock:
+        stats = dict(_batcher.stats)
+    stats['average_batch_size'] = round(stats['applicants'] / stats['batches'], 2) if stats['batches'] else 0.0
+    return stats
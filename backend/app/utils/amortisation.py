@@ -0,0 +1,153 @@
+# backend/app/utils/amortisation.py file
+from functools import lru_cache
+
+import numpy as np
+
+
+# --- EMI and amortisation schedules ---
+# Reducing-balance EMIs: a fixed monthly instalment that pays the interest on
+# the outstanding balance and repays the rest. Rates are annual percentages
+# (10.5 means 10.5% a year) and tenures are whole months. The batch functions
+# take arrays (or scalars) and broadcast them, so many loans and rates are
+# computed in one call. The rule engine uses emi_to_income for its
+# affordability check.
+
+# Longest tenure an application can ask for; anything longer is treated as unreadable
+MAX_TENURE_YEARS = 40
+MAX_TENURE_MONTHS = MAX_TENURE_YEARS * 12
+
+# Distinct (amount, rate, tenure) quotes kept by emi_quote (three numbers each)
+EMI_QUOTE_CACHE_SIZE = 4096
+
+
+def payment_factor(annual_rate, months):
+    """EMI per rupee borrowed"""
+    rate = annual_rate / 1200
+    if rate == 0:
+        return 1 / months
+    growth = (1 + rate) ** months
+    return rate * growth / (growth - 1)
+
+
+def emi(principal, annual_rate, months):
+    """Monthly instalment for a loan of 'principal' at 'annual_rate' percent over 'months'"""
+    return principal * payment_factor(annual_rate, months)
+
+
+def tenure_months(years):
+    """Months for a tenure in years as entered on the application form, or None if unreadable or out of range"""
+    try:
+        years = float(years)
+    except (TypeError, ValueError):
+        return None
+    if not 0 < years <= MAX_TENURE_YEARS:
+        return None
+    return round(years * 12) or None
+
+
+def emi_to_income(loan_amount, annual_income, annual_rate, months):
+    """EMI as a share of monthly income, or None without a positive income and a known tenure"""
+    if not months or not annual_income > 0:
+        return None
+    return loan_amount * payment_factor(annual_rate, months) / (annual_income / 12)
+
+
+def amortisation_schedule(principal, annual_rate, months):
+    """
+    Month-by-month repayment of one loan as a list of dicts with 'month', 'emi',
+    'interest', 'principal' and 'balance'. The last instalment is adjusted so the
+    balance ends at exactly zero.
+    """
+    payment = emi(principal, annual_rate, months)
+    rate = annual_rate / 1200
+    balance = principal
+    schedule = []
+    for month in range(1, months + 1):
+        interest = balance * rate
+        repaid = balance if month == months else payment - interest
+        balance -= repaid
+        schedule.append({
+            'month': month,
+            'emi': interest + repaid,
+            'interest': interest,
+            'principal': repaid,
+            'balance': balance,
+        })
+    return schedule
+
+
+def emi_batch(principals, annual_rates, months):
+    """EMIs for many loans at once; the arguments broadcast against each other like NumPy arrays"""
+    principals, rates, months = np.broadcast_arrays(
+        np.asarray(principals, dtype=np.float64),
+        np.asarray(annual_rates, dtype=np.float64) / 1200,
+        np.asarray(months, dtype=np.float64),
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.power(1 + rates, months)
+        factor = np.where(rates == 0, 1 / months, rates * growth / (growth - 1))
+    return principals * factor
+
+
+def amortisation_schedules(principals, annual_rates, months):
+    """
+    Schedules for many loans at once: a dict of 'emi' (one per loan) and
+    'interest', 'principal' and 'balance' arrays of shape (loans, longest tenure),
+    zero after each loan's last month. Uses the closed form for the balance after
+    k instalments, so no loan is stepped through month by month.
+    """
+    principals, annual_rates, months = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(principals, dtype=np.float64)),
+        np.atleast_1d(np.asarray(annual_rates, dtype=np.float64)),
+        np.atleast_1d(np.asarray(months, dtype=np.int64)),
+    )
+    payments = emi_batch(principals, annual_rates, months)
+    elapsed = np.arange(int(months.max(initial=0)) + 1)  # instalments paid, 0..longest tenure
+    rates = annual_rates[:, None] / 1200
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.power(1 + rates, elapsed)
+        balance = np.where(
+            rates == 0,
+            principals[:, None] - payments[:, None] * elapsed,
+            principals[:, None] * growth - payments[:, None] * (growth - 1) / rates,
+        )
+    balance[elapsed >= months[:, None]] = 0.0
+    interest = balance[:, :-1] * rates
+    repaid = balance[:, :-1] - balance[:, 1:]
+    within = elapsed[1:] <= months[:, None]
+    return {
+        'emi': payments,
+        'interest': np.where(within, interest, 0.0),
+        'principal': np.where(within, repaid, 0.0),
+        'balance': balance[:, 1:],
+    }
+
+
+@lru_cache(maxsize=EMI_QUOTE_CACHE_SIZE)
+def emi_quote(principal, annual_rate, months):
+    """
+    (emi, total_payment, total_interest) for one (amount, rate, tenure), rounded
+    to paise. Memoised: the calculator is asked about the same few combinations
+    over and over. Only these three numbers are kept, so a full cache stays
+    small however long the tenures; see emi_schedule for the schedule itself.
+    """
+    total_interest = sum(row['interest'] for row in amortisation_schedule(principal, annual_rate, months))
+    return (
+        round(emi(principal, annual_rate, months), 2),
+        round(principal + total_interest, 2),
+        round(total_interest, 2),
+    )
+
+
+def emi_schedule(principal, annual_rate, months):
+    """Month-by-month repayment for one quote, rounded to paise. Not memoised; built only when asked for."""
+    return [
+        {key: value if key == 'month' else round(value, 2) for key, value in row.items()}
+        for row in amortisation_schedule(principal, annual_rate, months)
+    ]
+
+
+def emi_quote_stats():
+    """Hit/miss counts of the EMI quote cache, for the service-status endpoint"""
+    info = emi_quote.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
@@ -14,12 +14,41 @@
 # backend/app/utils/csv_handler.py file
 import csv
 import os
+import shutil
+import threading
 import uuid
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask import current_app
+from .http_response import loan_applications_version
+from .single_flight import SingleFlight
+from .review_queue import review_queue, is_awaiting_review, is_resubmitted
 
 
+# Serialises whole-file rewrites of comprehensive_loans.csv with appends to it, so a
+# background assessment write-back can't drop an application saved at the same moment
+_comprehensive_csv_lock = threading.RLock()
+
+# Comprehensive form field for each comprehensive_loans.csv column
+COMPREHENSIVE_FORM_FIELDS = {
+    'full_name': 'full-name',
+    'date_of_birth': 'date-of-birth',
+    'gender': 'gender',
+    'marital_status': 'marital-status',
+    'nationality': 'nationality',
+    'contact_number': 'contact-number',
+    'employment_type': 'employment-type',
+    'employer_name': 'employer-name',
+    'annual_income': 'annual-income',
+    'existing_loans': 'existing-loans',
+    'loan_type': 'loan-type',
+    'loan_amount': 'loan-amount',
+    'loan_tenure': 'loan-tenure',
+    'loan_purpose': 'loan-purpose',
+    'preferred_emi': 'preferred-emi',
+    'cibil_score': 'cibil-score',
+}
+
 # --- CSV Helper Functions ---
 # In backend/app/utils/csv_handler.py
 
@@ -68,8 +97,13 @@ def initialize_csv_files(config):
                 'loan_amount', 'loan_tenure', 'loan_purpose', 'preferred_emi', 
                 'cibil_score', 'status', 'eligibility_status', 'eligibility_reason',
                 'required_documents', 'uploaded_documents', 'admin_notes', 
-                'verification_status', 'created_at', 'updated_at'
+                'verification_status', 'created_at', 'updated_at', 'assessment_engine',
+                'rule_set_version'
             ])
+    else:
+        # 'assessment_engine' records whether Watson or the rule engine made the eligibility decision,
+        # and 'rule_set_version' which version of the rule file the rule engine applied
+        ensure_csv_columns(config['COMPREHENSIVE_LOANS_CSV'], ['assessment_engine', 'rule_set_version'])
     
     # Initialize document_uploads.csv
     # --- Corrected the path creation logic below ---
@@ -97,7 +131,24 @@ def initialize_csv_files(config):
     if not os.path.exists(config['CHAT_LOGS_CSV']): # <-- Corrected syntax here
         with open(config['CHAT_LOGS_CSV'], 'w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
-            writer.writerow(['id', 'user_message', 'bot_response', 'timestamp', 'session_id'])
+            writer.writerow(['id', 'user_message', 'bot_response', 'timestamp', 'session_id', 'cached', 'follow_up'])
+    else:
+        ensure_csv_columns(config['CHAT_LOGS_CSV'], ['cached', 'follow_up'])
+
+def ensure_csv_columns(csv_path, columns):
+    """Add any missing columns (with empty values) to an existing CSV file"""
+    with open(csv_path, 'r', newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        fieldnames = reader.fieldnames or []
+        missing = [column for column in columns if column not in fieldnames]
+        if not missing:
+            return
+        rows = list(reader)
+    
+    with open(csv_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames + missing, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
             
 def verify_staff_credentials(username, password):
     """Verify staff login credentials"""
@@ -118,6 +169,7 @@ def save_loan_application(loan_data):
     """Save loan application to CSV"""
     try:
         application_id = str(uuid.uuid4())[:8].upper()
+        created_at = datetime.now().isoformat()
         
         with open(current_app.config['LOAN_APPLICATIONS_CSV'], 'a', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
@@ -133,16 +185,142 @@ def save_loan_application(loan_data):
                 loan_data.get('employmentStatus', ''),
                 loan_data.get('purpose', ''),
                 'pending',
-                datetime.now().isoformat()
+                created_at
             ])
         
+        review_queue.update({
+            'application_id': application_id,
+            'email': loan_data.get('email', ''),
+            'loan_type': loan_data.get('loanType', ''),
+            'loan_amount': loan_data.get('loanAmount', ''),
+            'status': 'pending',
+            'created_at': created_at
+        })
+        
         return {'success': True, 'application_id': application_id}
     except Exception as e:
         print(f"Error saving loan application: {e}")
         return {'success': False, 'error': str(e)}
 
-def save_chat_log(user_message, bot_response, session_id=None):
-    """Save chat interaction to CSV"""
+def save_comprehensive_application(loan_data, eligibility_status='PENDING_ASSESSMENT'):
+    """
+    Append a comprehensive loan application to CSV before it has been assessed.
+    The eligibility fields are filled in later by save_eligibility_assessment.
+    """
+    try:
+        application_id = str(uuid.uuid4())[:8].upper()
+        created_at = datetime.now().isoformat()
+        row = {column: loan_data.get(field, '') for column, field in COMPREHENSIVE_FORM_FIELDS.items()}
+        row.update({
+            'application_id': application_id,
+            'user_email': loan_data.get('userEmail', ''),
+            'status': 'pending',
+            'eligibility_status': eligibility_status,
+            'verification_status': 'pending',
+            'created_at': created_at,
+            'updated_at': created_at,
+        })
+        
+        with _comprehensive_csv_lock:
+            with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+                fieldnames = next(csv.reader(file))
+            with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'a', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=fieldnames, restval='', extrasaction='ignore')
+                writer.writerow(row)
+        
+        review_queue.update(row)
+        return {'success': True, 'application_id': application_id}
+    except Exception as e:
+        print(f"Error saving comprehensive loan application: {e}")
+        return {'success': False, 'error': str(e)}
+
+def save_eligibility_assessment(app_id, assessment):
+    """
+    Write an eligibility assessment (as returned by assess_loan_eligibility_with_watson)
+    back to a comprehensive application. Returns the updated row, or None if not found.
+    """
+    return save_eligibility_assessments({app_id: assessment}).get(app_id)
+
+def save_eligibility_assessments(assessments, keep_resubmitted=False):
+    """
+    Write several eligibility assessments ({application_id: assessment}) in one
+    rewrite of comprehensive_loans.csv. Applications a staff member has decided
+    in the meantime are left alone, and with 'keep_resubmitted' so are those the
+    applicant has resubmitted. Returns {application_id: updated_row} for the
+    applications that were updated.
+    """
+    updated_rows = {}
+    timestamp = datetime.now().isoformat()
+    with _comprehensive_csv_lock:
+        try:
+            rows = []
+            with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                fieldnames = reader.fieldnames
+                for row in reader:
+                    assessment = assessments.get(row.get('application_id'))
+                    if (assessment is not None and is_awaiting_review(row)
+                            and not (keep_resubmitted and is_resubmitted(row))):
+                        row['eligibility_status'] = assessment.get('status', 'PENDING_REVIEW')
+                        row['eligibility_reason'] = assessment.get('reason', '')
+                        row['required_documents'] = assessment.get('documents', '')
+                        row['assessment_engine'] = assessment.get('engine', '')
+                        row['rule_set_version'] = assessment.get('rule_set_version', '')
+                        row['updated_at'] = timestamp
+                        updated_rows[row['application_id']] = row
+                    rows.append(row)
+            
+            if updated_rows:
+                with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'w', newline='', encoding='utf-8') as file:
+                    writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+                    writer.writeheader()
+                    writer.writerows(rows)
+        except FileNotFoundError:
+            return {}
+    
+    for row in updated_rows.values():
+        review_queue.update(row)
+    return updated_rows
+
+def iter_comprehensive_applications(csv_path=None):
+    """Yield comprehensive application rows one at a time, in file order"""
+    try:
+        with open(csv_path or current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+            yield from csv.DictReader(file)
+    except FileNotFoundError:
+        return
+
+def snapshot_comprehensive_applications(dest_path):
+    """
+    Copy comprehensive_loans.csv to dest_path. Long jobs stream from the copy,
+    since the live file is rewritten in place by status and assessment updates.
+    """
+    with _comprehensive_csv_lock:
+        shutil.copyfile(current_app.config['COMPREHENSIVE_LOANS_CSV'], dest_path)
+
+def comprehensive_row_to_loan_data(row):
+    """Rebuild the comprehensive form data (hyphenated keys) from a stored row, for re-assessment"""
+    loan_data = {field: row.get(column, '') for column, field in COMPREHENSIVE_FORM_FIELDS.items()}
+    loan_data['userEmail'] = row.get('user_email', '')
+    return loan_data
+
+def get_comprehensive_application(app_id):
+    """Return one comprehensive application row, or None"""
+    try:
+        with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                if row.get('application_id') == app_id:
+                    return row
+    except FileNotFoundError:
+        pass
+    return None
+
+def save_chat_log(user_message, bot_response, session_id=None, cached=False, follow_up=False):
+    """
+    Save chat interaction to CSV. 'cached' marks replies served from the chat
+    response cache, 'follow_up' questions asked with earlier turns of the session
+    sent along.
+    """
     try:
         chat_id = str(uuid.uuid4())
         session_id = session_id or str(uuid.uuid4())
@@ -154,53 +332,75 @@ def save_chat_log(user_message, bot_response, session_id=None):
                 user_message,
                 bot_response,
                 datetime.now().isoformat(),
-                session_id
+                session_id,
+                'true' if cached else 'false',
+                'true' if follow_up else 'false'
             ])
     except Exception as e:
         print(f"Error saving chat log: {e}")
 
+def iter_loan_applications():
+    """
+    Yield loan applications one row at a time from both old and new CSV files.
+    Rows come out in file order (basic first, then comprehensive) and are never
+    held in memory together, so callers can stream very large books.
+    """
+    # Read old format loan applications
+    try:
+        with open(current_app.config['LOAN_APPLICATIONS_CSV'], 'r', newline='', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                # Add source indicator
+                row['source'] = 'basic'
+                yield row
+    except FileNotFoundError:
+        pass
+    
+    # Read comprehensive loan applications (new format)
+    try:
+        with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            for row in reader:
+                # Add source indicator and normalize field names for compatibility
+                row['source'] = 'comprehensive'
+                # Map comprehensive fields to admin dashboard expected fields
+                if 'full_name' in row and row['full_name']:
+                    # Split full name if available
+                    name_parts = row['full_name'].split(' ', 1)
+                    row['first_name'] = name_parts[0] if len(name_parts) > 0 else ''
+                    row['last_name'] = name_parts[1] if len(name_parts) > 1 else ''
+                else:
+                    row['first_name'] = row.get('first_name', '')
+                    row['last_name'] = row.get('last_name', '')
+                
+                # Map email field
+                row['email'] = row.get('user_email', row.get('email', ''))
+                
+                # Ensure other required fields exist
+                row['phone'] = row.get('contact_number', row.get('phone', ''))
+                
+                yield row
+    except FileNotFoundError:
+        pass
+
+# Shares one read of the loans CSVs between concurrent admin requests
+_all_applications_flight = SingleFlight()
+
 def get_all_loan_applications():
-    """Retrieve all loan applications from both old and new CSV files"""
+    """
+    Retrieve all loan applications from both old and new CSV files.
+    Concurrent callers share a single read, and the result is reused for
+    ADMIN_READ_CACHE_TTL seconds until either CSV changes. The returned list is
+    shared between callers, so treat it as read-only.
+    """
+    return _all_applications_flight.do(
+        loan_applications_version(), _read_all_loan_applications,
+        ttl=current_app.config['ADMIN_READ_CACHE_TTL']
+    )
+
+def _read_all_loan_applications():
     try:
-        applications = []
-        
-        # Read old format loan applications
-        try:
-            with open(current_app.config['LOAN_APPLICATIONS_CSV'], 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Add source indicator
-                    row['source'] = 'basic'
-                    applications.append(row)
-        except FileNotFoundError:
-            pass
-        
-        # Read comprehensive loan applications (new format)
-        try:
-            with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    # Add source indicator and normalize field names for compatibility
-                    row['source'] = 'comprehensive'
-                    # Map comprehensive fields to admin dashboard expected fields
-                    if 'full_name' in row and row['full_name']:
-                        # Split full name if available
-                        name_parts = row['full_name'].split(' ', 1)
-                        row['first_name'] = name_parts[0] if len(name_parts) > 0 else ''
-                        row['last_name'] = name_parts[1] if len(name_parts) > 1 else ''
-                    else:
-                        row['first_name'] = row.get('first_name', '')
-                        row['last_name'] = row.get('last_name', '')
-                    
-                    # Map email field
-                    row['email'] = row.get('user_email', row.get('email', ''))
-                    
-                    # Ensure other required fields exist
-                    row['phone'] = row.get('contact_number', row.get('phone', ''))
-                    
-                    applications.append(row)
-        except FileNotFoundError:
-            pass
+        applications = list(iter_loan_applications())
         
         # Sort by creation date (newest first)
         applications.sort(key=lambda x: x.get('created_at', ''), reverse=True)
@@ -224,58 +424,58 @@ def get_chat_logs(limit=100):
 
 def update_application_status(app_id, new_status, admin_notes=''):
     """Update the status of a loan application"""
-    updated = False
-    
-    # Try updating in comprehensive loans CSV
-    try:
-        rows = []
-        with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                if row.get('application_id') == app_id:
-                    row['eligibility_status'] = new_status
-                    row['status'] = 'eligibility_assessed'
-                    if admin_notes:
-                        row['admin_notes'] = admin_notes
-                    row['updated_at'] = datetime.now().isoformat()
-                    updated = True
-                rows.append(row)
-        
-        if updated:
-            with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
-            return True
-    except FileNotFoundError:
-        pass
-    
-    # Try updating in basic loan applications CSV
-    try:
-        rows = []
-        with open(current_app.config['LOAN_APPLICATIONS_CSV'], 'r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            fieldnames = reader.fieldnames
-            for row in reader:
-                if row.get('application_id') == app_id:
-                    row['status'] = new_status.lower()
-                    if admin_notes:
-                        row['admin_notes'] = admin_notes
-                    row['updated_at'] = datetime.now().isoformat()
-                    updated = True
-                rows.append(row)
-        
-        if updated:
-            with open(current_app.config['LOAN_APPLICATIONS_CSV'], 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
-            return True
-    except FileNotFoundError:
-        pass
-    
-    return False
+    return app_id in update_applications_status([app_id], new_status, admin_notes)
+
+def update_applications_status(app_ids, new_status, admin_notes=''):
+    """
+    Update the status of several loan applications in one pass.
+    Each loans CSV is read and rewritten at most once, however many IDs are given.
+    Returns a dict of {application_id: updated_row} for the applications that were found.
+    """
+    pending_ids = set(app_ids)
+    updated_rows = {}
+    timestamp = datetime.now().isoformat()
+
+    # Comprehensive loans take precedence, matching the single-update lookup order
+    with _comprehensive_csv_lock:
+        for csv_key in ('COMPREHENSIVE_LOANS_CSV', 'LOAN_APPLICATIONS_CSV'):
+            if not pending_ids:
+                break
+            try:
+                rows = []
+                file_updated = False
+                with open(current_app.config[csv_key], 'r', newline='', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    fieldnames = reader.fieldnames
+                    for row in reader:
+                        app_id = row.get('application_id')
+                        if app_id in pending_ids:
+                            if csv_key == 'COMPREHENSIVE_LOANS_CSV':
+                                row['eligibility_status'] = new_status
+                                row['status'] = 'eligibility_assessed'
+                            else:
+                                row['status'] = new_status.lower()
+                            if admin_notes:
+                                row['admin_notes'] = admin_notes
+                            row['updated_at'] = timestamp
+                            updated_rows[app_id] = row
+                            file_updated = True
+                        rows.append(row)
+
+                if file_updated:
+                    pending_ids -= set(updated_rows)
+                    with open(current_app.config[csv_key], 'w', newline='', encoding='utf-8') as file:
+                        # extrasaction='ignore' keeps the basic CSV writable when notes are added
+                        writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+                        writer.writeheader()
+                        writer.writerows(rows)
+            except FileNotFoundError:
+                pass
+
+    for row in updated_rows.values():
+        review_queue.update(row)
+
+    return updated_rows
 
 def get_application_documents(app_id):
     """Get all documents for a specific application"""
@@ -307,6 +507,13 @@ def get_application_history(app_id):
 
 def add_application_history(app_id, user_email, action_type, action_by, action_reason=''):
     """Add an entry to application history"""
+    return add_application_history_entries([(app_id, user_email, action_type, action_by, action_reason)])
+
+def add_application_history_entries(entries):
+    """
+    Append several history entries in a single write.
+    Each entry is a tuple of (app_id, user_email, action_type, action_by, action_reason).
+    """
     try:
         HISTORY_CSV = os.path.join(current_app.config['CSV_DIR'], "application_history.csv")
         
@@ -316,12 +523,14 @@ def add_application_history(app_id, user_email, action_type, action_by, action_r
                 writer = csv.writer(file)
                 writer.writerow(['draft_id', 'application_id', 'user_email', 'status', 'action_type', 'action_by', 'action_reason', 'created_at', 'updated_at'])
         
-        # Add new history entry
+        # Add new history entries
         with open(HISTORY_CSV, 'a', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
             timestamp = datetime.now().isoformat()
-            draft_id = str(uuid.uuid4())[:8].upper()
-            writer.writerow([draft_id, app_id, user_email, 'processed', action_type, action_by, action_reason, timestamp, timestamp])
+            writer.writerows(
+                [str(uuid.uuid4())[:8].upper(), app_id, user_email, 'processed', action_type, action_by, action_reason, timestamp, timestamp]
+                for app_id, user_email, action_type, action_by, action_reason in entries
+            )
         
         return True
     except Exception as e:
@@ -359,6 +568,40 @@ def create_objection(app_id, user_email, reason, requested_docs, created_by):
         traceback.print_exc()
         return None
 
+def create_objections(applications, reason, requested_docs, created_by):
+    """
+    Create objections for several applications in one pass.
+    'applications' is a dict of {application_id: user_email}.
+    Returns a dict of {application_id: objection_id}.
+    """
+    try:
+        OBJECTIONS_CSV = os.path.join(current_app.config['CSV_DIR'], "objections.csv")
+        
+        # Create file with headers if it doesn't exist
+        if not os.path.exists(OBJECTIONS_CSV):
+            with open(OBJECTIONS_CSV, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(['objection_id', 'application_id', 'user_email', 'objection_reason', 'requested_documents', 'status', 'created_by', 'created_at', 'resolved_at'])
+        
+        objection_ids = {app_id: str(uuid.uuid4())[:8].upper() for app_id in applications}
+        timestamp = datetime.now().isoformat()
+        with open(OBJECTIONS_CSV, 'a', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerows(
+                [objection_ids[app_id], app_id, user_email, reason, requested_docs, 'pending', created_by, timestamp, '']
+                for app_id, user_email in applications.items()
+            )
+        
+        add_application_history_entries([
+            (app_id, user_email, 'OBJECTION RAISED', created_by, reason)
+            for app_id, user_email in applications.items()
+        ])
+        
+        return objection_ids
+    except Exception as e:
+        print(f"Error creating objections: {e}")
+        return {}
+
 def register_user(user_data):
     """Register a new user"""
     try:
@@ -593,25 +836,26 @@ def save_document_upload(application_id, user_email, document_type, file_name, f
 def update_uploaded_documents(application_id, uploaded_files):
     """Update the uploaded_documents field for an application"""
     try:
-        # Read all records
-        rows = []
-        with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            rows = list(reader)
+        with _comprehensive_csv_lock:
+            # Read all records
+            rows = []
+            with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'r', newline='', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                rows = list(reader)
         
-        # Update specific application
-        for row in rows:
-            if row['application_id'] == application_id:
-                row['uploaded_documents'] = ', '.join(uploaded_files)
-                row['updated_at'] = datetime.now().isoformat()
-                break
+            # Update specific application
+            for row in rows:
+                if row['application_id'] == application_id:
+                    row['uploaded_documents'] = ', '.join(uploaded_files)
+                    row['updated_at'] = datetime.now().isoformat()
+                    break
         
-        # Write back to file
-        with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'w', newline='', encoding='utf-8') as file:
-            if rows:
-                writer = csv.DictWriter(file, fieldnames=rows[0].keys())
-                writer.writeheader()
-                writer.writerows(rows)
+            # Write back to file
+            with open(current_app.config['COMPREHENSIVE_LOANS_CSV'], 'w', newline='', encoding='utf-8') as file:
+                if rows:
+                    writer = csv.DictWriter(file, fieldnames=rows[0].keys())
+                    writer.writeheader()
+                    writer.writerows(rows)
         return True
     except Exception as e:
         print(f"Error updating uploaded documents: {e}")
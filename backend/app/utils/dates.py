@@ -0,0 +1,93 @@
+# backend/app/utils/dates.py file
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+
+# --- Dates of birth ---
+# Application forms store dates of birth as 'YYYY-MM-DD'. Ages are needed for
+# every prompt, rule evaluation and decision cache key, so the usual
+# zero-padded form is read by slicing instead of datetime.strptime, ages are
+# memoised per (date of birth, today), and whole columns are converted to
+# day numbers once so ages can be computed with NumPy. Whatever strptime
+# accepts is still accepted, and whatever it rejects is still rejected.
+#
+# The conversion happens when applications are evaluated, not when they are
+# saved: the CSVs keep only the date string, so epoch_days parses each batch's
+# distinct dates of birth again (a few microseconds each, once per batch).
+
+# Distinct (date of birth, today) pairs kept by age_on
+AGE_CACHE_SIZE = 65536
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Day number of a date of birth that can't be read
+NO_DATE = np.iinfo(np.int64).min
+
+
+_today = (None, 0.0, 0.0)  # (local date, timestamps of its start and of the next day's start)
+
+
+def local_today():
+    """date.today(), reading the calendar date from the clock only when the day changes"""
+    global _today
+    today, starts, ends = _today
+    now = time.time()
+    if not starts <= now < ends:
+        today = date.today()
+        starts = datetime.combine(today, datetime.min.time()).timestamp()
+        ends = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        # Swapping the tuple is atomic, so threads never see a mismatched date and range
+        _today = (today, starts, ends)
+    return today
+
+
+def parse_iso_date(value):
+    """The date in a 'YYYY-MM-DD' string, or None where datetime.strptime(value, '%Y-%m-%d') would fail"""
+    if isinstance(value, str) and len(value) == 10 and value[4] == '-' and value[7] == '-' and value.isascii():
+        year, month, day = value[:4], value[5:7], value[8:]
+        if year.isdigit() and month.isdigit() and day.isdigit():
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                return None
+    # Unpadded months and days and other forms strptime allows
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=AGE_CACHE_SIZE)
+def age_on(dob_str, today):
+    """Age in whole years on 'today' (a date) for a 'YYYY-MM-DD' date of birth, or None if it can't be read"""
+    dob = parse_iso_date(dob_str)
+    if dob is None:
+        return None
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+def epoch_days(values):
+    """
+    Days since 1970-01-01 for a column of 'YYYY-MM-DD' dates of birth (NO_DATE
+    where one can't be read), and a mask of the ones that could. Each distinct
+    value is parsed once.
+    """
+    days_by_value = {}
+    for value in dict.fromkeys(values):
+        parsed = parse_iso_date(value) if value else None
+        days_by_value[value] = NO_DATE if parsed is None else parsed.toordinal() - EPOCH_ORDINAL
+    days = np.fromiter(map(days_by_value.__getitem__, values), dtype=np.int64, count=len(values))
+    return days, days != NO_DATE
+
+
+def ages_on(days, today):
+    """Ages in whole years on 'today' for an array of epoch_days; meaningless where the day is NO_DATE"""
+    dates = np.where(days == NO_DATE, 0, days).astype('datetime64[D]')
+    years = dates.astype('datetime64[Y]')
+    months = dates.astype('datetime64[M]')
+    birth_year = years.astype(np.int64) + 1970
+    birth_month = (months - years.astype('datetime64[M]')).astype(np.int64) + 1
+    birth_day = (dates - months.astype('datetime64[D]')).astype(np.int64) + 1
+    return today.year - birth_year - ((today.month * 100 + today.day) < (birth_month * 100 + birth_day))
@@ -0,0 +1,35 @@
+# backend/app/utils/deadline.py file
+import time
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before the work finished."""
+
+
+class Deadline:
+    """
+    A time budget for one request. It is created in the route and handed down to
+    every outbound call, which uses what is left of the budget as its timeout
+    instead of a fixed per-call value.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, connect_timeout=None):
+        """
+        (connect, read) timeout tuple for requests, capped by the remaining budget.
+        Raises DeadlineExceeded if nothing is left.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"deadline of {self.seconds}s exceeded")
+        connect = remaining if connect_timeout is None else min(connect_timeout, remaining)
+        return (connect, remaining)
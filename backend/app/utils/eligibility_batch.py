@@ -0,0 +1,225 @@
+# backend/app/utils/eligibility_batch.py file
+from datetime import datetime
+
+import numpy as np
+
+from .amortisation import MAX_TENURE_MONTHS, payment_factor, tenure_months
+from .dates import ages_on, epoch_days
+from .eligibility_rules import get_rule_set, STATUSES
+
+
+# --- Batch version of rule_based_eligibility_assessment ---
+# Evaluates whole columns of applicants at once for portfolio re-scoring and
+# what-if runs. Every applicant gets exactly the result the one-at-a-time
+# helpers.rule_based_eligibility_assessment would give under the same rule set:
+# values are parsed with the same Python conversions, and the checks are applied
+# with NumPy in the same order, later matches overriding earlier statuses.
+
+ERROR_RESULT = {
+    'status': 'PENDING_REVIEW',
+    'reason': 'Manual review required due to assessment error',
+    'documents': 'Identity Proof, Income Proof, Address Proof',
+    'recommendations': 'Please contact bank for manual assessment',
+}
+# Status codes index STATUSES; the extra code marks applicants the scalar code would fail on
+ERROR_STATUS = len(STATUSES)
+STATUS_NAMES = np.array(list(STATUSES) + [ERROR_RESULT['status']], dtype=object)
+
+# Scores this high already pass any CIBIL threshold; larger ones are clipped to fit int64
+CIBIL_CAP = 10 ** 9
+
+
+def _parse_column(values, parse, dtype, failed):
+    """Apply the scalar code's conversion to every value; values it would raise on are marked in 'failed'"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'iuf':
+        return values.astype(dtype)
+    try:
+        return np.fromiter(map(parse, values), dtype=dtype, count=len(values))
+    except Exception:
+        pass
+
+    def parse_or_none(value):
+        try:
+            return parse(value)
+        except Exception:
+            return None
+
+    parsed = list(map(parse_or_none, values))
+    unreadable = np.fromiter((value is None for value in parsed), dtype=bool, count=len(parsed))
+    failed |= unreadable
+    return np.fromiter((0 if value is None else value for value in parsed), dtype=dtype, count=len(parsed))
+
+
+def _parse_cibil(value):
+    return min(int(value), CIBIL_CAP) if value.isdigit() else 0
+
+
+def _codes_by_value(values, code_for, failed):
+    """Map each distinct value once with 'code_for' and spread the codes over the column"""
+    codes_by_value = {}
+    for value in dict.fromkeys(values):
+        try:
+            codes_by_value[value] = code_for(value)
+        except Exception:
+            codes_by_value[value] = -1
+    codes = np.fromiter(map(codes_by_value.__getitem__, values), dtype=np.int64, count=len(values))
+    unreadable = codes < 0
+    failed |= unreadable
+    codes[unreadable] = 0
+    return codes
+
+
+def _distinct_codes(values):
+    """(index of each value among the distinct values, the distinct values in first-seen order)"""
+    distinct = list(dict.fromkeys(values))
+    positions = {value: i for i, value in enumerate(distinct)}
+    return np.fromiter(map(positions.__getitem__, values), dtype=np.int64, count=len(values)), distinct
+
+
+def _joined_reasons(rule_set, reason_bits):
+    """Reason text for each distinct combination of matched checks (bit i = i-th check with a reason)"""
+    reasons = [reason for _, _, _, _, reason in rule_set.checks if reason]
+    unique_bits, positions = np.unique(reason_bits, return_inverse=True)
+    texts = np.array([
+        '; '.join(reason for i, reason in enumerate(reasons) if bits >> i & 1) or 'All eligibility criteria met'
+        for bits in unique_bits.tolist()
+    ], dtype=object)
+    return texts[positions.reshape(-1)]
+
+
+def prepare_applicants(annual_income, loan_amount, cibil_score, date_of_birth,
+                       loan_type, employment_type, loan_tenure=None, today=None):
+    """
+    Parse columns of raw form values once so they can be evaluated under several
+    rule sets (see evaluate_statuses). Each argument has one entry per applicant,
+    holding the same values as the form fields used by rule_based_eligibility_assessment
+    (strings such as '450000'). Numeric NumPy arrays may be passed for the income,
+    amount and CIBIL columns instead. Without a loan_tenure column no EMI can be
+    worked out. Ages are computed as of 'today' (default: now).
+    """
+    count = len(annual_income)
+    today = today or datetime.now()
+    failed = np.zeros(count, dtype=bool)
+
+    income = _parse_column(annual_income, float, np.float64, failed)
+    amount = _parse_column(loan_amount, float, np.float64, failed)
+    if isinstance(cibil_score, np.ndarray) and cibil_score.dtype.kind in 'iuf':
+        cibil = cibil_score.astype(np.int64)
+    else:
+        # Scores take few distinct values, so each one is parsed once
+        cibil = _codes_by_value(cibil_score, _parse_cibil, failed)
+    birth_days, known_age = epoch_days(date_of_birth)
+    # Anything but strings would make the scalar code fail when it picks the rate and documents
+    loan_type_codes, loan_types = _distinct_codes(loan_type)
+    if not all(isinstance(value, str) for value in loan_types):
+        failed |= np.isin(loan_type_codes, [i for i, value in enumerate(loan_types) if not isinstance(value, str)])
+    if not all(isinstance(value, str) for value in dict.fromkeys(employment_type)):
+        failed |= np.fromiter((not isinstance(value, str) for value in employment_type), dtype=bool, count=count)
+    # Tenure in months, 0 where it can't be read
+    if loan_tenure is None:
+        months = np.zeros(count, dtype=np.int64)
+    else:
+        months = _codes_by_value(loan_tenure, lambda years: tenure_months(years) or 0, failed)
+
+    # Each field with the mask of applicants it applies to (None: all of them)
+    age = ages_on(birth_days, today)
+    positive_income = income > 0
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        loan_to_income = amount / np.where(positive_income, income, 1.0)
+    return {
+        'count': count,
+        'failed': failed,
+        'loan_types': (loan_type_codes, loan_types),
+        'months': months,
+        'fields': {
+            'age': (age, known_age),
+            'annual_income': (income, None),
+            'loan_amount': (amount, None),
+            'loan_to_income': (loan_to_income, positive_income),
+            'cibil_score': (cibil, None),
+        },
+    }
+
+
+def _emi_to_income(applicants, rule_set):
+    """The 'emi_to_income' field under this rule set's interest rates, and the applicants it applies to"""
+    fields = applicants['fields']
+    amount, income = fields['loan_amount'][0], fields['annual_income'][0]
+    positive_income = fields['loan_to_income'][1]
+    loan_type_codes, loan_types = applicants['loan_types']
+    months = applicants['months']
+    # One payment factor per distinct (loan type, tenure), worked out like the scalar code
+    rates = [rule_set.interest_rate(value) if isinstance(value, str) else 0 for value in loan_types]
+    pairs, positions = np.unique(loan_type_codes * (MAX_TENURE_MONTHS + 1) + months, return_inverse=True)
+    factors = np.array([
+        payment_factor(rates[pair // (MAX_TENURE_MONTHS + 1)], pair % (MAX_TENURE_MONTHS + 1))
+        if pair % (MAX_TENURE_MONTHS + 1) else 0.0
+        for pair in pairs.tolist()
+    ], dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        emi_to_income = amount * factors[positions.reshape(-1)] / (income / 12)
+    return emi_to_income, positive_income & (months > 0)
+
+
+def evaluate_statuses(applicants, rule_set):
+    """
+    Status code of every prepared applicant under 'rule_set' (an index into
+    STATUS_NAMES; ERROR_STATUS where the scalar code would fail), and a bit mask
+    of the checks with reasons that matched.
+    """
+    status = np.zeros(applicants['count'], dtype=np.int64)
+    reason_bits = np.zeros(applicants['count'], dtype=np.int64)
+    reason_bit = 0
+    fields = applicants['fields']
+    # The EMI depends on the rule set's interest rates, so it is worked out here and only when tested
+    if any(check[0] == 'emi_to_income' for check in rule_set.checks):
+        fields = dict(fields, emi_to_income=_emi_to_income(applicants, rule_set))
+    with np.errstate(invalid='ignore'):
+        for field, test, threshold, check_status, reason in rule_set.checks:
+            column, applies = fields[field]
+            matched = test(column, threshold)
+            if applies is not None:
+                matched &= applies
+            status[matched] = STATUSES.index(check_status)
+            if reason:
+                reason_bits[matched] |= 1 << reason_bit
+                reason_bit += 1
+    status[applicants['failed']] = ERROR_STATUS
+    return status, reason_bits
+
+
+def rule_based_eligibility_batch(annual_income, loan_amount, cibil_score, date_of_birth,
+                                 loan_type, employment_type, loan_tenure=None, today=None, rule_set=None):
+    """
+    Rule-based eligibility for many applicants at once (columns as for
+    prepare_applicants). Uses the active rule file unless a rule_set is given.
+
+    Returns a dict of object arrays 'status', 'reason', 'documents' and
+    'recommendations' with one entry per applicant, plus the 'rule_set_version' used.
+    """
+    rule_set = rule_set or get_rule_set()
+    applicants = prepare_applicants(annual_income, loan_amount, cibil_score, date_of_birth,
+                                    loan_type, employment_type, loan_tenure, today)
+    status, reason_bits = evaluate_statuses(applicants, rule_set)
+    failed = applicants['failed']
+
+    document_codes = _codes_by_value(
+        list(zip(loan_type, employment_type)), lambda pair: rule_set.document_index(*pair), failed
+    )
+    reason = _joined_reasons(rule_set, reason_bits)
+    documents = np.array(rule_set.documents_table, dtype=object)[document_codes]
+    recommendations = np.array([rule_set.recommendations[name] for name in STATUSES], dtype=object)[
+        np.minimum(status, ERROR_STATUS - 1)
+    ]
+    if failed.any():
+        reason[failed] = ERROR_RESULT['reason']
+        documents[failed] = ERROR_RESULT['documents']
+        recommendations[failed] = ERROR_RESULT['recommendations']
+
+    return {
+        'status': STATUS_NAMES[status],
+        'reason': reason,
+        'documents': documents,
+        'recommendations': recommendations,
+        'rule_set_version': rule_set.version,
+    }
@@ -0,0 +1,204 @@
+# backend/app/utils/eligibility_rules.py file
+import json
+import operator
+import os
+import threading
+import time
+from flask import current_app, has_app_context
+
+
+# --- Declarative eligibility rules ---
+# The rule engine's thresholds, document lists and recommendations live in a
+# versioned JSON rule file (ELIGIBILITY_RULES_PATH, app/eligibility_rules.json
+# by default). The file is compiled once into a RuleSet: a flat tuple of
+# predicates plus precomputed document and recommendation strings. Running
+# workers pick up an edited file without a restart; a file that fails to
+# compile is reported and the previous rules stay in force.
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'eligibility_rules.json')
+
+# How often the rule file is checked for changes
+RELOAD_CHECK_SECONDS = 5
+
+# Values a check can test. 'age' is skipped when the date of birth can't be read,
+# 'loan_to_income' when the annual income isn't positive, and 'emi_to_income'
+# (the EMI as a share of monthly income) also when the tenure can't be read.
+FIELDS = ('age', 'annual_income', 'loan_amount', 'loan_to_income', 'emi_to_income', 'cibil_score')
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+STATUSES = ('APPROVED', 'CONDITIONALLY_APPROVED', 'REJECTED')
+
+# Annual interest rate (percent) used for EMIs when the rule file sets none
+DEFAULT_INTEREST_RATE = 10.5
+
+
+class RuleSetError(ValueError):
+    """The rule file is malformed"""
+
+
+def _section(definition, name, kind):
+    """A top-level section of the rule file, empty when left out"""
+    section = definition.get(name, kind())
+    if not isinstance(section, kind):
+        raise RuleSetError(f"'{name}' must be {'a list' if kind is list else 'an object'}")
+    return section
+
+
+def _documents(entries, name):
+    if not isinstance(entries, list) or not all(isinstance(entry, str) for entry in entries):
+        raise RuleSetError(f"'{name}' must be a list of document names")
+    return entries
+
+
+def _matchers(entries, name):
+    """[(lower-cased substring, documents), ...] from a list of {"match", "documents"} entries"""
+    if not isinstance(entries, list):
+        raise RuleSetError(f"'{name}' must be a list")
+    matchers = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get('match'), str):
+            raise RuleSetError(f"every '{name}' entry needs a 'match' string")
+        matchers.append((entry['match'].lower(), _documents(entry.get('documents', []), name)))
+    return matchers
+
+
+def _rate_matchers(entries):
+    """[(lower-cased substring, rate), ...] from a list of {"match", "rate"} entries"""
+    if not isinstance(entries, list):
+        raise RuleSetError("'interest_rates.loan_type' must be a list")
+    if not all(isinstance(entry, dict) and isinstance(entry.get('match'), str) for entry in entries):
+        raise RuleSetError("every 'interest_rates.loan_type' entry needs a 'match' string")
+    return [(entry['match'].lower(), entry.get('rate')) for entry in entries]
+
+
+def _rate(rate, name):
+    if not isinstance(rate, (int, float)) or isinstance(rate, bool) or not 0 <= rate <= 100:
+        raise RuleSetError(f"'{name}' rates must be percentages between 0 and 100")
+    return rate
+
+
+class RuleSet:
+    """A compiled rule file. Immutable once built, so it can be shared between threads."""
+
+    def __init__(self, definition):
+        if not isinstance(definition, dict):
+            raise RuleSetError("the rule file must be a JSON object")
+        self.version = str(definition.get('version') or '')
+        if not self.version:
+            raise RuleSetError("the rule file needs a 'version'")
+        self.definition = definition
+
+        # (field, test, threshold, status, reason or None), in evaluation order
+        checks = []
+        for number, check in enumerate(_section(definition, 'checks', list), start=1):
+            if not isinstance(check, dict) or check.get('field') not in FIELDS:
+                raise RuleSetError(f"check {number}: 'field' must be one of {', '.join(FIELDS)}")
+            if check.get('op') not in OPERATORS:
+                raise RuleSetError(f"check {number}: 'op' must be one of {', '.join(OPERATORS)}")
+            if not isinstance(check.get('value'), (int, float)) or isinstance(check.get('value'), bool):
+                raise RuleSetError(f"check {number}: 'value' must be a number")
+            if check.get('status') not in STATUSES:
+                raise RuleSetError(f"check {number}: 'status' must be one of {', '.join(STATUSES)}")
+            checks.append((check['field'], OPERATORS[check['op']], check['value'], check['status'],
+                           check.get('reason') or None))
+        self.checks = tuple(checks)
+
+        documents = _section(definition, 'documents', dict)
+        common = _documents(documents.get('common', []), 'common')
+        self.employment_matchers = _matchers(documents.get('employment_type', []), 'employment_type')
+        self.loan_type_matchers = _matchers(documents.get('loan_type', []), 'loan_type')
+        employment_lists = [docs for _, docs in self.employment_matchers]
+        employment_lists.append(_documents(documents.get('employment_type_default', []), 'employment_type_default'))
+        loan_type_lists = [docs for _, docs in self.loan_type_matchers]
+        loan_type_lists.append(_documents(documents.get('loan_type_default', []), 'loan_type_default'))
+        # Joined document text for every (employment entry, loan type entry) pair, the defaults last
+        self.documents_table = tuple(
+            ', '.join(common + employment_docs + loan_docs)
+            for employment_docs in employment_lists for loan_docs in loan_type_lists
+        )
+        self.loan_type_choices = len(loan_type_lists)
+
+        # Interest rate by loan type, for the EMI in 'emi_to_income'
+        rates = _section(definition, 'interest_rates', dict)
+        self.interest_rate_matchers = [
+            (match, _rate(rate, 'interest_rates.loan_type')) for match, rate in _rate_matchers(rates.get('loan_type', []))
+        ]
+        self.default_interest_rate = _rate(rates.get('default', DEFAULT_INTEREST_RATE), 'interest_rates.default')
+
+        recommendations = _section(definition, 'recommendations', dict)
+        self.recommendations = {
+            status: '; '.join(_documents(recommendations.get(status, []), f'recommendations.{status}'))
+            for status in STATUSES
+        }
+
+    @staticmethod
+    def _first_match(matchers, value):
+        value = value.lower()
+        for index, (match, _) in enumerate(matchers):
+            if match in value:
+                return index
+        return len(matchers)
+
+    def document_index(self, loan_type, employment_type):
+        """Position in documents_table for these form values; raises like the form code on non-strings"""
+        employment = self._first_match(self.employment_matchers, employment_type)
+        return employment * self.loan_type_choices + self._first_match(self.loan_type_matchers, loan_type)
+
+    def interest_rate(self, loan_type):
+        """Annual interest rate (percent) for this form loan type; raises like the form code on non-strings"""
+        index = self._first_match(self.interest_rate_matchers, loan_type)
+        return self.interest_rate_matchers[index][1] if index < len(self.interest_rate_matchers) else self.default_interest_rate
+
+
+def load_rule_set(path):
+    """Read and compile a rule file"""
+    with open(path, 'r', encoding='utf-8') as file:
+        try:
+            return RuleSet(json.load(file))
+        except json.JSONDecodeError as e:
+            raise RuleSetError(f"invalid JSON: {e}") from e
+
+
+_rule_set = None
+_rule_set_source = None  # (path, mtime) of the loaded file
+_checked_at = 0.0
+_rule_set_lock = threading.Lock()
+
+
+def get_rule_set():
+    """
+    The active rules, reloaded when the rule file changes. Raises if no valid
+    rule file has ever been loaded.
+    """
+    global _rule_set, _rule_set_source, _checked_at
+    now = time.monotonic()
+    if _rule_set is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+        return _rule_set
+    with _rule_set_lock:
+        if _rule_set is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+            return _rule_set
+        path = current_app.config['ELIGIBILITY_RULES_PATH'] if has_app_context() else DEFAULT_RULES_PATH
+        source = None
+        try:
+            source = (path, os.path.getmtime(path))
+            if source != _rule_set_source:
+                rule_set = load_rule_set(path)
+                if _rule_set is not None and rule_set.version != _rule_set.version:
+                    print(f"Eligibility rules reloaded: version {_rule_set.version} -> {rule_set.version}")
+                # Swapping the reference is atomic; evaluations in progress keep the rules they started with
+                _rule_set, _rule_set_source = rule_set, source
+        except (OSError, RuleSetError) as e:
+            if _rule_set is None:
+                raise
+            print(f"Error reloading eligibility rules from {path}, keeping version {_rule_set.version}: {e}")
+            # Don't retry the same broken file on every check
+            if source is not None:
+                _rule_set_source = source
+        _checked_at = now
+        return _rule_set
@@ -1,5 +1,11 @@
 # backend/app/utils/helpers.py file
 from datetime import datetime
+from flask import current_app
+from .single_flight import SingleFlight
+from .http_response import loan_applications_version
+from .eligibility_rules import get_rule_set
+from .amortisation import tenure_months, emi_to_income
+from .dates import age_on, local_today
 
 
 # Safely formats a given value into a standard currency string.
@@ -22,9 +28,20 @@ def format_currency(amount, currency_symbol="₹"):
         return 'N/A'
 
 
+# Shares one pass over the applications between concurrent dashboard requests
+_analytics_flight = SingleFlight()
+
 # It takes the list of all loan applications and calculates the summary statistics for the admin dashboard.
+# The list comes from get_all_loan_applications, so the analytics are keyed on the same data
+# version as that list and reused for ADMIN_READ_CACHE_TTL seconds like the list itself.
 def calculate_analytics(applications):
-    """Calculate analytics data for the dashboard"""
+    """Calculate analytics data for the dashboard from the list returned by get_all_loan_applications"""
+    return _analytics_flight.do(
+        loan_applications_version(), _calculate_analytics, applications,
+        ttl=current_app.config['ADMIN_READ_CACHE_TTL']
+    )
+
+def _calculate_analytics(applications):
     total_applications = len(applications)
     approved_count = 0
     pending_count = 0
@@ -79,94 +96,58 @@ def calculate_age_from_dob(dob_str):
         if not dob_str:
             return "Unknown"
         
-        from datetime import datetime
-        dob = datetime.strptime(dob_str, '%Y-%m-%d')
-        today = datetime.now()
-        age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-        return age
+        age = age_on(dob_str, local_today())
+        return "Unknown" if age is None else age
     except:
         return "Unknown"
     
 
-def rule_based_eligibility_assessment(loan_data):
-    """Rule-based eligibility assessment when Watson AI is not available"""
+def rule_based_eligibility_assessment(loan_data, rule_set=None):
+    """
+    Rule-based eligibility assessment when Watson AI is not available.
+    Uses the active rule file (see eligibility_rules.py) unless a rule_set is given.
+    """
     try:
+        rule_set = rule_set or get_rule_set()
         annual_income = float(loan_data.get('annual-income', 0))
         loan_amount = float(loan_data.get('loan-amount', 0))
         cibil_score = int(loan_data.get('cibil-score', 0)) if loan_data.get('cibil-score', '').isdigit() else 0
         age = calculate_age_from_dob(loan_data.get('date-of-birth', ''))
-        
-        # Basic eligibility rules
+        loan_type = loan_data.get('loan-type', '')
+        months = tenure_months(loan_data.get('loan-tenure'))
+
+        values = {
+            'age': age if isinstance(age, int) else None,
+            'annual_income': annual_income,
+            'loan_amount': loan_amount,
+            'loan_to_income': loan_amount / annual_income if annual_income > 0 else None,
+            'emi_to_income': emi_to_income(loan_amount, annual_income, rule_set.interest_rate(loan_type), months),
+            'cibil_score': cibil_score,
+        }
+
+        # Checks run in order; each match sets the status and adds its reason
         reasons = []
         status = 'APPROVED'
-        
-        # Age check
-        if isinstance(age, int):
-            if age < 21:
-                reasons.append('Applicant below minimum age of 21 years')
-                status = 'REJECTED'
-            elif age > 65:
-                reasons.append('Applicant above maximum age of 65 years')
-                status = 'REJECTED'
-        
-        # Income check
-        if annual_income < 300000:  # Minimum 3 LPA
-            reasons.append('Annual income below minimum requirement of ₹3,00,000')
-            status = 'REJECTED'
-        
-        # Loan amount to income ratio
-        if annual_income > 0 and (loan_amount / annual_income) > 5:
-            reasons.append('Loan amount exceeds 5 times annual income')
-            status = 'CONDITIONALLY_APPROVED'
-        
-        # CIBIL score check
-        if cibil_score < 650:
-            reasons.append('CIBIL score below 650')
-            if cibil_score < 550:
-                status = 'REJECTED'
-            else:
-                status = 'CONDITIONALLY_APPROVED'
-        
-        # Determine documents based on loan type and employment
-        documents = []
-        loan_type = loan_data.get('loan-type', '').lower()
-        employment_type = loan_data.get('employment-type', '').lower()
-        
-        # Common documents
-        documents.extend(['Aadhaar Card', 'PAN Card', 'Passport Size Photos', 'Bank Statements (6 months)'])
-        
-        # Employment specific documents
-        if 'salaried' in employment_type:
-            documents.extend(['Salary Slips (3 months)', 'Employment Certificate', 'Form 16'])
-        else:
-            documents.extend(['Business Registration', 'ITR (2 years)', 'Profit & Loss Statement', 'Balance Sheet'])
-        
-        # Loan type specific documents
-        if 'home' in loan_type:
-            documents.extend(['Property Documents', 'Sale Agreement', 'Approved Building Plan'])
-        elif 'car' in loan_type:
-            documents.extend(['Vehicle Quotation', 'Insurance Details'])
-        elif 'education' in loan_type:
-            documents.extend(['Admission Letter', 'Fee Structure', 'Academic Records'])
-        
-        # Prepare recommendations
-        recommendations = []
-        if status == 'REJECTED':
-            recommendations.append('Improve CIBIL score and reapply after 6 months')
-            recommendations.append('Consider applying for a smaller loan amount')
-        elif status == 'CONDITIONALLY_APPROVED':
-            recommendations.append('Additional verification required')
-            recommendations.append('Co-applicant may be required')
-        else:
-            recommendations.append('Please submit all required documents for final approval')
-        
+        for field, test, threshold, check_status, reason in rule_set.checks:
+            value = values[field]
+            if value is not None and test(value, threshold):
+                status = check_status
+                if reason:
+                    reasons.append(reason)
+
+        # Documents depend on loan type and employment
+        documents = rule_set.documents_table[
+            rule_set.document_index(loan_type, loan_data.get('employment-type', ''))
+        ]
+
         return {
             'status': status,
             'reason': '; '.join(reasons) if reasons else 'All eligibility criteria met',
-            'documents': ', '.join(documents),
-            'recommendations': '; '.join(recommendations)
+            'documents': documents,
+            'recommendations': rule_set.recommendations[status],
+            'rule_set_version': rule_set.version
         }
-        
+
     except Exception as e:
         print(f"Rule-based assessment error: {e}")
         return {
@@ -174,4 +155,90 @@ def rule_based_eligibility_assessment(loan_data):
             'reason': 'Manual review required due to assessment error',
             'documents': 'Identity Proof, Income Proof, Address Proof',
             'recommendations': 'Please contact bank for manual assessment'
-        }
\ No newline at end of file
+        }
+
+# Amount bands offered by the admin dashboard filter, as (key, lower, upper) with lower exclusive.
+AMOUNT_RANGES = [
+    ('0-50000', None, 50000),
+    ('50000-100000', 50000, 100000),
+    ('100000-250000', 100000, 250000),
+    ('250000-500000', 250000, 500000),
+    ('500000+', 500000, None),
+]
+
+# Day windows offered by the admin dashboard date filter
+DATE_RANGES = {'today': 1, 'week': 7, 'month': 30, 'quarter': 90}
+
+
+def parse_amount(amount):
+    """Parse a stored loan amount into a float, returning None if it isn't numeric"""
+    try:
+        return float(str(amount).replace(',', '').replace('$', '').replace('₹', '').strip())
+    except (ValueError, TypeError):
+        return None
+
+
+def get_display_name(app):
+    """Work out the name shown for an application on the admin dashboard"""
+    name = f"{app.get('first_name', '')} {app.get('last_name', '')}".strip()
+    if not name:
+        full_name = app.get('full_name', '')
+        if full_name and full_name.strip():
+            name = full_name.strip()
+        else:
+            # Extract name from email if no name provided
+            email_user = app.get('email', app.get('user_email', '')).split('@')[0]
+            name = email_user.replace('.', ' ').title() if email_user else 'N/A'
+    return name
+
+
+def application_matches_filters(app, filters, now=None):
+    """
+    Server-side version of the admin dashboard's applyFilters().
+    'filters' may hold status, type, source, amount, date and search keys;
+    empty values are ignored, exactly like the dashboard's dropdowns.
+    """
+    status_filter = (filters.get('status') or '').lower()
+    if status_filter and status_filter not in app.get('status', 'pending').lower():
+        return False
+    
+    type_filter = (filters.get('type') or '').lower()
+    if type_filter and type_filter not in app.get('loan_type', app.get('loanType', '')).lower():
+        return False
+    
+    source_filter = (filters.get('source') or '').lower()
+    if source_filter and source_filter not in app.get('source', 'unknown').lower():
+        return False
+    
+    amount_filter = filters.get('amount')
+    if amount_filter:
+        amount = parse_amount(app.get('loan_amount', app.get('loanAmount', '')))
+        # Like the dashboard, include rows whose amount cannot be parsed
+        if amount is not None:
+            for key, lower, upper in AMOUNT_RANGES:
+                if key == amount_filter:
+                    if (lower is not None and amount <= lower) or (upper is not None and amount > upper):
+                        return False
+                    break
+    
+    date_filter = filters.get('date')
+    if date_filter in DATE_RANGES:
+        try:
+            created = datetime.fromisoformat(app.get('created_at', '')[:10])
+            now = now or datetime.now()
+            if (now - created).total_seconds() > DATE_RANGES[date_filter] * 86400:
+                return False
+        except ValueError:
+            return False
+    
+    search_filter = (filters.get('search') or '').lower()
+    if search_filter:
+        haystacks = (
+            app.get('application_id', ''),
+            get_display_name(app),
+            app.get('email', app.get('user_email', '')),
+        )
+        if not any(search_filter in value.lower() for value in haystacks):
+            return False
+    
+    return True
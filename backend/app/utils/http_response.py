@@ -0,0 +1,115 @@
+# backend/app/utils/http_response.py file
+import gzip
+import hashlib
+import os
+from functools import wraps
+from flask import current_app, request, session
+
+# Brotli is optional; without it we only offer gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# --- Data Versions ---
+
+def get_data_version(*csv_names):
+    """
+    Build a version string for the given CSV files from their size and
+    modification time. Any write to one of the files changes the version,
+    so it is a cheap stand-in for a per-resource revision counter.
+    """
+    parts = []
+    for name in csv_names:
+        # Accept either a config key (e.g. 'USERS_CSV') or a file name inside CSV_DIR
+        path = current_app.config.get(name) or os.path.join(current_app.config['CSV_DIR'], name)
+        try:
+            stat = os.stat(path)
+            parts.append(f"{name}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{name}:missing")
+    return '|'.join(parts)
+
+
+def loan_applications_version():
+    """Identifies the current contents of both loans CSVs; changes whenever either file is written"""
+    config = current_app.config
+    return (
+        config['LOAN_APPLICATIONS_CSV'], config['COMPREHENSIVE_LOANS_CSV'],
+        get_data_version('LOAN_APPLICATIONS_CSV', 'COMPREHENSIVE_LOANS_CSV')
+    )
+
+
+def _session_identity():
+    """Who the response was rendered for, so one user's ETag never matches another's."""
+    staff_user = session.get('staff_user') or {}
+    return f"{session.get('user_email', '')}:{staff_user.get('username', '')}:{bool(session.get('logged_in'))}"
+
+
+# --- Conditional Requests ---
+
+def conditional_response(*csv_names):
+    """
+    Decorator for GET routes whose output only depends on the given CSV files
+    and the session. The ETag is computed from the data version before the view
+    runs, so a matching If-None-Match is answered with a 304 without reading or
+    rendering anything.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            version = get_data_version(*csv_names)
+            etag_source = f"{request.path}|{_session_identity()}|{version}"
+            etag = hashlib.sha1(etag_source.encode('utf-8')).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            response = current_app.make_response(view_func(*args, **kwargs))
+            if response.status_code == 200:
+                # Weak because the compression layer may re-encode the body
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+# --- Compression ---
+
+def compress_response(response):
+    """Gzip or Brotli-compress a response body based on the client's Accept-Encoding."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if response.content_length is not None and response.content_length < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(offered)
+    if not encoding:
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=current_app.config['COMPRESS_BROTLI_QUALITY'])
+    else:
+        compressed = gzip.compress(data, compresslevel=current_app.config['COMPRESS_LEVEL'])
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_response_layer(app):
+    """Register the compression hook on the app."""
+    app.after_request(compress_response)
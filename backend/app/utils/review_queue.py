@@ -0,0 +1,215 @@
+# backend/app/utils/review_queue.py file
+import heapq
+import threading
+import time
+
+from .helpers import parse_amount
+
+
+# Lower rank is reviewed first
+ELIGIBILITY_PRIORITY = {
+    'APPROVED': 0,
+    'CONDITIONALLY_APPROVED': 1,
+    'PENDING_REVIEW': 2,
+    'PENDING_ASSESSMENT': 2,
+    'REJECTED': 3,
+}
+
+
+def is_resubmitted(row):
+    """True if the applicant has resubmitted the application after an objection"""
+    return (row.get('eligibility_status') or '').upper() == 'RESUBMITTED' or (row.get('status') or '').lower() == 'resubmitted'
+
+
+def is_awaiting_review(row):
+    """True if an application still needs a staff decision"""
+    status = (row.get('status') or 'pending').lower()
+    eligibility_status = (row.get('eligibility_status') or '').upper()
+
+    # Objected applications are waiting on the applicant, not on staff
+    if eligibility_status == 'OBJECTION_RAISED' or status == 'objection_raised':
+        return False
+    if is_resubmitted(row):
+        return True
+    return status not in ('approved', 'rejected', 'eligibility_assessed')
+
+
+def review_priority(row):
+    """
+    Heap key for an application: resubmissions first, then by AI eligibility
+    status, then oldest first, then largest loan amount first.
+    """
+    eligibility_status = (row.get('eligibility_status') or '').upper()
+    resubmitted = is_resubmitted(row)
+    amount = parse_amount(row.get('loan_amount', '')) or 0
+    return (
+        0 if resubmitted else 1,
+        ELIGIBILITY_PRIORITY.get(eligibility_status, 2),
+        row.get('created_at', ''),
+        -amount,
+    )
+
+
+def _summary(row):
+    """The fields a reviewer needs to pick up an application"""
+    return {
+        'application_id': row.get('application_id', ''),
+        'email': row.get('user_email', row.get('email', '')),
+        'loan_type': row.get('loan_type', ''),
+        'loan_amount': row.get('loan_amount', ''),
+        'status': row.get('status', ''),
+        'eligibility_status': row.get('eligibility_status', ''),
+        'created_at': row.get('created_at', ''),
+    }
+
+
+class ReviewQueue:
+    """
+    Priority heap of applications awaiting review, with reviewer claims.
+
+    Stale heap entries are invalidated in place and skipped when popped, so both
+    status updates and next() are O(log N). Claims expire after 'claim_timeout'
+    seconds so work abandoned by a reviewer returns to the queue. The queue lives
+    in the worker process; run a single worker if claims must be exclusive
+    across the whole deployment.
+    """
+
+    def __init__(self, claim_timeout=900):
+        self.claim_timeout = claim_timeout
+        self.loaded = False
+        self._heap = []
+        self._entries = {}     # application_id -> live heap entry [priority, app_id, valid]
+        self._summaries = {}   # application_id -> summary of queued or claimed applications
+        self._claims = {}      # application_id -> {'reviewer', 'expires_at', 'priority'}
+        self._lock = threading.Lock()
+
+    def load(self, applications):
+        """(Re)build the heap from a full list of applications, keeping live claims."""
+        with self._lock:
+            self._heap = []
+            self._entries = {}
+            self._summaries = {}
+            for row in applications:
+                app_id = row.get('application_id')
+                if not app_id or not is_awaiting_review(row):
+                    continue
+                self._summaries[app_id] = _summary(row)
+                if app_id in self._claims:
+                    self._claims[app_id]['priority'] = review_priority(row)
+                    continue
+                entry = [review_priority(row), app_id, True]
+                self._entries[app_id] = entry
+                self._heap.append(entry)
+            heapq.heapify(self._heap)
+            # Claims on applications that were decided meanwhile are dropped
+            for app_id in [a for a in self._claims if a not in self._summaries]:
+                del self._claims[app_id]
+            self.loaded = True
+
+    def update(self, row):
+        """Reflect a status change (or a new application) in the queue."""
+        app_id = row.get('application_id')
+        if not app_id:
+            return
+        with self._lock:
+            if not self.loaded:
+                # The first load() reads storage, so there is nothing to patch yet
+                return
+            self._discard(app_id)
+            if not is_awaiting_review(row):
+                self._summaries.pop(app_id, None)
+                self._claims.pop(app_id, None)
+                return
+            self._summaries[app_id] = _summary(row)
+            if app_id in self._claims:
+                self._claims[app_id]['priority'] = review_priority(row)
+            else:
+                self._push(app_id, review_priority(row))
+
+    def next(self, reviewer):
+        """Claim and return the highest-priority unclaimed application, or None."""
+        with self._lock:
+            self._expire_claims()
+            while self._heap:
+                priority, app_id, valid = heapq.heappop(self._heap)
+                if not valid:
+                    continue
+                del self._entries[app_id]
+                return self._add_claim(app_id, reviewer, priority)
+            return None
+
+    def claim(self, app_id, reviewer):
+        """
+        Claim a specific application. Returns the claimed summary, or None if it
+        is not queued or another reviewer holds it.
+        """
+        with self._lock:
+            self._expire_claims()
+            claim = self._claims.get(app_id)
+            if claim is not None:
+                if claim['reviewer'] != reviewer:
+                    return None
+                claim['expires_at'] = time.monotonic() + self.claim_timeout
+                return self._claimed_summary(app_id)
+            entry = self._entries.get(app_id)
+            if entry is None:
+                return None
+            self._discard(app_id)
+            return self._add_claim(app_id, reviewer, entry[0])
+
+    def release(self, app_id, reviewer):
+        """Give a claimed application back to the queue. Returns False if the reviewer doesn't hold it."""
+        with self._lock:
+            claim = self._claims.get(app_id)
+            if claim is None or claim['reviewer'] != reviewer:
+                return False
+            del self._claims[app_id]
+            self._push(app_id, claim['priority'])
+            return True
+
+    def stats(self):
+        with self._lock:
+            self._expire_claims()
+            return {
+                'queued': len(self._entries),
+                'claimed': len(self._claims),
+                'claims': [
+                    {'application_id': app_id, 'reviewer': claim['reviewer']}
+                    for app_id, claim in self._claims.items()
+                ],
+            }
+
+    # --- Internal helpers; callers hold the lock ---
+
+    def _push(self, app_id, priority):
+        entry = [priority, app_id, True]
+        self._entries[app_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _discard(self, app_id):
+        entry = self._entries.pop(app_id, None)
+        if entry is not None:
+            entry[2] = False
+
+    def _add_claim(self, app_id, reviewer, priority):
+        self._claims[app_id] = {
+            'reviewer': reviewer,
+            'expires_at': time.monotonic() + self.claim_timeout,
+            'priority': priority,
+        }
+        return self._claimed_summary(app_id)
+
+    def _claimed_summary(self, app_id):
+        summary = dict(self._summaries.get(app_id, {'application_id': app_id}))
+        summary['claimed_by'] = self._claims[app_id]['reviewer']
+        summary['claim_expires_in'] = int(self._claims[app_id]['expires_at'] - time.monotonic())
+        return summary
+
+    def _expire_claims(self):
+        now = time.monotonic()
+        for app_id in [a for a, c in self._claims.items() if c['expires_at'] <= now]:
+            self._push(app_id, self._claims.pop(app_id)['priority'])
+
+
+# One queue per worker process
+review_queue = ReviewQueue()
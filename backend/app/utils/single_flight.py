@@ -0,0 +1,99 @@
+# backend/app/utils/single_flight.py file
+import threading
+import time
+from functools import wraps
+
+
+class _Call:
+    """One in-flight (or recently finished) computation shared by every caller with the same key."""
+
+    def __init__(self, keepalive):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.expires_at = None
+        # Holding the arguments stops id()-based keys from being reused while cached
+        self.keepalive = keepalive
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls within a worker process.
+
+    The first caller for a key runs the function; callers that arrive while it is
+    running wait for it and receive the same result (or exception). Successful
+    results are then served from memory for 'ttl' seconds. Results are shared
+    objects, so callers must treat them as read-only.
+    """
+
+    def __init__(self, ttl=0, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, ttl=None, **kwargs):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and call.expires_at <= time.monotonic():
+                call = None
+            if call is None:
+                self._prune()
+                call = _Call((args, kwargs))
+                self._calls[key] = call
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.expires_at = time.monotonic() + (ttl if call.error is None else 0)
+            call.done.set()
+            if call.error is not None or ttl <= 0:
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+        return call.result
+
+    def clear(self):
+        with self._lock:
+            self._calls.clear()
+
+    def _prune(self):
+        """Drop expired entries, and the oldest finished ones if we are over the limit. Caller holds the lock."""
+        now = time.monotonic()
+        for key in [k for k, c in self._calls.items() if c.done.is_set() and c.expires_at <= now]:
+            del self._calls[key]
+        if len(self._calls) >= self.max_entries:
+            finished = sorted((c.expires_at, k) for k, c in self._calls.items() if c.done.is_set())
+            for _, key in finished[:len(self._calls) - self.max_entries + 1]:
+                del self._calls[key]
+
+
+def single_flight(ttl=0, key=None):
+    """
+    Decorator form of SingleFlight. 'key' maps the call's arguments to a hashable
+    cache key; by default the positional and keyword arguments themselves are used.
+    """
+    def decorator(func):
+        flight = SingleFlight(ttl=ttl)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return flight.do(call_key, func, *args, **kwargs)
+
+        wrapper.flight = flight
+        return wrapper
+    return decorator
@@ -0,0 +1,7 @@
+# backend/asgi.py
+# ASGI entry point: /ask is served asynchronously, everything else by the Flask app.
+#   uvicorn asgi:application --host 0.0.0.0 --port 5001
+from app import create_app
+from app.async_gateway import create_asgi_app
+
+application = create_asgi_app(create_app())
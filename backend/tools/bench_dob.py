@@ -0,0 +1,106 @@
+# backend/tools/bench_dob.py
+#
+# Throughput of date-of-birth parsing and age computation (app/utils/dates.py)
+# against the strptime-per-call version calculate_age_from_dob used to have.
+# Run from the backend folder:
+#
+#   python -m tools.bench_dob --rows 200000 --distinct 20000
+#   python -m tools.bench_dob --json
+
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime
+
+
+def _strptime_age(dob_str):
+    """The previous calculate_age_from_dob: re-imports datetime and calls strptime every time"""
+    try:
+        if not dob_str:
+            return "Unknown"
+
+        from datetime import datetime
+        dob = datetime.strptime(dob_str, '%Y-%m-%d')
+        today = datetime.now()
+        age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+        return age
+    except:
+        return "Unknown"
+
+
+def _dates_of_birth(rows, distinct, seed):
+    """A column of 'rows' dates of birth drawn from 'distinct' values, with a few unreadable ones"""
+    rng = random.Random(seed)
+    pool = [f"{rng.randint(1950, 2006)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(distinct)]
+    pool[:3] = ['', 'not a date', '1990-2-3']
+    return [rng.choice(pool) for _ in range(rows)]
+
+
+def _time(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark date-of-birth parsing and age computation')
+    parser.add_argument('--rows', type=int, default=200000, help='dates of birth per run')
+    parser.add_argument('--distinct', type=int, default=20000, help='distinct dates among them')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    from app.utils import dates
+    from app.utils.helpers import calculate_age_from_dob
+
+    column = _dates_of_birth(args.rows, args.distinct, args.seed)
+    today = date.today()
+
+    def uncached():
+        dates.age_on.cache_clear()
+        return [calculate_age_from_dob(dob) for dob in column]
+
+    def batch():
+        days, known = dates.epoch_days(column)
+        return dates.ages_on(days, today), known
+
+    runs = {
+        'strptime per call': lambda: [_strptime_age(dob) for dob in column],
+        'parse_iso_date per call': lambda: [dates.parse_iso_date(dob) for dob in column],
+        'calculate_age_from_dob (cold cache)': uncached,
+        'calculate_age_from_dob (warm cache)': lambda: [calculate_age_from_dob(dob) for dob in column],
+        'epoch_days + ages_on': batch,
+    }
+    results, outputs = {}, {}
+    for name, run in runs.items():
+        elapsed, outputs[name] = _time(run)
+        results[name] = {'seconds': round(elapsed, 4), 'rows_per_second': round(args.rows / elapsed)}
+
+    # Every implementation has to agree with the old one
+    expected = outputs['strptime per call']
+    ages, known = outputs['epoch_days + ages_on']
+    batch_ages = [int(age) if readable else "Unknown" for age, readable in zip(ages.tolist(), known.tolist())]
+    parsed = [datetime.strptime(dob, '%Y-%m-%d').date() if isinstance(age, int) else None
+              for dob, age in zip(column, expected)]
+    results['agrees'] = (outputs['calculate_age_from_dob (warm cache)'] == expected and batch_ages == expected
+                         and outputs['parse_iso_date per call'] == parsed)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.rows} dates of birth, {args.distinct} distinct")
+    baseline = results['strptime per call']['seconds']
+    for name in runs:
+        result = results[name]
+        print(f"{name:<38} {result['seconds']:8.4f}s  {result['rows_per_second']:>10} rows/s  "
+              f"x{baseline / result['seconds']:.1f}")
+    print(f"results agree with strptime: {results['agrees']}")
+
+
+if __name__ == '__main__':
+    main()
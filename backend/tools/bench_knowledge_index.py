@@ -0,0 +1,127 @@
+# backend/tools/bench_knowledge_index.py
+#
+# Query latency of the chatbot's local BM25 index (app/services/knowledge_index.py).
+# Builds an index from a synthetic corpus of policy documents and past answers,
+# or loads an existing one, then times lookups. Run from the backend folder:
+#
+#   python -m tools.bench_knowledge_index --answers 20000 --queries 5000
+#   python -m tools.bench_knowledge_index --index data/knowledge_index.json --json
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+LOAN_TYPES = ['home', 'personal', 'car', 'education', 'business', 'gold']
+TOPICS = ['interest rate', 'eligibility', 'documents required', 'processing fee', 'maximum tenure',
+          'prepayment charges', 'minimum cibil score', 'co-applicant rules', 'emi calculation', 'tax benefits']
+FILLER = ('The bank reviews every application against its credit policy. Applicants must provide valid '
+          'identity and address proof, and income documents for the last six months. ')
+
+
+def _write_corpus(folder, answers, seed):
+    rng = random.Random(seed)
+    docs_dir = os.path.join(folder, 'policies')
+    os.makedirs(docs_dir)
+    for loan_type in LOAN_TYPES:
+        with open(os.path.join(docs_dir, f'{loan_type}_loans.md'), 'w', encoding='utf-8') as file:
+            file.write(f"# {loan_type.title()} loans\n\n")
+            for topic in TOPICS:
+                file.write(f"## {topic.title()}\n\n{loan_type.title()} loan {topic}: {FILLER * 3}\n\n")
+
+    questions = []
+    chat_logs = os.path.join(folder, 'chat_logs.csv')
+    with open(chat_logs, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'user_message', 'bot_response', 'timestamp', 'session_id', 'cached'])
+        for i in range(answers):
+            question = (f"what is the {rng.choice(TOPICS)} for a {rng.choice(LOAN_TYPES)} loan "
+                        f"for customer segment {i}")
+            questions.append(question)
+            writer.writerow([i, question, f"Answer {i}. {FILLER}", '', '', 'false'])
+    return docs_dir, chat_logs, questions
+
+
+def _percentiles(samples):
+    samples.sort()
+    return {
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+        'p99_us': round(samples[int(len(samples) * 0.99) - 1] * 1e6, 1),
+        'max_us': round(samples[-1] * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark query latency of the local knowledge index')
+    parser.add_argument('--index', default=None, help='existing index file; a synthetic one is built otherwise')
+    parser.add_argument('--answers', type=int, default=10000, help='past answers in the synthetic corpus')
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.services import knowledge_index
+
+    folder = tempfile.mkdtemp(prefix='knowledge-bench-')
+    results = {}
+    if args.index:
+        index_path = os.path.abspath(args.index)
+        questions = [f"what is the {topic} for a {loan_type} loan" for topic in TOPICS for loan_type in LOAN_TYPES]
+    else:
+        docs_dir, chat_logs, questions = _write_corpus(folder, args.answers, args.seed)
+        index_path = os.path.join(folder, 'knowledge_index.json')
+        started = time.perf_counter()
+        counts = knowledge_index.build_index(docs_dir, chat_logs, index_path)
+        results['build_seconds'] = round(time.perf_counter() - started, 3)
+        results['indexed'] = counts
+
+    # Keep anything the app writes out of the real data folder
+    os.chdir(folder)
+    flask_app = create_app()
+    flask_app.config['KNOWLEDGE_INDEX_PATH'] = index_path
+
+    rng = random.Random(args.seed)
+    workloads = {
+        # The same question asked again: answered locally
+        'repeat': [rng.choice(questions) for _ in range(args.queries)],
+        # Unrelated questions: fall through to Watson with context passages
+        'miss': [f"can i open a {rng.choice(['savings', 'current', 'salary'])} account online {i}"
+                 for i in range(args.queries)],
+    }
+    with flask_app.app_context():
+        started = time.perf_counter()
+        index = knowledge_index.get_knowledge_index()
+        results['load_seconds'] = round(time.perf_counter() - started, 3)
+        results['documents'] = len(index.documents)
+        for name, queries in workloads.items():
+            latencies, answered = [], 0
+            for query in queries:
+                started = time.perf_counter()
+                if knowledge_index.find_local_answer(query) is None:
+                    knowledge_index.context_messages(query)
+                else:
+                    answered += 1
+                latencies.append(time.perf_counter() - started)
+            result = _percentiles(latencies)
+            result['answered_locally'] = round(answered / len(queries), 3)
+            result['queries_per_second'] = round(len(queries) / sum(latencies))
+            results[name] = result
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    if 'build_seconds' in results:
+        print(f"built {results['indexed']} in {results['build_seconds']}s")
+    print(f"loaded {results['documents']} documents in {results['load_seconds']}s")
+    for name in workloads:
+        result = results[name]
+        print(f"{name:<8} p50 {result['p50_us']:8.1f}us  p99 {result['p99_us']:8.1f}us  "
+              f"{result['queries_per_second']:8d} q/s  answered locally {result['answered_locally']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# backend/tools/bench_smtp.py
+#
+# Email throughput of the pooled SMTP client (app/services/smtp_pool.py)
+# against a new connection and login per email, as send_email_notification
+# used to do. Runs against the local SMTP stand-in (tools/smtp_stub.py), whose
+# handshake latency plays the part of the TLS setup and login of a hosted
+# server. Run from the backend folder:
+#
+#   python -m tools.bench_smtp --emails 200 --threads 4 --handshake-latency 0.2
+#   python -m tools.bench_smtp --drop-after 25 --json
+
+import argparse
+import json
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+from tools.smtp_stub import start_stub
+
+FROM_EMAIL = 'noreply@bank.example'
+
+
+def _message(number):
+    msg = MIMEText(f"Your loan application APP{number:06d} has been received.", 'plain', 'utf-8')
+    msg['From'] = f"AI Banking Portal <{FROM_EMAIL}>"
+    msg['To'] = f"applicant{number}@example.com"
+    msg['Subject'] = f"Application APP{number:06d} received"
+    return msg['To'], msg.as_string()
+
+
+def _send_unpooled(host, port, to_email, message):
+    """Connect, log in, send and quit for one email"""
+    with smtplib.SMTP(host, port, timeout=30) as server:
+        server.login('bench', 'bench')
+        server.sendmail(FROM_EMAIL, to_email, message)
+
+
+def _unpooled_sender(host, port, threads):
+    return (lambda to_email, message: _send_unpooled(host, port, to_email, message)), None
+
+
+def _pooled_sender(host, port, threads):
+    from app.services.smtp_pool import SMTPPool
+    pool = SMTPPool(host, port, 'bench', 'bench', size=threads, use_tls=False)
+    return (lambda to_email, message: pool.sendmail(FROM_EMAIL, to_email, message)), pool
+
+
+def _run(send, emails, threads):
+    messages = [_message(number) for number in range(emails)]
+    started = time.perf_counter()
+    if threads == 1:
+        for to_email, message in messages:
+            send(to_email, message)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda item: send(*item), messages))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pooled SMTP sends against a local SMTP stand-in')
+    parser.add_argument('--emails', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=4, help='concurrent senders (and pool size)')
+    parser.add_argument('--handshake-latency', type=float, default=0.1,
+                        help='seconds the stand-in spends on the greeting and login of each connection')
+    parser.add_argument('--command-latency', type=float, default=0.0, help='seconds before every stand-in reply')
+    parser.add_argument('--drop-after', type=int, default=0,
+                        help='stand-in closes connections after this many messages, to exercise reconnects')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    for threads in sorted({1, args.threads}):
+        for name, sender in (('new connection per email', _unpooled_sender), ('pooled', _pooled_sender)):
+            # A fresh stand-in per run, so its counts belong to this run alone
+            server, (host, port) = start_stub(
+                handshake_latency=args.handshake_latency, command_latency=args.command_latency,
+                drop_after=args.drop_after,
+            )
+            send, pool = sender(host, port, threads)
+            elapsed = _run(send, args.emails, threads)
+            if pool is not None:
+                pool.close()
+            server.shutdown()
+            server.server_close()
+            counts = server.options.counts
+            results[f"{name}, {threads} thread{'s' if threads > 1 else ''}"] = {
+                'seconds': round(elapsed, 3),
+                'emails_per_second': round(args.emails / elapsed, 1),
+                'connections': counts['connections'],
+                'delivered': counts['messages'],
+                'pool': pool.stats() if pool is not None else None,
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.emails} emails, handshake {args.handshake_latency}s"
+          + (f", connections dropped every {args.drop_after} messages" if args.drop_after else ''))
+    for name, result in results.items():
+        line = (f"{name:<38} {result['seconds']:8.3f}s  {result['emails_per_second']:8.1f} emails/s  "
+                f"{result['connections']:5d} connections  {result['delivered']:5d} delivered")
+        if result['pool']:
+            line += f"  ({result['pool']['reconnects']} reconnects)"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# backend/tools/bench_watson_path.py
+#
+# Benchmark of the Watson-backed paths (eligibility assessment, /ask and
+# streamed /ask) without IBM endpoints. Run from the backend folder:
+#
+#   # against the local stub, recording a cassette as it goes
+#   python -m tools.bench_watson_path --mode record --cassette /tmp/watson.jsonl
+#   # replay the cassette: no network, deterministic, good for before/after comparisons
+#   python -m tools.bench_watson_path --mode replay --cassette /tmp/watson.jsonl --json
+#
+# A cassette can also be recorded from the real IBM endpoints by running the app
+# with WATSON_CASSETTE_MODE=record, as long as the same prompts are replayed.
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.watson_stub import start_stub
+
+
+# Distinct prompts per workload; requests cycle through them so replays find a match
+PROFILES = 20
+
+
+def loan_profile(i):
+    return {
+        'full-name': f'Bench Applicant {i}',
+        'date-of-birth': f'{1970 + i % 30}-06-15',
+        'employment-type': 'salaried' if i % 3 else 'self-employed',
+        'annual-income': str(300000 + 50000 * i),
+        'existing-loans': 'None',
+        'cibil-score': str(560 + 12 * i),
+        'loan-type': ('personal', 'home', 'car', 'education')[i % 4],
+        'loan-amount': str(200000 + 100000 * i),
+        'loan-tenure': str(1 + i % 20),
+    }
+
+
+def _configure_app(mode, cassette_path, agent_url):
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config.update(
+        API_KEY='bench-key',
+        AGENT_ENDPOINT=f"{agent_url}/v1/chat",
+        IAM_ENDPOINT=f"{agent_url}/identity/token",
+        # Measure the Watson round trip itself, not the caches in front of it
+        CHAT_CACHE_ENABLED=False,
+        DECISION_CACHE_ENABLED=False,
+        WATSON_CASSETTE_MODE='off' if mode == 'live' else mode,
+        WATSON_CASSETTE_PATH=cassette_path or '',
+    )
+    return flask_app
+
+
+def _measure(func, total, concurrency):
+    latencies = []
+
+    def timed(i):
+        started = time.perf_counter()
+        ok = func(i)
+        latencies.append(time.perf_counter() - started)
+        return ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'errors': results.count(False),
+        'throughput': round(total / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def run_benchmarks(flask_app, total, concurrency):
+    from app.services.watson_service import assess_loan_eligibility_with_watson
+
+    def eligibility(i):
+        with flask_app.app_context():
+            return assess_loan_eligibility_with_watson(loan_profile(i % PROFILES)).get('engine') == 'watson'
+
+    # A fresh client per request is a fresh chat session, so no earlier turns are sent
+    # along and the agent request is the same in every run (a cassette can match it)
+    def ask(i):
+        response = flask_app.test_client().post('/ask', json={'query': f'benchmark question {i % PROFILES}'})
+        return response.status_code == 200
+
+    def ask_stream(i):
+        response = flask_app.test_client().post('/ask', json={'query': f'benchmark stream {i % PROFILES}', 'stream': True})
+        return response.status_code == 200 and '"done": true' in response.get_data(as_text=True)
+
+    return {
+        'eligibility': _measure(eligibility, total, concurrency),
+        'ask': _measure(ask, total, concurrency),
+        'ask_stream': _measure(ask_stream, total, concurrency),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Watson-backed paths against a stub or a cassette')
+    parser.add_argument('--mode', choices=['live', 'record', 'replay'], default='live',
+                        help='live: call the stub; record: call the stub and save a cassette; replay: cassette only')
+    parser.add_argument('--cassette', default=None, help='cassette file (required for record and replay)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per workload')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help='stub agent latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    if args.mode != 'live' and not args.cassette:
+        parser.error('--cassette is required for record and replay')
+    cassette_path = os.path.abspath(args.cassette) if args.cassette else None
+    if args.mode == 'record' and os.path.exists(cassette_path):
+        os.remove(cassette_path)
+
+    # Keep chat logs written during the run out of the real data folder
+    os.chdir(tempfile.mkdtemp(prefix='watson-bench-'))
+    if args.mode == 'replay':
+        # Nothing listens here; any call missing from the cassette fails instead of leaving the machine
+        agent_url = 'http://127.0.0.1:9'
+    else:
+        _, agent_url = start_stub(latency=args.latency, jitter=args.jitter,
+                                  error_rate=args.error_rate, seed=args.seed, stream_delay=0)
+    flask_app = _configure_app(args.mode, cassette_path, agent_url)
+
+    results = run_benchmarks(flask_app, args.requests, args.concurrency)
+    if args.json:
+        print(json.dumps({'mode': args.mode, 'concurrency': args.concurrency, 'results': results}, indent=2))
+        return
+
+    print(f"mode {args.mode}, {args.requests} requests per workload, concurrency {args.concurrency}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['throughput']:8.1f} req/s  p50 {result['p50_ms']:8.2f}ms  "
+              f"p95 {result['p95_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# backend/tools/check_eligibility_parity.py
+#
+# Property check: the batch rule engine (app/utils/eligibility_batch.py) must
+# give every applicant exactly the result of the one-at-a-time
+# helpers.rule_based_eligibility_assessment. Generates random application rows
+# full of edge cases: unreadable numbers, inf/nan, odd CIBIL strings, invalid
+# and boundary dates of birth, unusual tenures and non-string fields. It
+# compares both engines under the shipped rule file and under randomly
+# perturbed rule sets. Exits non-zero and prints examples on any mismatch.
+# Run from the backend folder:
+#
+#   python -m tools.check_eligibility_parity
+#   python -m tools.check_eligibility_parity --rows 100000 --rule-sets 10 --seed 7
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import random
+import sys
+import time
+from datetime import date
+
+FORM_FIELDS = ['annual-income', 'loan-amount', 'cibil-score', 'date-of-birth',
+               'loan-type', 'employment-type', 'loan-tenure']
+
+
+def _shift_years(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - years, day=28)
+
+
+def _row_generator(rng):
+    today = date.today()
+    # Birthdays on and around the days applicants turn 21 and 66
+    boundary_dates = [
+        (_shift_years(today, years).toordinal() + offset)
+        for years in (21, 66) for offset in (-1, 0, 1)
+    ]
+    boundary_dates = [date.fromordinal(ordinal).isoformat() for ordinal in boundary_dates]
+
+    def number():
+        return rng.choice([
+            str(rng.randint(0, 3_000_000)), str(rng.uniform(0, 2e7)), '', 'abc', ' 450000 ', '1e400', 'nan',
+            'inf', '-5', '0', '300000', '1_000_000', '299999.99', '₹5,00,000', '1e-300',
+        ])
+
+    def cibil():
+        return rng.choice([
+            str(rng.randint(300, 900)), '', '²', '٣٣٣', '700.5', ' 700', '0', '550', '549', '650', '649', '9' * 30,
+        ])
+
+    def date_of_birth():
+        year = rng.randint(1940, 2012)
+        return rng.choice([
+            f'{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}', f'{year}-2-30', f'{year}-02-29',
+            f'{year}-1-5', '', 'not a date', '0000-01-01', '２００１-01-01', ' 1990-01-01', rng.choice(boundary_dates),
+        ])
+
+    def tenure():
+        return rng.choice(['1', '5', '10', '15', '20', '30', '', 'abc', '0', '0.5', '40', '41', 'nan', '2.5',
+                           '0.02', '1e9', '-3'])
+
+    def row():
+        return {
+            'annual-income': number(),
+            'loan-amount': number(),
+            'cibil-score': cibil(),
+            'date-of-birth': date_of_birth(),
+            'loan-type': rng.choice(['home', 'Car', 'education loan', 'personal', 'HOME-car', '']),
+            'employment-type': rng.choice(['salaried', 'Self-Employed', 'SALARIED person', '']),
+            'loan-tenure': tenure(),
+        }
+
+    return row
+
+
+def _odd_rows():
+    """Rows with non-string values, which the scalar code turns into its error result"""
+    base = {'annual-income': '500000', 'loan-amount': '100000', 'cibil-score': '700', 'date-of-birth': '1990-01-01',
+            'loan-type': 'home', 'employment-type': 'salaried', 'loan-tenure': '10'}
+    rows = []
+    for field in FORM_FIELDS:
+        for value in (None, 5):
+            rows.append(dict(base, **{field: value}))
+    return rows
+
+
+def _perturbed_rules(definition, rng, number):
+    """A variant of the rule file with shifted thresholds, operators and statuses"""
+    from app.utils.eligibility_rules import FIELDS, OPERATORS, STATUSES
+    variant = copy.deepcopy(definition)
+    variant['version'] = f"parity-{number}"
+    for check in variant['checks']:
+        check['value'] = round(check['value'] * rng.uniform(0.5, 1.5), rng.choice([0, 2]))
+        if rng.random() < 0.3:
+            check['op'] = rng.choice(list(OPERATORS))
+        if rng.random() < 0.2:
+            check['status'] = rng.choice(STATUSES)
+    extra = {'field': rng.choice(FIELDS), 'op': rng.choice(list(OPERATORS)), 'status': rng.choice(STATUSES),
+             'reason': f'Extra check {number}'}
+    extra['value'] = {'age': 40, 'annual_income': 800000, 'loan_amount': 1000000, 'loan_to_income': 2,
+                      'emi_to_income': 0.3, 'cibil_score': 720}[extra['field']]
+    variant['checks'].insert(rng.randrange(len(variant['checks']) + 1), extra)
+    for entry in variant.get('interest_rates', {}).get('loan_type', []):
+        entry['rate'] = round(rng.uniform(0, 20), 2)
+    variant.setdefault('interest_rates', {})['default'] = rng.choice([0, 7.25, 11.0, 18.5])
+    return variant
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the batch rule engine against the one-at-a-time one')
+    parser.add_argument('--rows', type=int, default=20000, help='random rows per rule set')
+    parser.add_argument('--rule-sets', type=int, default=5, help='perturbed rule sets besides the shipped one')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    from app.utils.eligibility_batch import rule_based_eligibility_batch
+    from app.utils.eligibility_rules import DEFAULT_RULES_PATH, RuleSet, load_rule_set
+    from app.utils.helpers import rule_based_eligibility_assessment
+
+    rng = random.Random(args.seed)
+    make_row = _row_generator(rng)
+    shipped = load_rule_set(DEFAULT_RULES_PATH)
+    with open(DEFAULT_RULES_PATH, 'r', encoding='utf-8') as file:
+        definition = json.load(file)
+    rule_sets = [shipped] + [RuleSet(_perturbed_rules(definition, rng, n)) for n in range(1, args.rule_sets + 1)]
+
+    results, examples = {}, []
+    started = time.perf_counter()
+    for rule_set in rule_sets:
+        rows = [make_row() for _ in range(args.rows)] + _odd_rows()
+        # The scalar code prints every assessment error
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = [rule_based_eligibility_assessment(row, rule_set) for row in rows]
+        columns = [[row[field] for row in rows] for field in FORM_FIELDS]
+        batch = rule_based_eligibility_batch(*columns, rule_set=rule_set)
+
+        mismatches = 0
+        for i, want in enumerate(expected):
+            got = {key: batch[key] if key == 'rule_set_version' else batch[key][i] for key in want}
+            if got != want:
+                mismatches += 1
+                if len(examples) < 5:
+                    examples.append({'rule_set': rule_set.version, 'row': rows[i], 'scalar': want, 'batch': got})
+        results[rule_set.version] = {'rows': len(rows), 'mismatches': mismatches}
+
+    total = sum(result['mismatches'] for result in results.values())
+    if args.json:
+        print(json.dumps({'rule_sets': results, 'examples': examples, 'passed': total == 0}, indent=2, default=str))
+    else:
+        for version, result in results.items():
+            print(f"{version:<12} {result['rows']:8d} rows  {result['mismatches']:6d} mismatches")
+        for example in examples:
+            print(f"\n{example['rule_set']}: {example['row']}\n  scalar: {example['scalar']}\n  batch:  {example['batch']}")
+        print(f"{'PASS' if total == 0 else 'FAIL'} in {time.perf_counter() - started:.1f}s")
+    sys.exit(0 if total == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
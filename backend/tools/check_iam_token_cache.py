@@ -0,0 +1,106 @@
+# backend/tools/check_iam_token_cache.py
+#
+# Counts the requests that reach the IAM token endpoint (tools/watson_stub.py)
+# with and without the token cache in watson_service.get_iam_token. Many
+# concurrent callers ask for a token in bursts spread over a few token
+# lifetimes. Without the cache every call is a request. With it there should
+# be about one request per lifetime, because concurrent callers share a
+# single fetch and the background refresh renews the token before it
+# expires. Exits non-zero if the cache doesn't cut the calls as expected.
+# Run from the backend folder:
+#
+#   python -m tools.check_iam_token_cache
+#   python -m tools.check_iam_token_cache --calls 2000 --threads 32 --token-ttl 3 --duration 10 --json
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.watson_stub import start_stub
+
+
+def _run(flask_app, get_token, calls, threads, duration):
+    """Call get_token 'calls' times from 'threads' threads, spread evenly over 'duration' seconds"""
+    bursts = max(1, int(duration / 0.1))
+    per_burst = max(1, calls // bursts)
+
+    def call(_):
+        with flask_app.app_context():
+            return get_token() is not None
+
+    started = time.perf_counter()
+    ok = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for burst in range(bursts):
+            ok += sum(executor.map(call, range(per_burst)))
+            # Keep to the schedule so the run spans several token lifetimes
+            time.sleep(max(0.0, started + (burst + 1) * duration / bursts - time.perf_counter()))
+    return ok, bursts * per_burst
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure IAM calls saved by the token cache against a local stub')
+    parser.add_argument('--calls', type=int, default=1000, help='token requests made by the app')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--token-ttl', type=int, default=4, help='lifetime of stub tokens in seconds')
+    parser.add_argument('--duration', type=float, default=8.0, help='seconds the calls are spread over')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.services import watson_service
+
+    server, base_url = start_stub(token_ttl=args.token_ttl)
+    # Keep anything the app writes out of the real data folder
+    os.chdir(tempfile.mkdtemp(prefix='iam-check-'))
+    flask_app = create_app()
+    flask_app.config.update(
+        API_KEY='check-key',
+        IAM_ENDPOINT=f"{base_url}/identity/token",
+        # Scaled down with the short stub lifetime: refresh in the last half, never hand out the last quarter
+        IAM_TOKEN_REFRESH_WINDOW=args.token_ttl / 2,
+        IAM_TOKEN_EXPIRY_MARGIN=args.token_ttl / 4,
+    )
+    iam_settings = (flask_app.config['API_KEY'], flask_app.config['IAM_ENDPOINT'])
+
+    results = {}
+    runs = {
+        # What every /ask and assessment used to do
+        'uncached': lambda: watson_service._fetch_iam_token(*iam_settings),
+        'cached': watson_service.get_iam_token,
+    }
+    for name, get_token in runs.items():
+        before = server.options.counts['token']
+        ok, calls = _run(flask_app, get_token, args.calls, args.threads, args.duration)
+        results[name] = {'calls': calls, 'tokens_returned': ok, 'iam_requests': server.options.counts['token'] - before}
+    server.shutdown()
+
+    uncached, cached = results['uncached']['iam_requests'], results['cached']['iam_requests']
+    lifetimes = args.duration / args.token_ttl
+    results['reduction'] = round(1 - cached / uncached, 4) if uncached else None
+    # Refreshing in the last half of a lifetime means at most two fetches per lifetime, plus the first one
+    results['passed'] = (
+        results['cached']['tokens_returned'] == results['cached']['calls']
+        and cached <= 2 * lifetimes + 2
+        and uncached == results['uncached']['calls']
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.calls} token requests from {args.threads} threads over {args.duration}s, "
+              f"stub tokens live {args.token_ttl}s")
+        for name in runs:
+            result = results[name]
+            print(f"{name:<9} {result['iam_requests']:6d} IAM requests for {result['calls']} calls "
+                  f"({result['tokens_returned']} tokens returned)")
+        print(f"IAM requests cut by {results['reduction']:.1%}: {'PASS' if results['passed'] else 'FAIL'}")
+    sys.exit(0 if results['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+# backend/tools/load_test_ask.py
+#
+# Load test comparing /ask throughput on the sync Flask path against the async
+# gateway (asgi.py), both talking to a local mock agent that answers after a
+# fixed delay. Run from the backend folder:
+#
+#   python -m tools.load_test_ask --requests 2000 --concurrency 500 --delay 1.0 --sync-workers 8
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+# --- Delayed mock agent ---
+
+async def _handle_mock_connection(reader, writer, delay):
+    """Minimal HTTP/1.1 keep-alive handler speaking the IAM token and chat-completions shapes"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            await reader.readexactly(int(headers.get('content-length', 0)))
+
+            path = request_line.split()[1].decode('latin-1')
+            if path.startswith('/identity/token'):
+                body = {"access_token": "load-test-token", "expires_in": 3600}
+            else:
+                await asyncio.sleep(delay)
+                body = {"choices": [{"message": {"role": "assistant", "content": "Mock agent reply"}}]}
+            payload = json.dumps(body).encode('utf-8')
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                + f'Content-Length: {len(payload)}\r\n\r\n'.encode('ascii') + payload
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_mock_agent(delay):
+    """Start the mock agent on its own event loop thread and return its base URL"""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    address = {}
+
+    async def serve():
+        server = await asyncio.start_server(
+            lambda r, w: _handle_mock_connection(r, w, delay), '127.0.0.1', 0, backlog=4096
+        )
+        address['port'] = server.sockets[0].getsockname()[1]
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=lambda: loop.run_until_complete(serve()), daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+
+# --- Servers under test ---
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """A WSGI server with a fixed number of worker threads, like N sync gunicorn workers"""
+
+    def __init__(self, host, port, app, workers):
+        super().__init__(host, port, app, handler=_QuietRequestHandler)
+        self.request_queue_size = 4096
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _configure_app(agent_url):
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config.update(
+        API_KEY='load-test-key',
+        AGENT_ENDPOINT=f"{agent_url}/chat",
+        IAM_ENDPOINT=f"{agent_url}/identity/token",
+        HTTP_MAX_CONCURRENCY=10000,
+        HTTP_POOL_SIZE=1000,
+    )
+    return flask_app
+
+
+def start_sync_server(flask_app, workers):
+    port = _free_port()
+    server = PooledWSGIServer('127.0.0.1', port, flask_app, workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{port}", server
+
+
+def start_async_server(flask_app):
+    from app.async_gateway import create_asgi_app
+    port = _free_port()
+    config = uvicorn.Config(create_asgi_app(flask_app), host='127.0.0.1', port=port,
+                            log_level='warning', backlog=4096, lifespan='on')
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+# --- Load generator ---
+
+async def run_load(base_url, total, concurrency):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(limits=limits, timeout=300) as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(f"{base_url}/ask", json={"query": f"load test {i}"})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'elapsed': elapsed,
+        'throughput': total / elapsed,
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare /ask throughput on the sync and async paths')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.5, help='mock agent latency in seconds')
+    parser.add_argument('--sync-workers', type=int, default=8, help='worker threads for the sync path')
+    args = parser.parse_args()
+
+    # Keep the chat logs written during the run out of the real data folder
+    os.chdir(tempfile.mkdtemp(prefix='ask-load-test-'))
+    agent_url = start_mock_agent(args.delay)
+    flask_app = _configure_app(agent_url)
+
+    sync_url, _ = start_sync_server(flask_app, args.sync_workers)
+    async_url, _ = start_async_server(flask_app)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, agent delay {args.delay}s")
+    for label, url in ((f'sync ({args.sync_workers} workers)', sync_url), ('async gateway', async_url)):
+        result = asyncio.run(run_load(url, args.requests, args.concurrency))
+        print(f"{label:<22} {result['throughput']:8.1f} req/s  p50 {result['p50']:.2f}s  "
+              f"p99 {result['p99']:.2f}s  errors {result['errors']}  ({result['elapsed']:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
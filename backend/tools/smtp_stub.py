@@ -0,0 +1,135 @@
+# backend/tools/smtp_stub.py
+#
+# Local stand-in for the SMTP server, for benchmarks of the notification path.
+# Speaks just enough SMTP for smtplib: EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT,
+# DATA, RSET, NOOP and QUIT, and accepts every login and message. There is no
+# STARTTLS, so point the app at it with:
+#
+#   SMTP_SERVER=127.0.0.1
+#   SMTP_PORT=8025
+#   SMTP_USE_TLS=false
+#   SMTP_USERNAME=anything
+#   SMTP_PASSWORD=anything
+#
+# and run from the backend folder:
+#
+#   python -m tools.smtp_stub --handshake-latency 0.8 --drop-after 50
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class SMTPStubOptions:
+    def __init__(self, handshake_latency=0.0, command_latency=0.0, drop_after=0):
+        # Stands in for the TCP/TLS setup and login round trips of a hosted server
+        self.handshake_latency = handshake_latency
+        self.command_latency = command_latency
+        # Close a connection after this many messages (0: never), like servers that cap messages per session
+        self.drop_after = drop_after
+        self.counts = {'connections': 0, 'logins': 0, 'messages': 0, 'drops': 0}
+        self.counts_lock = threading.Lock()
+
+    def count(self, name):
+        with self.counts_lock:
+            self.counts[name] += 1
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    options = SMTPStubOptions()
+
+    def _reply(self, line):
+        if self.options.command_latency:
+            time.sleep(self.options.command_latency)
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def _read_line(self):
+        """The next command line, or None once the client has gone"""
+        line = self.rfile.readline()
+        return line.decode('utf-8', errors='replace').rstrip('\r\n') if line else None
+
+    def handle(self):
+        self.options.count('connections')
+        time.sleep(self.options.handshake_latency / 2)
+        self._reply('220 smtp-stub ESMTP ready')
+        messages = 0
+        while True:
+            line = self._read_line()
+            if line is None:
+                return
+            command = line[:4].upper()
+            if command == 'EHLO':
+                self._reply('250-smtp-stub\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SIZE 10485760')
+            elif command == 'HELO':
+                self._reply('250 smtp-stub')
+            elif command == 'AUTH':
+                if line.upper().startswith('AUTH LOGIN'):
+                    self._reply('334 VXNlcm5hbWU6')
+                    self._read_line()
+                    self._reply('334 UGFzc3dvcmQ6')
+                    self._read_line()
+                time.sleep(self.options.handshake_latency / 2)
+                self.options.count('logins')
+                self._reply('235 2.7.0 Authentication successful')
+            elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                self.options.count('messages')
+                self._reply('250 2.0.0 Queued')
+                messages += 1
+                if self.options.drop_after and messages >= self.options.drop_after:
+                    self.options.count('drops')
+                    return
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class SMTPStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_stub(host='127.0.0.1', port=0, **options):
+    """Start the stub on a background thread. Returns (server, (host, port)); server.options has counts."""
+    handler = type('ConfiguredSMTPStubHandler', (SMTPStubHandler,), {'options': SMTPStubOptions(**options)})
+    server = SMTPStubServer((host, port), handler)
+    server.options = handler.options
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, (host, server.server_address[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the SMTP server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--handshake-latency', type=float, default=0.8,
+                        help='seconds spent on the greeting and login of each connection')
+    parser.add_argument('--command-latency', type=float, default=0.0, help='seconds before every reply')
+    parser.add_argument('--drop-after', type=int, default=0, help='close connections after this many messages')
+    args = parser.parse_args()
+
+    server, (host, port) = start_stub(
+        args.host, args.port, handshake_latency=args.handshake_latency,
+        command_latency=args.command_latency, drop_after=args.drop_after,
+    )
+    print(f"SMTP stub listening on {host}:{port}")
+    print(f"  SMTP_SERVER={host} SMTP_PORT={port} SMTP_USE_TLS=false")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print(f"Counts: {server.options.counts}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# backend/tools/watson_stub.py
+#
+# Local stand-in for the IBM IAM token endpoint and the Watson agent
+# (chat-completions shape), for offline load tests and benchmarks. Point the
+# app at it with:
+#
+#   IAM_ENDPOINT=http://127.0.0.1:8089/identity/token
+#   AGENT_ENDPOINT=http://127.0.0.1:8089/v1/chat
+#   API_KEY=anything
+#
+# and run from the backend folder:
+#
+#   python -m tools.watson_stub --latency 0.8 --jitter 0.4 --error-rate 0.05
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CIBIL_PATTERN = re.compile(r'CIBIL Score:\s*(\d+)')
+
+
+class StubOptions:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 stream_delay=0.02, token_ttl=3600, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_delay = stream_delay
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.counts = {'token': 0, 'chat': 0, 'errors': 0}
+        self.counts_lock = threading.Lock()
+
+    def draw(self):
+        """(delay, fail) for one agent call"""
+        with self.random_lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            return delay, self.random.random() < self.error_rate
+
+    def count(self, name):
+        with self.counts_lock:
+            self.counts[name] += 1
+
+
+def _eligibility_block(cibil):
+    status = 'APPROVED' if cibil >= 700 else 'CONDITIONALLY_APPROVED' if cibil >= 650 else 'REJECTED'
+    return (f"ELIGIBILITY: {status}\n"
+            f"REASON: Stub assessment based on CIBIL score {cibil}\n"
+            f"DOCUMENTS: Aadhaar Card, PAN Card, Bank Statements (6 months)\n"
+            f"RECOMMENDATIONS: None")
+
+
+def stub_reply(prompt):
+    """
+    A reply in the shape the caller expects: eligibility lines for assessment
+    prompts (one 'APPLICANT n' block each for batched prompts), plain text otherwise.
+    """
+    if 'ELIGIBILITY:' in prompt:
+        scores = [int(score) for score in CIBIL_PATTERN.findall(prompt)] or [0]
+        if 'APPLICANT 1' not in prompt:
+            return _eligibility_block(scores[0])
+        return '\n\n'.join(f"APPLICANT {number}\n{_eligibility_block(cibil)}"
+                            for number, cibil in enumerate(scores, start=1))
+    return f"Stub agent reply to: {prompt.strip()[:200]}"
+
+
+class WatsonStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    options = StubOptions()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.startswith('/identity/token'):
+            self.options.count('token')
+            now = int(time.time())
+            self._send_json(200, {
+                'access_token': f'stub-token-{now}',
+                'token_type': 'Bearer',
+                'expires_in': self.options.token_ttl,
+                'expiration': now + self.options.token_ttl,
+            })
+            return
+
+        self.options.count('chat')
+        delay, fail = self.options.draw()
+        time.sleep(delay)
+        if fail:
+            self.options.count('errors')
+            self._send_json(self.options.error_status, {'error': 'stub injected failure'})
+            return
+
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': 'invalid JSON'})
+            return
+        messages = payload.get('messages') or [{}]
+        reply = stub_reply(messages[-1].get('content', ''))
+
+        if payload.get('stream'):
+            self._send_stream(reply)
+        else:
+            self._send_json(200, {'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}}]})
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, reply):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        words = reply.split(' ')
+        for i, word in enumerate(words):
+            chunk = word if i == 0 else ' ' + word
+            event = {'choices': [{'index': 0, 'delta': {'content': chunk}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            time.sleep(self.options.stream_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_stub(host='127.0.0.1', port=0, **options):
+    """Start the stub on a background thread. Returns (server, base_url); server.options has call counts."""
+    handler = type('ConfiguredWatsonStubHandler', (WatsonStubHandler,), {'options': StubOptions(**options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.options = handler.options
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the IBM IAM and Watson agent endpoints')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help='mean agent latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- seconds added to each latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of agent calls that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--stream-delay', type=float, default=0.02, help='seconds between streamed chunks')
+    parser.add_argument('--token-ttl', type=int, default=3600, help='IAM token lifetime in seconds')
+    parser.add_argument('--seed', type=int, default=None, help='seed latency and failures for repeatable runs')
+    args = parser.parse_args()
+
+    server, base_url = start_stub(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_status=args.error_status, stream_delay=args.stream_delay, token_ttl=args.token_ttl, seed=args.seed,
+    )
+    print(f"Watson stub listening on {base_url}")
+    print(f"  IAM_ENDPOINT={base_url}/identity/token")
+    print(f"  AGENT_ENDPOINT={base_url}/v1/chat")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print(f"Calls: {server.options.counts}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()